@@ -0,0 +1,318 @@
+# -----------------------------------------------------------
+# Adaptive MaxDiff-Aufgabenwahl
+#   • laufende Nutzenschätzung je Emotion × Kongruenz-Block
+#     (sequentielles Best/Worst-MNL, Laplace-Posterior mit Normal-Prior)
+#   • Suffizienzstatistik = Zähler je (Block, Menge, Best, Worst) → O(1)-Update
+#   • Aufgabe = (Frage, Systemmenge), volle Menge oder Teilmengen ab
+#     MIN_SHOWN Systemen; Score = Varianzgewinn auf den unsichersten, noch
+#     unentschiedenen Systemkontrasten, Auswahl = argmax über vorberechnete Scores
+#   • ausgegebene Aufgaben werden vorgemerkt (erwartete Information), so
+#     verteilen sich Aufgaben einer Person und paralleler Personen
+#   • Simulation: Personen bis zur gleichen KI-Breite, fest vs. adaptiv
+# -----------------------------------------------------------
+
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import norm
+
+from study_design import StudyDesign, load_design
+from survey_validation import load_survey
+
+# ---------- Konfiguration ----------
+DATA_PATH = Path("Survey_Entries.csv")
+ALPHA = 0.05
+PRIOR_SD = 2.0               # schwacher Prior auf den Nutzen, hält die Schätzung endlich
+MAX_ITER, TOL = 50, 1e-8
+MIN_SHOWN = 3                # kleinste Systemmenge einer adaptiven Aufgabe
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def task_subsets(k: int, min_shown: int) -> np.ndarray:
+    """
+    Alle Systemmengen mit min_shown…k Systemen als (Mengen, k), kürzere Mengen
+    mit −1 aufgefüllt; die volle Menge (festes Design) steht an Position 0.
+    """
+    sets = [s for m in range(k, min_shown - 1, -1) for s in combinations(range(k), m)]
+    subsets = np.full((len(sets), k), -1)
+    for i, members in enumerate(sets):
+        subsets[i, :len(members)] = members
+    return subsets
+
+
+def _choice_moments(beta: np.ndarray, subsets: np.ndarray):
+    """
+    Wahrscheinlichkeiten je Menge: p[b, s, i] für Best und q[b, s, i, j] für
+    Worst = j nach Best = i (Positionen innerhalb der Menge). Auffüllpositionen
+    (−1) haben Wahrscheinlichkeit 0.
+    """
+    present = subsets >= 0
+    u = np.where(present, beta[:, subsets], -np.inf)                # (B, S, m)
+    p = np.exp(u - u.max(axis=-1, keepdims=True))
+    p /= p.sum(axis=-1, keepdims=True)
+    m = subsets.shape[1]
+    v = np.broadcast_to(np.where(present, -u, -np.inf)[..., None, :],
+                        u.shape[:-1] + (m, m)).copy()
+    v[..., np.arange(m), np.arange(m)] = -np.inf                    # Best fällt weg
+    v[..., ~present, :] = 0                                         # Best ausgeschlossen, p = 0
+    q = np.exp(v - v.max(axis=-1, keepdims=True))
+    q /= q.sum(axis=-1, keepdims=True)
+    return p, q
+
+
+def _expected_information(beta: np.ndarray, subsets: np.ndarray, k: int) -> np.ndarray:
+    """Erwartete Fisher-Information einer Best/Worst-Antwort je (Block, Menge): (B, S, k, k)."""
+    p, q = _choice_moments(beta, subsets)
+    cov_best = _multinomial_cov(p)                                  # (B, S, m, m)
+    cov_worst = np.einsum("bsi,bsijk->bsjk", p, _multinomial_cov(q))
+    info_local = cov_best + cov_worst
+    n_blocks, n_sets, m = p.shape
+    info = np.zeros((n_blocks, n_sets, k + 1, k + 1))               # Spalte k = Ablage
+    slots = np.where(subsets >= 0, subsets, k)
+    rows, cols = slots[:, :, None], slots[:, None, :]
+    info[:, np.arange(n_sets)[:, None, None], rows, cols] = info_local
+    return info[..., :k, :k]
+
+
+def _multinomial_cov(p: np.ndarray) -> np.ndarray:
+    return p[..., :, None] * (np.eye(p.shape[-1]) - p[..., None, :])
+
+
+def fit_utilities(counts: np.ndarray, subsets: np.ndarray, prior_precision: np.ndarray,
+                  beta: np.ndarray | None = None, max_iter: int = MAX_ITER,
+                  tol: float = TOL) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Posterior-Modus und -Kovarianz des Best/Worst-MNL für alle Blöcke gleichzeitig
+    (Newton). counts[Block, Menge, Best-Position, Worst-Position]; Nutzen je
+    Block zentriert. Auffüllpositionen (−1) der Mengen landen in einer
+    zusätzlichen Ablagespalte k.
+    """
+    n_rows, k = len(counts), prior_precision.shape[0]
+    n_best = counts.sum(axis=3)                                     # (B, S, m)
+    n_worst = counts.sum(axis=2)
+    n_sets = counts.sum(axis=(2, 3))                                # (B, S)
+    slots = np.where(subsets >= 0, subsets, k)
+    observed = np.zeros((n_rows, k + 1))
+    np.add.at(observed.T, slots.ravel(), (n_best - n_worst).reshape(n_rows, -1).T)
+    observed = observed[:, :k]
+
+    beta = np.zeros((n_rows, k)) if beta is None else beta.copy()
+    for _ in range(max_iter):
+        p, q = _choice_moments(beta, subsets)
+        # erwartete Best- und Worst-Häufigkeiten bei den beobachteten Best-Wahlen
+        exp_best = n_sets[..., None] * p
+        exp_worst = np.einsum("bsi,bsij->bsj", n_best, q)
+        expected = np.zeros((n_rows, k + 1))
+        np.add.at(expected.T, slots.ravel(), (exp_best - exp_worst).reshape(n_rows, -1).T)
+        grad = observed - expected[:, :k] - beta @ prior_precision
+        info_local = (n_sets[..., None, None] * _multinomial_cov(p)
+                      + np.einsum("bsi,bsijk->bsjk", n_best, _multinomial_cov(q)))
+        hess = np.zeros((n_rows, k + 1, k + 1))
+        rows, cols = slots[:, :, None], slots[:, None, :]
+        np.add.at(hess, (slice(None), rows, cols), info_local)
+        hess = hess[:, :k, :k] + prior_precision
+        step = np.linalg.solve(hess, grad[..., None])[..., 0]
+        beta += step
+        if np.max(np.abs(step)) < tol:
+            break
+    return beta - beta.mean(axis=1, keepdims=True), np.linalg.inv(hess)
+
+
+class AdaptiveDesign:
+    """
+    Laufende Schätzung plus Aufgabenwahl für ein Studiendesign.
+
+    Aufgaben sind (Frage, Systemmenge); standardmäßig zeigt jede Aufgabe alle
+    Systeme wie im festen Design, mit min_shown < k werden zusätzlich
+    Teilmengen ab min_shown Systemen angeboten. Ausgegebene, noch nicht
+    ausgewertete Aufgaben zählen mit ihrer erwarteten Information als
+    „vorgemerkt“, damit aufeinanderfolgende Aufgaben (auch verschiedener
+    Personen zwischen zwei update()) nicht alle denselben Block treffen.
+    """
+
+    def __init__(self, design: StudyDesign, min_shown: int | None = None,
+                 prior_sd: float = PRIOR_SD):
+        self.design = design
+        self.k = design.n_systems
+        self.subsets = task_subsets(self.k, min_shown or self.k)
+        self.prior_precision = np.eye(self.k) / prior_sd ** 2
+        # Zähler[Block, Menge, Best-Position, Worst-Position]
+        self.counts = np.zeros((design.n_blocks, len(self.subsets), self.k, self.k))
+        self._subset_index = {tuple(s[s >= 0]): i for i, s in enumerate(self.subsets)}
+        self.beta = np.zeros((design.n_blocks, self.k))
+        self.cov = np.broadcast_to(np.linalg.inv(self.prior_precision),
+                                   (design.n_blocks, self.k, self.k)).copy()
+        self.pending = np.zeros((design.n_blocks, len(self.subsets)))   # ausgegeben
+        self._answered = np.zeros_like(self.pending)                    # seit update()
+        self.scores = np.zeros((design.n_blocks, len(self.subsets)))
+        self._pairs = np.array(list(combinations(range(self.k), 2)))
+        self.update()
+
+    # ---------- Daten ----------
+    def record(self, question: int, best: int, worst: int, subset=None) -> None:
+        """Eine Antwort (Frageindex, 0-basierte Systeme) in die Zähler übernehmen."""
+        s = self._subset_index[tuple(sorted(subset))] if subset is not None else 0
+        members = list(self.subsets[s])
+        block = self.design.question_block[question]
+        self.counts[block, s, members.index(best), members.index(worst)] += 1
+        self._answered[block, s] += 1
+
+    def record_many(self, best: np.ndarray, worst: np.ndarray) -> None:
+        """Volle (n, q)-Antwortmatrizen (alle Systeme gezeigt) per bincount übernehmen."""
+        valid = (best >= 0) & (worst >= 0) & (best != worst)
+        block = np.broadcast_to(self.design.question_block, best.shape)[valid]
+        flat = (block * self.k + best[valid]) * self.k + worst[valid]
+        added = np.bincount(flat, minlength=self.design.n_blocks * self.k * self.k)
+        self.counts[:, 0] += added.reshape(self.design.n_blocks, self.k, self.k)
+
+    # ---------- Schätzung ----------
+    def update(self, max_iter: int = MAX_ITER, tol: float = TOL) -> None:
+        """
+        Newton-Schritte für alle Blöcke gleichzeitig; beantwortete Aufgaben
+        verlassen die Vormerkung, danach Aufgabenscores neu.
+        """
+        self.beta, self.cov = fit_utilities(self.counts, self.subsets, self.prior_precision,
+                                            self.beta, max_iter, tol)
+        self.pending = np.maximum(self.pending - self._answered, 0)
+        self._answered[:] = 0
+        self._info = _expected_information(self.beta, self.subsets, self.k)
+        self._precision = np.linalg.inv(self.cov)
+        self._score_tasks(np.arange(self.design.n_blocks))
+
+    def contrasts(self) -> tuple[np.ndarray, np.ndarray]:
+        """Differenzen β_i − β_j und ihre Standardfehler für alle Paare: (B, Paare)."""
+        i, j = self._pairs.T
+        delta = self.beta[:, i] - self.beta[:, j]
+        var = self.cov[:, i, i] + self.cov[:, j, j] - 2 * self.cov[:, i, j]
+        return delta, np.sqrt(var)
+
+    def _score_tasks(self, blocks: np.ndarray) -> None:
+        """
+        Score je (Block, Menge) = Σ über Kontraste P(noch unentschieden) · Var ·
+        Varianzabnahme durch eine weitere Aufgabe. P ≈ Φ(z_krit − |δ|/SE) mit
+        der Varianz nach allen vorgemerkten Aufgaben: entschiedene Kontraste
+        zählen kaum noch, die unsichersten am meisten.
+        """
+        i, j = self._pairs.T
+        precision = (self._precision[blocks]
+                     + np.einsum("bs,bsij->bij", self.pending[blocks], self._info[blocks]))
+        cov = np.linalg.inv(precision)
+        var = cov[:, i, i] + cov[:, j, j] - 2 * cov[:, i, j]             # (b, Paare)
+        delta = self.beta[blocks][:, i] - self.beta[blocks][:, j]
+        undecided = norm.cdf(norm.ppf(1 - ALPHA / 2) - np.abs(delta) / np.sqrt(var))
+        cov_new = np.linalg.inv(precision[:, None] + self._info[blocks])  # (b, S, k, k)
+        var_new = cov_new[..., i, i] + cov_new[..., j, j] - 2 * cov_new[..., i, j]
+        gain = var[:, None, :] - var_new
+        self.scores[blocks] = ((undecided * var)[:, None, :] * gain).sum(axis=-1)
+
+    # ---------- Auswahl ----------
+    def next_task(self, answered: np.ndarray) -> tuple[int, np.ndarray] | None:
+        """
+        Nächste Aufgabe für eine Person: (Frageindex, Systeme) oder None, wenn
+        alle Fragen beantwortet sind. answered: Bool-Maske über die Fragen.
+        Die Aufgabe wird vorgemerkt und ihr Block neu bewertet.
+        """
+        open_q = ~answered
+        if not open_q.any():
+            return None
+        blocks = self.design.question_block
+        has_open = np.bincount(blocks[open_q], minlength=self.design.n_blocks) > 0
+        scores = np.where(has_open[:, None], self.scores, -np.inf)
+        block, subset = np.unravel_index(np.argmax(scores), scores.shape)
+        question = np.flatnonzero(open_q & (blocks == block))[0]
+        self.pending[block, subset] += 1
+        self._score_tasks(np.array([block]))
+        systems = self.subsets[subset]
+        return int(question), systems[systems >= 0]
+
+
+def simulate(design: StudyDesign, beta_true: np.ndarray, n_respondents: int,
+             tasks_per_respondent: int, adaptive: bool, seed: int = SEED,
+             min_shown: int = MIN_SHOWN) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulierte Erhebung mit wahren Nutzen beta_true; Schätzung wird nach jeder
+    Person aktualisiert. Fest: zufällige Fragen, alle Systeme; adaptiv:
+    next_task mit Teilmengen ab min_shown Systemen. Gibt die Kontrast-SE nach
+    jeder Person (n, Blöcke, Paare) und die Schätzungen am Ende zurück.
+    """
+    rng = np.random.default_rng(seed)
+    engine = AdaptiveDesign(design, min_shown if adaptive else None)
+    path = []
+    for _ in range(n_respondents):
+        answered = np.zeros(design.n_questions, bool)
+        order = rng.permutation(design.n_questions)
+        for t in range(tasks_per_respondent):
+            if adaptive:
+                question, systems = engine.next_task(answered)
+            else:
+                question, systems = order[t], np.arange(design.n_systems)
+            utility = beta_true[design.question_block[question], systems]
+            best = int(np.argmax(utility + rng.gumbel(size=len(systems))))
+            v = -utility + rng.gumbel(size=len(systems))
+            v[best] = -np.inf
+            engine.record(question, systems[best], systems[int(np.argmax(v))], systems)
+            answered[question] = True
+        engine.update()
+        path.append(engine.contrasts()[1])
+    return np.array(path), engine.contrasts()[0]
+
+
+def respondents_needed(se_path: np.ndarray, target: float, mask: np.ndarray) -> int | None:
+    """Erste Personenzahl, ab der die mittlere SE der Kontraste in mask ≤ target ist."""
+    reached = np.flatnonzero(se_path[:, mask].mean(axis=1) <= target)
+    return int(reached[0]) + 1 if len(reached) else None
+
+
+if __name__ == "__main__":
+    design = load_design()
+    df, best, worst = load_survey(DATA_PATH, design)
+    engine = AdaptiveDesign(design, MIN_SHOWN)
+    engine.record_many(best, worst)
+    engine.update()
+
+    delta, se = engine.contrasts()
+    print(f"Laufende Schätzung aus {len(df)} Teilnahmen:\n")
+    for b, (emo, cong) in enumerate(design.block_labels):
+        ranking = ", ".join(f"{design.systems[s]} {engine.beta[b, s]:+.2f}"
+                            for s in np.argsort(-engine.beta[b]))
+        print(f"  {emo:<10} {cong:<12} Score {engine.scores[b].max():.2e} | {ranking}")
+
+    answered = np.zeros(design.n_questions, bool)
+    question, systems = engine.next_task(answered)
+    print(f"\nNächste Aufgabe: {design.question_ids[question]} "
+          f"({' / '.join(design.block_labels[design.question_block[question]])}), "
+          f"Systeme {', '.join(design.systems[s] for s in systems)}")
+    start = time.perf_counter()
+    n_calls = 10_000
+    for _ in range(n_calls):
+        engine.next_task(answered)
+    per_call = (time.perf_counter() - start) / n_calls * 1e3
+    print(f"Auswahl inkl. Vormerkung in {per_call:.3f} ms")
+
+    # ---------- Simulation: Personen bis zur gleichen KI-Breite ----------
+    # Ziel = mittlere SE der offenen Kontraste (wahr |δ| < z_krit · SE) nach
+    # n_sim Personen im festen Design; adaptiv: erste Personenzahl, die sie erreicht
+    n_sim, tasks, seeds = 100, design.n_questions // 3, range(SEED, SEED + 6)
+    i, j = engine._pairs.T
+    z_crit = norm.ppf(1 - ALPHA / 2)
+    print(f"\nSimulation ({n_sim} Personen × {tasks} Aufgaben, {len(seeds)} Läufe, "
+          f"wahre Nutzen = aktuelle Schätzung × Faktor):")
+    for scale in (1, 2, 3):
+        beta_true = engine.beta * scale
+        fixed = np.mean([simulate(design, beta_true, n_sim, tasks, False, seed)[0]
+                         for seed in seeds], axis=0)
+        open_c = np.abs(beta_true[:, i] - beta_true[:, j]) / fixed[-1] < z_crit
+        target = fixed[-1][open_c].mean()
+        print(f"  Faktor {scale}: {open_c.sum()} von {open_c.size} Kontrasten offen, "
+              f"fest SE {target:.3f} bei {n_sim} Personen")
+        for label, min_shown in [("alle Systeme", design.n_systems),
+                                 (f"Teilmengen ab {MIN_SHOWN}", MIN_SHOWN)]:
+            path = np.mean([simulate(design, beta_true, n_sim, tasks, True, seed, min_shown)[0]
+                            for seed in seeds], axis=0)
+            needed = respondents_needed(path, target, open_c)
+            print(f"    adaptiv, {label:<17} SE {path[-1][open_c].mean():.3f}, "
+                  f"gleiche KI-Breite nach "
+                  f"{needed if needed else f'> {n_sim}'} Personen")
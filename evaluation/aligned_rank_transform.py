@@ -0,0 +1,143 @@
+# -----------------------------------------------------------
+# Aligned Rank Transform (ART) für System × Emotion × Kongruenz
+#   • Net-Score-Tensor (Teilnehmer, Emotion, Kongruenz, System), vollständig gekreuzt
+#   • je Effekt: Residuen + geschätzter Effekt → Ränge (Wobbrock et al. 2011)
+#   • RM-ANOVA aller ausgerichteten Datensätze im Batch: Effekt gegen
+#     Effekt × Teilnehmer, Quadratsummen über Randmittel (Inklusion–Exklusion)
+#   • getestet nur Effekte mit System: Net-Scores summieren je Block über die
+#     Systeme zu 0, Emotion/Kongruenz ohne System sind konstruktionsbedingt null
+# -----------------------------------------------------------
+
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import f as f_dist
+from scipy.stats import rankdata
+
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("aligned_rank_transform_results.csv")
+FACTORS = ("Emotion", "Kongruenz", "System")         # Achsen 1–3 des Tensors
+SYSTEM_AXIS = 3
+ALPHA = 0.05
+
+
+# ---------- Hilfsfunktionen ----------
+def score_tensor(net: np.ndarray, design: StudyDesign) -> np.ndarray:
+    """(n, Blöcke, Systeme) → (n, Emotion, Kongruenz, System); Block = e·|C| + c."""
+    n = net.shape[0]
+    return net.reshape(n, len(design.emotions), len(design.congruence), design.n_systems)
+
+
+def effects(n_factors: int = len(FACTORS), containing: int | None = None) -> list[tuple[int, ...]]:
+    """Haupt- und Wechselwirkungen als Achsentupel (Achse 0 = Teilnehmer), optional nur mit Achse."""
+    axes = range(1, n_factors + 1)
+    return [c for size in range(1, n_factors + 1) for c in combinations(axes, size)
+            if containing is None or containing in c]
+
+
+def component(values: np.ndarray, axes: tuple[int, ...], offset: int = 0) -> np.ndarray:
+    """
+    ANOVA-Komponente der Achsenmenge: Σ_{U ⊆ axes} (−1)^{|axes|−|U|} · Mittel über
+    alle Achsen außer U (broadcastfähig). offset überspringt führende Batch-Achsen.
+    """
+    all_axes = set(range(offset, values.ndim))
+    result = 0
+    for size in range(len(axes) + 1):
+        for kept in combinations(axes, size):
+            drop = tuple(sorted(all_axes - set(kept)))
+            sign = (-1) ** (len(axes) - size)
+            result = result + sign * values.mean(axis=drop, keepdims=True)
+    return result
+
+
+def _sum_of_squares(values: np.ndarray, axes: tuple[int, ...], offset: int) -> np.ndarray:
+    comp = component(values, axes, offset)
+    cells = np.prod([values.shape[a] for a in range(offset, values.ndim) if a not in axes])
+    return (comp ** 2).sum(axis=tuple(range(offset, values.ndim))) * cells
+
+
+def align_and_rank(y: np.ndarray, effect_list=None) -> np.ndarray:
+    """
+    Ausgerichtete und gerangte Daten für alle Effekte: (Effekte, n, …).
+    Ausrichtung: y − Zellmittel + geschätzter Effekt (aus den Zellmitteln).
+    """
+    effect_list = effect_list or effects(y.ndim - 1)
+    cell_means = y.mean(axis=0, keepdims=True)
+    residual = y - cell_means
+    aligned = np.stack([residual + component(cell_means, e) for e in effect_list])
+    flat = aligned.reshape(len(effect_list), -1)
+    return rankdata(flat, axis=1).reshape(aligned.shape)
+
+
+def rm_anova(ranked: np.ndarray, effect_list=None) -> pd.DataFrame:
+    """
+    F-Test je ausgerichtetem Datensatz für genau seinen Effekt:
+    F = (SS_E / df_E) / (SS_{E×Teilnehmer} / df_{E×Teilnehmer}).
+    """
+    effect_list = effect_list or effects(ranked.ndim - 2)
+    sizes = ranked.shape[1:]
+    rows = []
+    for i, axes in enumerate(effect_list):
+        data = ranked[i]
+        ss_effect = _sum_of_squares(data, axes, 0)
+        ss_error = _sum_of_squares(data, (0, *axes), 0)
+        df1 = int(np.prod([sizes[a] - 1 for a in axes]))
+        df2 = df1 * (sizes[0] - 1)
+        f = (ss_effect / df1) / (ss_error / df2)
+        rows.append({"Effekt": " × ".join(FACTORS[a - 1] for a in axes), "df1": df1, "df2": df2,
+                     "F": f, "p": f_dist.sf(f, df1, df2),
+                     "eta2_partial": ss_effect / (ss_effect + ss_error)})
+    return pd.DataFrame(rows)
+
+
+def alignment_check(y: np.ndarray, effect_list=None) -> float:
+    """
+    ART-Kontrolle: In jedem ausgerichteten (ungerangten) Datensatz sollen alle
+    anderen Effekte verschwinden. Gibt den größten Anteil fremder Quadratsummen zurück.
+    """
+    effect_list = effect_list or effects(y.ndim - 1)
+    cell_means = y.mean(axis=0, keepdims=True)
+    worst = 0.0
+    for target in effect_list:
+        aligned = y - cell_means + component(cell_means, target)
+        total = ((aligned - aligned.mean()) ** 2).sum()
+        for other in effects(y.ndim - 1):
+            if other != target:
+                worst = max(worst, _sum_of_squares(aligned, other, 0) / total)
+    return worst
+
+
+if __name__ == "__main__":
+    design = load_design()
+    df, best, worst = load_survey(DATA_PATH, design)
+    run = ResultStore().run("aligned_rank_transform", inputs=[DATA_PATH],
+                            params={"factors": FACTORS})
+
+    y = score_tensor(design.net_scores(best, worst), design).astype(float)
+    effect_list = effects(containing=SYSTEM_AXIS)
+    table = rm_anova(align_and_rank(y, effect_list), effect_list)
+    table.insert(0, "N", y.shape[0])
+
+    print(f"ART-RM-ANOVA über {y.shape[0]} Teilnehmer × "
+          + " × ".join(f"{f} ({s})" for f, s in zip(FACTORS, y.shape[1:])))
+    print(f"Ausrichtungskontrolle: max. Fremdanteil {alignment_check(y, effect_list):.1e}\n")
+    for r in table.itertuples():
+        star = " *" if r.p < ALPHA else ""
+        print(f"  {r.Effekt:<30} F({r.df1}, {r.df2}) = {r.F:7.3f}, p = {r.p:.4f}, "
+              f"η²p = {r.eta2_partial:.3f}{star}")
+
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    stored = table.rename(columns={"Effekt": "item", "F": "value", "p": "p_value", "N": "n"})
+    run.add_frame(stored[["item", "value", "p_value", "n"]], statistic="art_F")
+    run.add_frame(table.rename(columns={"Effekt": "item", "eta2_partial": "value",
+                                        "N": "n"})[["item", "value", "n"]],
+                  statistic="art_eta2_partial")
+    run.save()
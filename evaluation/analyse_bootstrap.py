@@ -5,14 +5,20 @@ from itertools import combinations
 from statsmodels.stats.multitest import multipletests
 from pathlib import Path
 
+from result_store import ResultStore
+from study_design import load_design
+
 # ---------- feste Reproduzierbarkeit ----------
 SEED = 2025
 rng = np.random.RandomState(SEED)
 # ---------------------------------------------
 
 # Daten laden
-df_cong  = pd.read_csv(Path("bws_congruent.csv"))
-df_incong = pd.read_csv(Path("bws_incongruent.csv"))
+CONG_PATH, INCONG_PATH = Path("bws_congruent.csv"), Path("bws_incongruent.csv")
+df_cong  = pd.read_csv(CONG_PATH)
+df_incong = pd.read_csv(INCONG_PATH)
+run = ResultStore().run("bootstrap", inputs=[CONG_PATH, INCONG_PATH], seed=SEED,
+                        params={"reps": 5000, "method": "bca"})
 
 # Net-Scores pro Person
 def netscore(df):
@@ -27,7 +33,7 @@ net_incong = netscore(df_incong)
 from arch.bootstrap import IIDBootstrap
 
 def bootstrap_diff_bca(data1, data2, reps=5000, alpha=0.05, seed=2025):
-    bs = IIDBootstrap((data1 - data2).dropna().values, random_state=seed)
+    bs = IIDBootstrap((data1 - data2).dropna().values, seed=seed)
     ci_low, ci_high = bs.conf_int(np.mean, reps=reps, method='bca', size=1-alpha).flatten()
     delta_hat = np.mean(data1 - data2)
     signif = ci_low > 0 or ci_high < 0
@@ -50,14 +56,17 @@ def bootstrap_diff_ci(df, emo, sys1, sys2, B=5000, alpha=0.05):
     signif = ci_low > 0 or ci_high < 0
     return delta_hat, ci_low, ci_high, signif
 
-systems  = ["CosyVoice", "EmoSpeech", "EmoKnob", "EmotiVoice"]
-emotions = ["Happy", "Sad", "Angry", "Surprised"]
+design   = load_design()
+systems  = design.systems
+emotions = design.emotions
 
 def all_comparisons(df):
     rows = []
     for emo in emotions:
+        pivot = (df.query("Emotion == @emo")
+                   .pivot(index="Teilnehmer", columns="System", values="net"))
         for s1, s2 in combinations(systems, 2):
-            delta, lo, hi, sig = bootstrap_diff_bca(df, emo, s1, s2)
+            delta, lo, hi, sig = bootstrap_diff_bca(pivot[s1], pivot[s2], seed=SEED)
             rows.append({
                 "Emotion": emo,
                 "System 1": s1,
@@ -85,5 +94,12 @@ print("\nBootstrap-Ergebnisse Inkongruent:")
 print(results_incong)
 
 # Speichern
+stored_columns = {"Emotion": "emotion", "System 1": "system", "System 2": "system_b",
+                  "Δ_Net": "value", "CI_low": "ci_low", "CI_high": "ci_high"}
+for cong, res in [("Congruent", results_cong), ("Incongruent", results_incong)]:
+    run.add_frame(res[list(stored_columns)].rename(columns=stored_columns),
+                  statistic="delta_net", congruence=cong)
+run.save()
+
 results_cong.to_csv("bootstrap_congruent_results.csv", index=False)
 results_incong.to_csv("bootstrap_incongruent_results.csv", index=False)
\ No newline at end of file
@@ -0,0 +1,175 @@
+# -----------------------------------------------------------
+# Audio-Korpus-Index über evaluation-samples/
+#   • Dateiname <system>_<n>_<textemotion>_<kongruenz>_<zielemotion>.wav
+#     → typisierte Metadatentabelle
+#   • RIFF-Header je Datei: Datenoffset, Abtastrate, dtype, Dauer
+#     (nur Header gelesen, fmt/LIST/fact-Chunks, gestreamte Längenfelder)
+#   • PCM-Payload als np.memmap-Sicht, ohne die Datei einzulesen
+# -----------------------------------------------------------
+
+import re
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / "evaluation-samples"
+FILENAME_RE = re.compile(
+    r"^(?P<prefix>[a-z0-9]+)_(?P<sample>\d+)_(?P<text_emotion>[a-z]+)"
+    r"_(?P<congruence>[a-z]+)_(?P<target_emotion>[a-z]+)\.wav$"
+)
+HEADER_LIMIT = 1 << 16       # Header länger als 64 KiB gelten als defekt
+
+# WAVE-Formattag, Bits → NumPy-dtype (little endian)
+WAVE_PCM, WAVE_FLOAT, WAVE_EXTENSIBLE = 0x0001, 0x0003, 0xFFFE
+DTYPES = {
+    (WAVE_PCM, 8):    "u1",
+    (WAVE_PCM, 16):   "<i2",
+    (WAVE_PCM, 32):   "<i4",
+    (WAVE_FLOAT, 32): "<f4",
+    (WAVE_FLOAT, 64): "<f8",
+}
+
+
+# ---------- Hilfsfunktionen ----------
+def read_wav_header(path: Path) -> dict:
+    """
+    Läuft die RIFF-Chunks bis zum data-Chunk ab und liest dabei nur die Header.
+
+    Gestreamte Dateien (Längenfeld 0xFFFFFFFF) werden über die Dateigröße
+    begrenzt. Gibt Formatangaben plus Byte-Offset und -Länge der Nutzdaten zurück.
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    fmt = None
+    with open(path, "rb") as fh:
+        riff, _, wave = struct.unpack("<4sI4s", fh.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path.name}: kein RIFF/WAVE-File")
+        offset = 12
+        while offset + 8 <= min(file_size, HEADER_LIMIT):
+            fh.seek(offset)
+            chunk_id, size = struct.unpack("<4sI", fh.read(8))
+            body = offset + 8
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", fh.read(16))
+                if fmt[0] == WAVE_EXTENSIBLE and size >= 40:
+                    fh.seek(body + 24)                       # Subformat-GUID, erste 2 Bytes
+                    fmt = (struct.unpack("<H", fh.read(2))[0], *fmt[1:])
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path.name}: data-Chunk vor fmt-Chunk")
+                format_tag, channels, sample_rate, _, block_align, bits = fmt
+                dtype = DTYPES.get((format_tag, bits))
+                if dtype is None:
+                    raise ValueError(f"{path.name}: Format {format_tag:#06x}/{bits} bit "
+                                     "nicht unterstützt")
+                data_bytes = min(size, file_size - body)
+                return {
+                    "sample_rate": sample_rate,
+                    "channels": channels,
+                    "format_tag": format_tag,
+                    "bits": bits,
+                    "dtype": dtype,
+                    "data_offset": body,
+                    "data_bytes": data_bytes,
+                    "n_frames": data_bytes // block_align,
+                }
+            offset = body + size + (size & 1)                # Chunks sind 2-Byte-aligned
+    raise ValueError(f"{path.name}: kein data-Chunk gefunden")
+
+
+def parse_filename(name: str) -> dict | None:
+    match = FILENAME_RE.match(name)
+    if match is None:
+        return None
+    fields = match.groupdict()
+    fields["sample"] = int(fields["sample"])
+    return fields
+
+
+def index_corpus(root: Path = SAMPLES_DIR, design: StudyDesign | None = None) -> pd.DataFrame:
+    """
+    Metadatentabelle aller WAVs unter root (eine Zeile je Datei).
+
+    Systeme, Emotionen und Kongruenz werden kategorial in Design-Reihenfolge
+    geführt; Präfixe ohne System im Design (z. B. emosphere) behalten ihren Namen.
+    Nicht zum Namensschema passende Dateien werden übersprungen und gemeldet.
+    """
+    design = design or load_design()
+    rows, skipped = [], []
+    for path in sorted(Path(root).glob("*.wav")):
+        fields = parse_filename(path.name)
+        if fields is None:
+            skipped.append(path.name)
+            continue
+        rows.append({"path": str(path), **fields, **read_wav_header(path)})
+    if skipped:
+        print(f"{len(skipped)} Dateien ohne gültigen Namen übersprungen: {', '.join(skipped)}")
+
+    corpus = pd.DataFrame(rows)
+    if corpus.empty:
+        return corpus
+
+    prefix_to_system = dict(zip(design.sample_prefixes, design.systems))
+    prefixes = [*design.sample_prefixes,
+                *sorted(set(corpus["prefix"]) - set(design.sample_prefixes))]
+    systems = [prefix_to_system.get(p, p) for p in prefixes]
+    corpus["system"] = pd.Categorical(corpus["prefix"].map(lambda p: prefix_to_system.get(p, p)),
+                                      categories=systems)
+    corpus["prefix"] = pd.Categorical(corpus["prefix"], categories=prefixes)
+
+    emotions = [e.lower() for e in design.emotions]
+    congruence = [c.lower() for c in design.congruence]
+    for col, levels in [("text_emotion", emotions), ("target_emotion", emotions),
+                        ("congruence", congruence)]:
+        extra = sorted(set(corpus[col]) - set(levels))
+        corpus[col] = pd.Categorical(corpus[col], categories=[*levels, *extra])
+
+    corpus = corpus.astype({"sample": "int32", "sample_rate": "int32", "channels": "int16",
+                            "format_tag": "int16", "bits": "int16", "data_offset": "int64",
+                            "data_bytes": "int64", "n_frames": "int64"})
+    corpus["duration_s"] = corpus["n_frames"] / corpus["sample_rate"]
+    columns = ["system", "prefix", "sample", "text_emotion", "congruence", "target_emotion",
+               "sample_rate", "channels", "dtype", "bits", "format_tag", "data_offset",
+               "data_bytes", "n_frames", "duration_s", "path"]
+    return corpus[columns].sort_values(["system", "sample", "path"]).reset_index(drop=True)
+
+
+def payload(entry) -> np.memmap:
+    """
+    Nur-Lese-memmap der Nutzdaten einer Korpuszeile (itertuples-Zeile oder dict):
+    (n_frames,) für Mono, sonst (n_frames, channels). Es wird nichts gelesen,
+    bis darauf zugegriffen wird.
+    """
+    get = entry.get if isinstance(entry, dict) else lambda field: getattr(entry, field)
+    n_frames, channels = int(get("n_frames")), int(get("channels"))
+    shape = (n_frames,) if channels == 1 else (n_frames, channels)
+    return np.memmap(get("path"), dtype=get("dtype"), mode="r",
+                     offset=int(get("data_offset")), shape=shape)
+
+
+def to_float(samples: np.ndarray) -> np.ndarray:
+    """Skaliert PCM-Werte auf float32 in [-1, 1); Float-Daten bleiben unverändert."""
+    dtype = np.dtype(samples.dtype)
+    if dtype.kind == "f":
+        return np.asarray(samples, dtype=np.float32)
+    if dtype.kind == "u":                                    # 8-bit PCM ist vorzeichenlos
+        return (np.asarray(samples, dtype=np.float32) - 128.0) / 128.0
+    return np.asarray(samples, dtype=np.float32) / float(2 ** (8 * dtype.itemsize - 1))
+
+
+if __name__ == "__main__":
+    corpus = index_corpus()
+    print(f"{len(corpus)} Dateien, {corpus['duration_s'].sum():.1f} s Audio\n")
+    print(corpus.groupby("system", observed=True)
+                .agg(files=("path", "size"), sample_rate=("sample_rate", "first"),
+                     dtype=("dtype", "first"), mean_duration_s=("duration_s", "mean"))
+                .to_string())
+
+    peaks = [float(np.abs(to_float(payload(e))).max()) for e in corpus.itertuples()]
+    print(f"\nPegelspitze über alle Dateien: {max(peaks):.3f}")
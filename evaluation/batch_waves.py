@@ -0,0 +1,279 @@
+# -----------------------------------------------------------
+# Batch-Lauf über viele Survey-Wellen (Releases, Sprachpanels)
+#   • jede Exportdatei im Eingabeverzeichnis = eine Welle; Arbeitsverzeichnis
+#     <out>/<Welle>/ mit dem Export unter den Namen, die die Skripte erwarten
+#     → alle Ausgaben (CSV, Ergebnisspeicher, Abbildungen) je Welle getrennt
+#   • Wellen parallel im Prozesspool, Skripte einer Welle nacheinander in
+#     einem Worker (Abhängigkeiten wie bws_long.csv, Ergebnisspeicher)
+#   • Design und Code-Lookups einmal im Elternprozess kompiliert und an die
+#     Worker übergeben; jeder Export wird je Welle nur einmal eingelesen
+#   • Wellenvergleich: Net-Score je System (gesamt und je Block) mit KI je
+#     Welle, einfaktorielle ANOVA über die Wellen aus Suffizienzstatistiken
+# -----------------------------------------------------------
+
+import argparse
+import os
+import runpy
+import shutil
+import sys
+import time
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import f as f_dist
+from scipy.stats import t as t_dist
+
+from result_store import ResultStore, stratum_label
+from study_design import StudyDesign, cache_design, load_design
+from survey_validation import DATA_PATH, SURVEY_NAMES, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_DIR = Path("waves")
+SCRIPT_DIR = Path(__file__).resolve().parent
+SHARED_INPUTS = ("prosodic_features.parquet",)            # wellenunabhängig, nur verlinkt
+STATUS_PATH = "batch_status.csv"
+COMPARISON_PATH = "wave_comparison.csv"
+OVERALL = "Gesamt"
+ALPHA = 0.05
+
+# Skripte je Welle in Abhängigkeitsreihenfolge, mit Argumenten
+PIPELINE = (
+    ("generate_long_rows.py",),                 # bws_*.csv für die folgenden Skripte
+    ("best_worst_scalling.py",),
+    ("demographic_best_worst_scaling.py",),
+    ("bradley_terry.py",),
+    ("friedmann_gender.py",),
+    ("friedmann_agegroups.py",),
+    ("friedmann_profiency.py",),
+    ("chi_quadrat_test_gender.py",),
+    ("logit_regression_gender.py",),
+    ("logit_regression_agegroups.py",),
+    ("logit_regression_profiency.py",),
+    ("realism_gender.py",),
+    ("realism_anova_agegroups.py",),
+    ("realism_anova_profiency.py",),
+    ("wilcoxon_realism.py",),
+    ("analyse_bootstrap.py",),
+    ("crossed_mixed_logit.py",),
+    ("preference_drivers.py",),
+    ("aligned_rank_transform.py",),
+    ("reliability.py",),
+    ("equivalence_bayes.py",),
+    ("permutation_tests.py",),
+    ("confusion_cube.py",),
+    ("jackknife_influence.py",),
+    ("listener_segmentation.py",),
+    ("sequential_monitor.py",),
+    ("render_figures.py", "--summarize", "--workers", "1"),
+    ("multiple_testing.py",),                   # liest alle Stufen der Welle
+)
+
+
+# ---------- Hilfsfunktionen ----------
+def discover_waves(directory: Path, pattern: str = "*.csv") -> dict[str, Path]:
+    """Welle → Export; Name = relativer Pfad ohne Endung, Quarantäne-Dateien ausgenommen."""
+    waves = {}
+    for path in sorted(directory.glob(pattern)):
+        if path.is_file() and not path.stem.endswith("_quarantine"):
+            name = "_".join(path.relative_to(directory).with_suffix("").parts)
+            waves[name] = path.resolve()
+    return waves
+
+
+def _link(source: Path, target: Path) -> None:
+    """Symlink, sonst Kopie (z. B. Windows ohne Rechte)."""
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    try:
+        target.symlink_to(source)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def prepare_wave(export: Path, workdir: Path) -> None:
+    """Arbeitsverzeichnis mit dem Export unter allen erwarteten Namen und geteilten Eingaben."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    for name in SURVEY_NAMES:
+        # auf Dateisystemen ohne Groß-/Kleinschreibung ist der zweite Name schon da
+        if not (workdir / name).exists() or (workdir / name).is_symlink():
+            _link(export, workdir / name)
+    for name in SHARED_INPUTS:
+        if (SCRIPT_DIR / name).exists():
+            _link(SCRIPT_DIR / name, workdir / name)
+
+
+def run_script(script: str, args: tuple[str, ...], log: Path) -> str:
+    """Skript als __main__ im aktuellen Prozess; Ausgabe ins Log, Fehler als Status."""
+    sys.argv = [script, *args]
+    with open(log, "w", encoding="utf-8") as fh, redirect_stdout(fh), redirect_stderr(fh), \
+            warnings.catch_warnings():
+        try:
+            runpy.run_path(str(SCRIPT_DIR / script), run_name="__main__")
+            status = "ok"
+        except SystemExit as exc:
+            status = "ok" if exc.code in (None, 0) else f"exit {exc.code}"
+        except Exception as exc:
+            traceback.print_exc()
+            status = f"{type(exc).__name__}: {exc}".splitlines()[0][:200]
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].close("all")
+    return status
+
+
+def net_summary(design: StudyDesign, best: np.ndarray, worst: np.ndarray) -> pd.DataFrame:
+    """n, Mittel und Varianz der Net-Scores je Teilnehmer: je System × Block und gesamt."""
+    net = design.net_scores(best, worst).astype(float)                 # (n, Blöcke, Systeme)
+    scores = np.concatenate([net, net.sum(axis=1, keepdims=True)], axis=1)
+    labels = design.block_labels + [(OVERALL, OVERALL)]
+    b, s = np.indices(scores.shape[1:]).reshape(2, -1)
+    return pd.DataFrame({"System": np.array(design.systems)[s],
+                         "Emotion": [labels[i][0] for i in b],
+                         "Kongruenz": [labels[i][1] for i in b],
+                         "n": len(net), "Mittel": scores.mean(axis=0).ravel(),
+                         "Varianz": scores.var(axis=0, ddof=1).ravel() if len(net) > 1
+                         else np.nan})
+
+
+def process_wave(name: str, export: Path, workdir: Path,
+                 pipeline=PIPELINE) -> tuple[str, list[dict], pd.DataFrame | None]:
+    """Alle Skripte einer Welle in ihrem Arbeitsverzeichnis, danach die Net-Score-Zusammenfassung."""
+    prepare_wave(export, workdir)
+    (workdir / "logs").mkdir(exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    status = []
+    try:
+        for script, *args in pipeline:
+            start = time.perf_counter()
+            result = run_script(script, tuple(args), Path("logs") / f"{Path(script).stem}.log")
+            status.append({"Welle": name, "Skript": script, "Status": result,
+                           "Sekunden": time.perf_counter() - start})
+        try:
+            design = load_design()
+            _, best, worst = load_survey(DATA_PATH, design)
+            summary = net_summary(design, best, worst).assign(Welle=name)
+        except Exception as exc:
+            status.append({"Welle": name, "Skript": "net_summary", "Sekunden": 0.0,
+                           "Status": f"{type(exc).__name__}: {exc}"})
+            summary = None
+    finally:
+        os.chdir(cwd)
+    return name, status, summary
+
+
+def _init_worker(design: StudyDesign) -> None:
+    """Worker: kompiliertes Design übernehmen, Skriptverzeichnis importierbar, headless."""
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if str(SCRIPT_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPT_DIR))
+    cache_design(design)
+
+
+def compare_waves(summary: pd.DataFrame, alpha: float = ALPHA) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    t-KI des mittleren Net-Scores je Welle × System × Block und einfaktorielle
+    ANOVA über die Wellen je System × Block (nur Wellen mit n ≥ 2).
+    """
+    se = np.sqrt(summary["Varianz"] / summary["n"])
+    q = t_dist.ppf(1 - alpha / 2, summary["n"] - 1)
+    means = summary.assign(KI_unten=summary["Mittel"] - q * se, KI_oben=summary["Mittel"] + q * se)
+
+    usable = summary[summary["n"] >= 2]
+    keys = ["System", "Emotion", "Kongruenz"]
+    # Σ n_w·(Mittel_w − Gesamtmittel)² statt Σ n·M² − (Σ n·M)²/N: keine Auslöschung
+    cells = usable.assign(total=usable["n"] * usable["Mittel"]).groupby(keys, sort=False)
+    grand = cells["total"].transform("sum") / cells["n"].transform("sum")
+    agg = (usable.assign(between=usable["n"] * (usable["Mittel"] - grand) ** 2,
+                         within=(usable["n"] - 1) * usable["Varianz"])
+           .groupby(keys, sort=False)
+           .agg(N=("n", "sum"), Wellen=("n", "size"), between=("between", "sum"),
+                within=("within", "sum"))
+           .reset_index())
+    df1, df2 = agg["Wellen"] - 1, agg["N"] - agg["Wellen"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (agg["between"] / df1) / (agg["within"] / df2)
+    anova = agg[["System", "Emotion", "Kongruenz", "N", "Wellen"]].assign(
+        df1=df1, df2=df2, F=f, p=f_dist.sf(f, df1, df2))
+    return means, anova
+
+
+def _store_fields(frame: pd.DataFrame) -> dict[str, pd.Series]:
+    """System/Emotion/Kongruenz für den Ergebnisspeicher; Gesamt-Zeilen ohne Block."""
+    overall = frame["Emotion"] == OVERALL
+    return {"system": frame["System"], "emotion": frame["Emotion"].mask(overall, None),
+            "congruence": frame["Kongruenz"].mask(overall, None)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alle Auswertungen für viele Survey-Wellen")
+    parser.add_argument("directory", type=Path, help="Verzeichnis mit Survey-Exporten")
+    parser.add_argument("--pattern", default="*.csv", help="Glob der Exporte im Verzeichnis")
+    parser.add_argument("--out", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--scripts", nargs="*", default=None,
+                        help="nur diese Skripte der Pipeline (Reihenfolge bleibt)")
+    args = parser.parse_args()
+
+    waves = discover_waves(args.directory, args.pattern)
+    if not waves:
+        sys.exit(f"Keine Exporte '{args.pattern}' in {args.directory}")
+    pipeline = [step for step in PIPELINE
+                if args.scripts is None or Path(step[0]).stem in
+                {Path(s).stem for s in args.scripts}]
+
+    # Design und Lookup-Tabellen einmal kompilieren; wandern gepickelt zu den Workern
+    design = load_design()
+    _ = design.system_table, [codebook.table for codebook in design.demographics.values()]
+    args.out.mkdir(parents=True, exist_ok=True)
+    run = ResultStore(args.out / "results").run(
+        "wave_comparison", inputs=list(waves.values()),
+        params={"waves": list(waves), "scripts": [step[0] for step in pipeline]})
+
+    print(f"{len(waves)} Wellen × {len(pipeline)} Skripte → {args.out}/<Welle>/")
+    start = time.perf_counter()
+    status, summaries = [], []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(design,)) as pool:
+        futures = [pool.submit(process_wave, name, export, (args.out / name).resolve(), pipeline)
+                   for name, export in waves.items()]
+        for future in as_completed(futures):
+            name, wave_status, summary = future.result()
+            status += wave_status
+            failed = [s["Skript"] for s in wave_status if s["Status"] != "ok"]
+            print(f"  {name:<24} {len(wave_status) - len(failed)}/{len(wave_status)} ok"
+                  + (f"  (fehlgeschlagen: {', '.join(failed)})" if failed else ""))
+            if summary is not None:
+                summaries.append(summary)
+    print(f"Fertig in {time.perf_counter() - start:.1f} s")
+
+    pd.DataFrame(status).sort_values(["Welle", "Skript"]).to_csv(args.out / STATUS_PATH,
+                                                                 index=False)
+    if not summaries:
+        sys.exit("Keine Welle lieferte Net-Scores.")
+
+    means, anova = compare_waves(pd.concat(summaries, ignore_index=True))
+    overall = means[means["Emotion"] == OVERALL]
+    print("\nMittlerer Gesamt-Net-Score je Teilnehmer (Welle × System):")
+    print(overall.pivot(index="Welle", columns="System", values="Mittel")
+          .reindex(columns=design.systems).round(2).to_string())
+    print("\nUnterschied zwischen den Wellen (ANOVA je System, gesamt):")
+    for r in anova[anova["Emotion"] == OVERALL].itertuples():
+        star = " *" if r.p < ALPHA else ""
+        print(f"  {r.System:<12} F({r.df1}, {r.df2}) = {r.F:.3f}, p = {r.p:.4f}{star}")
+
+    means.to_csv(args.out / COMPARISON_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {args.out / COMPARISON_PATH} und {args.out / STATUS_PATH}.")
+
+    run.add_frame(pd.DataFrame({"value": means["Mittel"], "ci_low": means["KI_unten"],
+                                "ci_high": means["KI_oben"], "n": means["n"], **_store_fields(means),
+                                "stratum": [stratum_label("Welle", w) for w in means["Welle"]]}),
+                  statistic="net_score_mean")
+    run.add_frame(pd.DataFrame({"value": anova["F"], "p_value": anova["p"], "n": anova["N"],
+                                **_store_fields(anova), "stratum": "Welle"}),
+                  statistic="wave_anova_F")
+    run.save()
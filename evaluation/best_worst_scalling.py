@@ -1,65 +1,34 @@
 import pandas as pd
 from pathlib import Path
 
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import load_survey
+
 # Load the generated survey data
 DATA_PATH = Path("Survey_Entries.csv")
-df = pd.read_csv(DATA_PATH)
+design = load_design()
+df, best, worst = load_survey(DATA_PATH, design)
 
 # Split pairs into separate best and worst columns
-q_cols = [c for c in df.columns if c.startswith("Q") and "_best" not in c and "_worst" not in c]
-for q in q_cols:
-    df[f"{q}_best"] = df[q].str.split(",", n=1).str[0].str.strip().astype(int)
-    df[f"{q}_worst"] = df[q].str.split(",", n=1).str[1].str.strip().astype(int)
+q_cols = design.question_ids
+for j, q in enumerate(q_cols):
+    df[f"{q}_best"] = design.system_codes[best[:, j]]
+    df[f"{q}_worst"] = design.system_codes[worst[:, j]]
 
 # Voice system labels
-voice_labels = {
-    1: "CosyVoice",
-    2: "EmoSpeech",
-    3: "EmoKnob",
-    4: "EmotiVoice"
-}
+voice_labels = design.voice_labels
+system_codes = list(voice_labels)
 
 # Emotion mapping for questions
-emotion_mapping = {
-    "Q1": "Happy (Congruent)",
-    "Q2": "Happy (Congruent)",
-    "Q3": "Happy (Congruent)",
-    "Q4": "Happy (Incongruent)",
-    "Q5": "Happy (Incongruent)",
-    "Q6": "Happy (Incongruent)",
-    "Q7": "Sad (Congruent)",
-    "Q8": "Sad (Congruent)",
-    "Q9": "Sad (Congruent)",
-    "Q10": "Sad (Incongruent)",
-    "Q11": "Sad (Incongruent)",
-    "Q12": "Sad (Incongruent)",
-    "Q13": "Angry (Congruent)",
-    "Q14": "Angry (Congruent)",
-    "Q15": "Angry (Congruent)",
-    "Q16": "Angry (Incongruent)",
-    "Q17": "Angry (Incongruent)",
-    "Q18": "Angry (Incongruent)",
-    "Q19": "Surprised (Congruent)",
-    "Q20": "Surprised (Congruent)",
-    "Q21": "Surprised (Congruent)",
-    "Q22": "Surprised (Incongruent)",
-    "Q23": "Surprised (Incongruent)",
-    "Q24": "Surprised (Incongruent)"
-}
+emotion_mapping = {q: f"{emo} ({cong})" for q, (emo, cong) in design.emotion_lookup.items()}
 
 # Emotion groups
-emotion_groups = {
-    "Happy Congruent": ["Q1", "Q2", "Q3"],
-    "Happy Incongruent": ["Q4", "Q5", "Q6"],
-    "Sad Congruent": ["Q7", "Q8", "Q9"],
-    "Sad Incongruent": ["Q10", "Q11", "Q12"],
-    "Angry Congruent": ["Q13", "Q14", "Q15"],
-    "Angry Incongruent": ["Q16", "Q17", "Q18"],
-    "Surprised Congruent": ["Q19", "Q20", "Q21"],
-    "Surprised Incongruent": ["Q22", "Q23", "Q24"]
-}
+emotion_groups = {(emo, cong): design.questions_for(emo, cong)
+                  for emo, cong in design.block_labels}
 
 output_file = Path("best_worst_scalling.txt")
+run = ResultStore().run("best_worst_scaling", inputs=[DATA_PATH])
 
 with open(output_file, "w") as file:
     # Individuelle Fragen-Ergebnisse
@@ -67,38 +36,44 @@ with open(output_file, "w") as file:
         best_counts = df[f"{q}_best"].value_counts().sort_index()
         worst_counts = df[f"{q}_worst"].value_counts().sort_index()
 
-        best_counts = best_counts.reindex(range(1, 5), fill_value=0)
-        worst_counts = worst_counts.reindex(range(1, 5), fill_value=0)
+        best_counts = best_counts.reindex(system_codes, fill_value=0)
+        worst_counts = worst_counts.reindex(system_codes, fill_value=0)
 
         net_scores = best_counts - worst_counts 
 
         file.write(f"{q} - {emotion_mapping[q]}\n")
         file.write("Voice System\tBest - Worst (Net Score)\n")
-        for i in range(1, 5):
+        emo, cong = design.emotion_lookup[q]
+        for i in system_codes:
             file.write(f"{voice_labels[i]}\t{net_scores[i]}\n")
+            run.add("net_score", net_scores[i], n=len(df), emotion=emo, congruence=cong,
+                    item=q, system=voice_labels[i])
         file.write("\n")
 
     # Aggregierte Emotionsergebnisse
-    for group_name, questions in emotion_groups.items():
-        total_best = pd.Series(0, index=range(1, 5))
-        total_worst = pd.Series(0, index=range(1, 5))
+    for (emo, cong), questions in emotion_groups.items():
+        total_best = pd.Series(0, index=system_codes)
+        total_worst = pd.Series(0, index=system_codes)
  
         for q in questions:
             best_counts = df[f"{q}_best"].value_counts().sort_index()
             worst_counts = df[f"{q}_worst"].value_counts().sort_index()
 
-            best_counts = best_counts.reindex(range(1, 5), fill_value=0)
-            worst_counts = worst_counts.reindex(range(1, 5), fill_value=0)
+            best_counts = best_counts.reindex(system_codes, fill_value=0)
+            worst_counts = worst_counts.reindex(system_codes, fill_value=0)
 
             total_best += best_counts
             total_worst += worst_counts
 
         net_scores = total_best - total_worst
 
-        file.write(f"{group_name} - Aggregated MaxDiff Net Scores\n")
+        file.write(f"{emo} {cong} - Aggregated MaxDiff Net Scores\n")
         file.write("Voice System\tBest - Worst (Net Score)\n")
-        for i in range(1, 5):
+        for i in system_codes:
             file.write(f"{voice_labels[i]}\t{net_scores[i]}\n")
+            run.add("net_score", net_scores[i], n=len(df) * len(questions),
+                    emotion=emo, congruence=cong, system=voice_labels[i])
         file.write("\n")
 
+run.save()
 print("All results have been saved to best_worst_scalling.txt.")
@@ -0,0 +1,159 @@
+# -----------------------------------------------------------
+# Bradley–Terry-Modell aus Best/Worst-Entscheidungen
+#   • jede BWS-Antwort → 5 Paarvergleiche (Best schlägt 3, Mitte schlägt Worst)
+#   • aggregierte 4×4-Siegmatrix pro Emotion × Kongruenz × Demografie-Stratum
+#   • MM-Schätzer (Hunter 2004), alle Strata gleichzeitig, Wald-KIs
+# -----------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from scipy.stats import norm
+
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import load_survey
+
+# ---------- Konfiguration ----------
+DATA_PATH = Path("Survey_Entries.csv")
+OUTPUT_PATH = Path("bradley_terry_results.csv")
+
+# Pseudo-Siege je Richtung und Paar; hält die Schätzung endlich, wenn ein
+# System in einem kleinen Stratum nie gewinnt (Einfluss → 0 für großes n)
+PSEUDO_COUNT = 0.5
+ALPHA = 0.05
+
+
+# ---------- Hilfsfunktionen ----------
+def pairwise_wins(best: np.ndarray, worst: np.ndarray, stratum: np.ndarray,
+                  n_strata: int, k: int) -> np.ndarray:
+    """
+    Siegmatrizen W[s, i, j] = Anzahl „i schlägt j“ im Stratum s.
+
+    best, worst, stratum: gleich geformte Integer-Arrays (0-basierte Systeme,
+    Stratum-Index je Antwort); ungültige Antworten haben stratum < 0.
+    """
+    best, worst, stratum = (np.ravel(a) for a in (best, worst, stratum))
+    keep = stratum >= 0
+    best, worst, stratum = best[keep], worst[keep], stratum[keep]
+
+    systems = np.arange(k)
+    others = systems[None, :] != best[:, None]                       # Best schlägt alle anderen
+    middle = others & (systems[None, :] != worst[:, None])          # Mitte schlägt Worst
+
+    base = stratum[:, None] * k * k
+    beats_best = base + best[:, None] * k + systems[None, :]
+    beats_worst = base + systems[None, :] * k + worst[:, None]
+    flat = np.concatenate([beats_best[others], beats_worst[middle]])
+    counts = np.bincount(flat, minlength=n_strata * k * k)
+    return counts.reshape(n_strata, k, k).astype(float)
+
+
+def fit_bradley_terry(wins: np.ndarray, pseudo_count: float = PSEUDO_COUNT,
+                      max_iter: int = 1000, tol: float = 1e-10) -> tuple[np.ndarray, np.ndarray]:
+    """
+    MM-Schätzung der BT-Stärken für alle Strata gleichzeitig.
+
+    Gibt (beta, cov) zurück: log-Stärken mit Summe 0 je Stratum (S, k) und
+    die zugehörige Kovarianz aus der Fisher-Information (S, k, k).
+    """
+    wins = np.asarray(wins, dtype=float)
+    k = wins.shape[-1]
+    off_diag = ~np.eye(k, dtype=bool)
+    wins = wins + pseudo_count * off_diag
+    n_pair = wins + np.swapaxes(wins, -1, -2)
+    total_wins = wins.sum(axis=-1)
+
+    p = np.full(wins.shape[:-1], 1.0 / k)
+    for _ in range(max_iter):
+        denom = (n_pair / (p[..., :, None] + p[..., None, :])).sum(axis=-1)
+        p_new = total_wins / denom
+        p_new /= p_new.sum(axis=-1, keepdims=True)
+        if np.max(np.abs(p_new - p)) < tol:
+            p = p_new
+            break
+        p = p_new
+
+    beta = np.log(p)
+    beta -= beta.mean(axis=-1, keepdims=True)
+
+    # Fisher-Information (Graph-Laplace) → Pseudo-Inverse = Kovarianz unter Summe-0
+    w = n_pair * p[..., :, None] * p[..., None, :] / (p[..., :, None] + p[..., None, :]) ** 2
+    w = w * off_diag
+    info = np.eye(k) * w.sum(axis=-1)[..., None] - w
+    cov = np.linalg.pinv(info, hermitian=True)
+    return beta, cov
+
+
+def bt_table(wins: np.ndarray, labels: pd.DataFrame, system_names: list[str],
+             alpha: float = ALPHA) -> pd.DataFrame:
+    """Schätzt alle Strata und formt das Ergebnis in eine Zeile je Stratum × System."""
+    beta, cov = fit_bradley_terry(wins)
+    se = np.sqrt(np.clip(np.diagonal(cov, axis1=-2, axis2=-1), 0, None))
+    z = norm.ppf(1 - alpha / 2)
+    n_comparisons = wins.sum(axis=(-1, -2)) / 5     # 5 Paarvergleiche je BWS-Antwort
+    rank = (-beta).argsort(axis=-1).argsort(axis=-1) + 1
+
+    k = len(system_names)
+    out = labels.loc[labels.index.repeat(k)].reset_index(drop=True)
+    out["System"] = np.tile(system_names, len(labels))
+    out["N_Antworten"] = np.repeat(n_comparisons, k).astype(int)
+    out["beta"] = beta.ravel()
+    out["SE"] = se.ravel()
+    out["CI_low"] = out["beta"] - z * out["SE"]
+    out["CI_high"] = out["beta"] + z * out["SE"]
+    out["Rang"] = rank.ravel()
+    return out
+
+
+if __name__ == "__main__":
+    # ---------- Daten laden & vorbereiten ----------
+    design = load_design()
+    df, best, worst = load_survey(DATA_PATH, design)
+    run = ResultStore().run("bradley_terry", inputs=[DATA_PATH],
+                            params={"pseudo_count": PSEUDO_COUNT, "alpha": ALPHA})
+
+    block, n_blocks = design.question_block, design.n_blocks
+    block_emotion, block_cong = zip(*design.block_labels)
+
+    # ---------- Strata: Gesamt + jede Demografie-Stufe ----------
+    wins, labels = [], []
+    strata = [("Gesamt", ["Alle"], np.zeros(len(df), dtype=int))]
+    for col, codebook in design.demographics.items():
+        strata.append((col, codebook.labels, codebook.index(df[col])))
+
+    for factor, level_names, level_idx in strata:
+        n_levels = len(level_names)
+        valid = (level_idx[:, None] >= 0) & (best >= 0) & (worst >= 0)
+        stratum = np.where(valid, level_idx[:, None] * n_blocks + block[None, :], -1)
+        wins.append(pairwise_wins(best, worst, stratum, n_levels * n_blocks,
+                                  design.n_systems))
+        labels.append(pd.DataFrame({
+            "Faktor": factor,
+            "Stufe": np.repeat(level_names, n_blocks),
+            "Emotion": np.tile(block_emotion, n_levels),
+            "Kongruenz": np.tile(block_cong, n_levels),
+        }))
+
+    results = bt_table(np.concatenate(wins), pd.concat(labels, ignore_index=True),
+                       design.systems)
+    results = results[results["N_Antworten"] > 0].reset_index(drop=True)
+
+    # ---------- Ausgaben ----------
+    overall = results.query("Faktor == 'Gesamt'")
+    for (emo, cong), sub in overall.groupby(["Emotion", "Kongruenz"], sort=False):
+        print(f"\n{emo} ({cong})  |  N = {sub['N_Antworten'].iloc[0]}")
+        for _, r in sub.sort_values("Rang").iterrows():
+            print(f"  {r.Rang}. {r.System:<10} β = {r.beta:+.3f} "
+                  f"(95 % CI {r.CI_low:+.2f}…{r.CI_high:+.2f})")
+
+    stored = results.rename(columns={"Emotion": "emotion", "Kongruenz": "congruence",
+                                     "System": "system", "N_Antworten": "n", "beta": "value",
+                                     "CI_low": "ci_low", "CI_high": "ci_high"})
+    stored["stratum"] = (stored["Faktor"] + "=" + stored["Stufe"]).where(stored["Faktor"] != "Gesamt")
+    run.add_frame(stored[["emotion", "congruence", "system", "n", "value", "ci_low",
+                          "ci_high", "stratum"]], statistic="bt_beta")
+    run.save()
+
+    results.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nAlle Strata gespeichert in {OUTPUT_PATH}.")
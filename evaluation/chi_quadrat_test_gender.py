@@ -4,36 +4,32 @@ from scipy.stats import chi2_contingency, fisher_exact
 from statsmodels.stats.multitest import multipletests
 import numpy as np
 
-DATA_PATH = Path("Survey_Entries.csv")
-df = pd.read_csv(DATA_PATH)
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import load_survey
 
+DATA_PATH = Path("Survey_Entries.csv")
+design = load_design()
 
-# Aufsplitten in best / worst
-for q in [c for c in df.columns if c.startswith("Q") and "_best" not in c]:
-    df[f"{q}_best"]  = df[q].str.split(",", n=1).str[0].astype(int)
-    df[f"{q}_worst"] = df[q].str.split(",", n=1).str[1].astype(int)
+# Prüfen und aufsplitten in best / worst (0-basierter Systemindex je Frage)
+df, best, worst = load_survey(DATA_PATH, design)
+run = ResultStore().run("chi2_gender", inputs=[DATA_PATH])
 
-voice_labels = {1: "CosyVoice", 2: "EmoSpeech", 3: "EmoKnob", 4: "EmotiVoice"}
-emotion_groups = {
-    "Happy": ["Q1","Q2","Q3","Q4","Q5","Q6"],
-    "Sad":   ["Q7","Q8","Q9","Q10","Q11","Q12"],
-    "Angry": ["Q13","Q14","Q15","Q16","Q17","Q18"],
-    "Surprised": ["Q19","Q20","Q21","Q22","Q23","Q24"]
-}
-gender_map = {1: "Male", 2: "Female"}
+gender = design.demographics["Geschlecht"]
+gender_map = {c: l for c, l in gender.mapping.items() if c in (1, 2)}   # Diverse wird ignoriert
+gender_codes = df["Geschlecht"].to_numpy()
 
 # Häufigkeits­tabellen + Test
 records = []
-for emotion, qs in emotion_groups.items():
-    for sys_id, sys_name in voice_labels.items():
+for e, emotion in enumerate(design.emotions):
+    qs = design.question_emotion == e
+    for sys_idx, sys_name in enumerate(design.systems):
         tbl = np.zeros((2,2), dtype=int)   # rows: best/worst, cols: male/female
-        
-        for _, row in df.iterrows():
-            g = gender_map.get(row["Geschlecht"], None)
-            if g is None: continue
-            for q in qs:
-                if row[f"{q}_best"]  == sys_id: tbl[0, 0 if g=="Male" else 1] += 1
-                if row[f"{q}_worst"] == sys_id: tbl[1, 0 if g=="Male" else 1] += 1
+
+        for col, g in enumerate(gender_map):
+            rows = gender_codes == g
+            tbl[0, col] = (best[rows][:, qs] == sys_idx).sum()
+            tbl[1, col] = (worst[rows][:, qs] == sys_idx).sum()
 
         # Wahl des passenden Tests
         chi2, p, dof, exp = chi2_contingency(tbl, correction=True)
@@ -56,6 +52,15 @@ df_out = pd.DataFrame(records, columns=["Emotion","System","Test","Chi2",
                                         "CramersV","p_raw"])
 df_out["p_adj"] = multipletests(df_out["p_raw"], method="holm")[1]
 
+# Ergebnisspeicher
+contrast = " vs ".join(gender_map.values())
+for r in df_out.itertuples():
+    cell = dict(emotion=r.Emotion, system=r.System, contrast=contrast)
+    run.add(r.Test, r.Chi2, p_value=r.p_raw, **cell)
+    if r.Test == "chi2":
+        run.add("cramers_v", r.CramersV, **cell)
+run.save()
+
 # Ausgabe
 for _, r in df_out.iterrows():
     print(f"{r.Emotion:10} | {r.System:10} | {r.Test:6} | "
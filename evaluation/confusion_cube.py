@@ -0,0 +1,203 @@
+# -----------------------------------------------------------
+# Konfusionswürfel Textemotion × Zielemotion je System
+#   • Best/Worst-Zählungen je (System, Textemotion, Zielemotion) in einem
+#     bincount-Durchgang über die Zuordnung Frage → (Text, Ziel)
+#   • Diagonale = kongruente Fragen, außerhalb = inkongruente (Ziel ≠ Text)
+#   • Bootstrap über Teilnehmer mit gemeinsamen Resamples für alle Zellen
+#     (Gewichte × Zählungen je Teilnehmer)
+#   • Würfel samt Resamples als .npz-Cache, Schlüssel = Hash von Survey und
+#     Design → Abfragen ohne erneutes Einlesen der Rohdaten
+# -----------------------------------------------------------
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from result_store import ResultStore, input_hash, stratum_label
+from study_design import DESIGN_PATH, StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("confusion_cube_results.csv")
+CACHE_PATH = Path("confusion_cube.npz")
+BOOT_REPS = 2_000
+BOOT_CHUNK = 20_000_000      # max. Einträge der Gewichtsmatrix je Chunk
+CHUNK_ROWS = 100_000         # Teilnehmer je bincount-Durchgang
+ALPHA = 0.05
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def participant_counts(best: np.ndarray, worst: np.ndarray, design: StudyDesign) -> np.ndarray:
+    """
+    Zählungen je Teilnehmer (n, Breite) als int8, Breite = Best (k·E·E) | Worst
+    (k·E·E) | beantwortete Fragen (E·E); Zelle = Textemotion · E + Zielemotion.
+    """
+    e, k = len(design.emotions), design.n_systems
+    cells = e * e
+    width = 2 * k * cells + cells
+    cell = design.question_emotion * e + design.question_target
+    counts = np.empty((len(best), width), np.int8)
+    for start in range(0, len(best), CHUNK_ROWS):
+        b, w = best[start:start + CHUNK_ROWS], worst[start:start + CHUNK_ROWS]
+        valid = (b >= 0) & (w >= 0)
+        row = np.arange(len(b))[:, None] * width
+        index = np.concatenate([(row + b * cells + cell)[valid],
+                                (row + (k + w) * cells + cell)[valid],
+                                (row + 2 * k * cells + cell)[valid]])
+        counts[start:start + len(b)] = np.bincount(index, minlength=len(b) * width) \
+            .reshape(len(b), width)
+    return counts
+
+
+def bootstrap_totals(counts: np.ndarray, reps: int = BOOT_REPS, seed: int = SEED,
+                     chunk: int = BOOT_CHUNK) -> np.ndarray:
+    """Spaltensummen je Resample (reps, Breite); ein Gewichtsvektor je Resample für alle Zellen."""
+    n = len(counts)
+    rng = np.random.default_rng(seed)
+    step = max(1, chunk // n)
+    totals = []
+    for start in range(0, reps, step):
+        size = min(step, reps - start)
+        draws = rng.integers(0, n, (size, n)) + n * np.arange(size)[:, None]
+        weights = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        totals.append(weights.astype(float) @ counts)
+    return np.concatenate(totals)
+
+
+@dataclass(frozen=True)
+class ConfusionCube:
+    """Best/Worst-Summen je (System, Textemotion, Zielemotion) und ihre Bootstrap-Resamples."""
+    systems: list[str]
+    emotions: list[str]
+    totals: np.ndarray          # (Breite,)
+    boot: np.ndarray            # (Resamples, Breite)
+    n: int
+
+    def split(self, flat: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(…, Breite) → Best und Worst (…, k, E, E), beantwortet (…, E, E)."""
+        k, e = len(self.systems), len(self.emotions)
+        lead = flat.shape[:-1]
+        block = k * e * e
+        return (flat[..., :block].reshape(*lead, k, e, e),
+                flat[..., block:2 * block].reshape(*lead, k, e, e),
+                flat[..., 2 * block:].reshape(*lead, e, e))
+
+    def rates(self, flat: np.ndarray, incongruent_only: bool = False) -> dict[str, np.ndarray]:
+        """
+        Best-, Worst- und Net-Rate je Antwort (…, k, E, E); incongruent_only
+        summiert stattdessen je Zielemotion über alle Texte ≠ Ziel → (…, k, E).
+        """
+        best, worst, shown = self.split(flat)
+        if incongruent_only:
+            off = ~np.eye(len(self.emotions), dtype=bool)
+            best, worst, shown = (np.where(off, x, 0).sum(axis=-2) for x in (best, worst, shown))
+        shown = np.expand_dims(shown, -2 if incongruent_only else -3)     # Systemachse
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {"best": best / shown, "worst": worst / shown, "net": (best - worst) / shown}
+
+    def table(self, alpha: float = ALPHA) -> pd.DataFrame:
+        """Eine Zeile je (System, Text, Ziel) mit Zählungen, Raten und Perzentil-KI der Net-Rate."""
+        best, worst, shown = self.split(self.totals)
+        net = self.rates(self.totals)["net"]
+        low, high = np.nanquantile(self.rates(self.boot)["net"], [alpha / 2, 1 - alpha / 2], axis=0)
+        s, t, g = np.indices(best.shape).reshape(3, -1)
+        frame = pd.DataFrame({"System": np.array(self.systems)[s],
+                              "Textemotion": np.array(self.emotions)[t],
+                              "Zielemotion": np.array(self.emotions)[g],
+                              "Kongruent": t == g, "N": shown[t, g], "Best": best.ravel(),
+                              "Worst": worst.ravel(), "Net_Rate": net.ravel(),
+                              "KI_unten": low.ravel(), "KI_oben": high.ravel()})
+        return frame[frame["N"] > 0].reset_index(drop=True)
+
+    def imposed(self, alpha: float = ALPHA) -> pd.DataFrame:
+        """Net-Rate je System × Zielemotion über alle nicht passenden Texte, mit KI."""
+        net = self.rates(self.totals, incongruent_only=True)["net"]
+        boot = self.rates(self.boot, incongruent_only=True)["net"]
+        low, high = np.nanquantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+        shown = np.where(~np.eye(len(self.emotions), dtype=bool),
+                         self.split(self.totals)[2], 0).sum(axis=0)
+        s, g = np.indices(net.shape).reshape(2, -1)
+        frame = pd.DataFrame({"System": np.array(self.systems)[s],
+                              "Zielemotion": np.array(self.emotions)[g], "N": shown[g],
+                              "Net_Rate": net.ravel(), "KI_unten": low.ravel(),
+                              "KI_oben": high.ravel()})
+        return frame[frame["N"] > 0].reset_index(drop=True)
+
+    def save(self, path: Path, key: str) -> None:
+        np.savez_compressed(path, key=key, systems=self.systems, emotions=self.emotions,
+                            totals=self.totals, boot=self.boot, n=self.n)
+
+
+def build_cube(best: np.ndarray, worst: np.ndarray, design: StudyDesign,
+               reps: int = BOOT_REPS, seed: int = SEED) -> ConfusionCube:
+    counts = participant_counts(best, worst, design)
+    return ConfusionCube(design.systems, design.emotions, counts.sum(axis=0, dtype=np.int64),
+                         bootstrap_totals(counts, reps, seed), len(counts))
+
+
+def load_cube(path: Path = DATA_PATH, design: StudyDesign | None = None,
+              reps: int = BOOT_REPS, seed: int = SEED, cache: Path = CACHE_PATH,
+              rebuild: bool = False) -> ConfusionCube:
+    """Würfel aus dem Cache, wenn Survey, Design, reps und Seed passen; sonst neu bauen."""
+    design = design or load_design()
+    key = f"{input_hash([path, DESIGN_PATH])}:{reps}:{seed}"
+    if cache.exists() and not rebuild:
+        with np.load(cache) as stored:
+            if str(stored["key"]) == key:
+                return ConfusionCube(stored["systems"].tolist(), stored["emotions"].tolist(),
+                                     stored["totals"], stored["boot"], int(stored["n"]))
+    _, best, worst = load_survey(path, design)
+    cube = build_cube(best, worst, design, reps, seed)
+    cube.save(cache, key)
+    return cube
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konfusionswürfel Textemotion × Zielemotion")
+    parser.add_argument("--reps", type=int, default=BOOT_REPS)
+    parser.add_argument("--system", choices=load_design().systems,
+                        help="nur dieses System ausgeben")
+    parser.add_argument("--rebuild", action="store_true", help="Cache ignorieren")
+    args = parser.parse_args()
+
+    cube = load_cube(DATA_PATH, reps=args.reps, rebuild=args.rebuild)
+    run = ResultStore().run("confusion_cube", inputs=[DATA_PATH], seed=SEED,
+                            params={"reps": args.reps, "alpha": ALPHA})
+    table, imposed = cube.table(), cube.imposed()
+    systems = [args.system] if args.system else cube.systems
+
+    print(f"Net-Rate (Best − Worst je Antwort) nach Textemotion (Zeilen) × Zielemotion "
+          f"(Spalten), {cube.n} Teilnehmer, {args.reps} Bootstrap-Resamples")
+    for system in systems:
+        part = table[table["System"] == system]
+        print(f"\n{system}")
+        print(part.pivot(index="Textemotion", columns="Zielemotion", values="Net_Rate")
+              .reindex(index=cube.emotions, columns=cube.emotions).round(2).to_string())
+
+    print("\nZielemotion auf nicht passendem Text (gepoolt über inkongruente Fragen):")
+    for r in imposed[imposed["System"].isin(systems)].itertuples():
+        mark = " ↑" if r.KI_unten > 0 else (" ↓" if r.KI_oben < 0 else "")
+        print(f"  {r.System:<12} → {r.Zielemotion:<10} Net-Rate = {r.Net_Rate:+.2f} "
+              f"[{r.KI_unten:+.2f}, {r.KI_oben:+.2f}]{mark}")
+
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    cells = pd.DataFrame({"value": table["Net_Rate"], "ci_low": table["KI_unten"],
+                          "ci_high": table["KI_oben"], "n": table["N"],
+                          "system": table["System"], "emotion": table["Textemotion"],
+                          "congruence": np.where(table["Kongruent"], "Congruent", "Incongruent"),
+                          "stratum": [stratum_label("Zielemotion", g)
+                                      for g in table["Zielemotion"]]})
+    run.add_frame(cells, statistic="net_rate")
+    run.add_frame(pd.DataFrame({"value": imposed["Net_Rate"], "ci_low": imposed["KI_unten"],
+                                "ci_high": imposed["KI_oben"], "n": imposed["N"],
+                                "system": imposed["System"], "congruence": "Incongruent",
+                                "stratum": [stratum_label("Zielemotion", g)
+                                            for g in imposed["Zielemotion"]]}),
+                  statistic="imposed_net_rate")
+    run.save()
@@ -0,0 +1,280 @@
+# -----------------------------------------------------------
+# Gemischte Logit-Regression mit gekreuzten Zufallseffekten
+#   • Outcome  : best (bzw. worst) je Teilnehmer × Frage × System
+#   • fixed    : System × Emotion
+#   • random   : Teilnehmer:System und Satz (Item):System, gekreuzt
+#     (reine Intercepts wären nicht identifiziert – je Frage genau ein Best)
+#   • dünnbesetzte Designmatrix, Laplace-Näherung mit PIRLS; Cholesky mit
+#     Teilnehmerblock zuerst (diagonal) → kein Fill-in, linear in der Personenzahl
+# -----------------------------------------------------------
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.special import expit, log_expit
+from scipy.stats import norm
+
+from preference_drivers import LONG_PATH, choice_sets
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("crossed_mixed_logit_results.csv")
+ALPHA = 0.05
+MAX_ITER, TOL = 50, 1e-8                 # PIRLS
+LOG_SD_BOUNDS = (-6.0, 3.0)              # Suchbereich log σ der Zufallseffekte
+FD_STEP = 1e-4                           # Differenzenschritt in log σ (Summe über 10⁶+ Zeilen)
+SUBSAMPLE = 5_000                        # Teilnehmer für die Startwerte von σ
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def long_design(sets: pd.DataFrame, design: StudyDesign, outcome: str = "best") -> pd.DataFrame:
+    """Eine Zeile je Teilnehmer × Frage × System mit 0/1-Outcome und Faktorindizes."""
+    k = design.n_systems
+    question = np.repeat(sets["question"].to_numpy(), k)
+    system = np.tile(np.arange(k), len(sets))
+    participant = np.repeat(pd.factorize(sets["participant"])[0], k)
+    return pd.DataFrame({
+        "participant": participant,
+        "question": question,
+        "system": system,
+        "emotion": design.question_emotion[question],
+        "y": (system == np.repeat(sets[outcome].to_numpy(), k)).astype(float),
+    })
+
+
+def design_matrices(rows: pd.DataFrame, design: StudyDesign):
+    """
+    Dünnbesetzte Matrix [Z | X] (CSC) und Größe je Zufallseffekt-Block.
+    Jede Zeile hat genau drei Einträge: Teilnehmer:System, Item:System, System×Emotion.
+    """
+    k, n = design.n_systems, len(rows)
+    n_participants = int(rows["participant"].max()) + 1
+    sizes = [n_participants * k, design.n_questions * k]
+    offsets = np.cumsum([0, *sizes])
+    columns = np.stack([
+        offsets[0] + rows["participant"].to_numpy() * k + rows["system"].to_numpy(),
+        offsets[1] + rows["question"].to_numpy() * k + rows["system"].to_numpy(),
+        offsets[2] + rows["emotion"].to_numpy() * k + rows["system"].to_numpy(),
+    ], axis=1)
+    n_cols = offsets[2] + len(design.emotions) * k
+    matrix = sparse.csr_matrix((np.ones(3 * n), columns.ravel(), np.arange(0, 3 * n + 1, 3)),
+                               shape=(n, n_cols))
+    return matrix.tocsc(), sizes
+
+
+def _analyze(matrix: sparse.csc_matrix, n_first: int) -> dict:
+    """
+    Symbolische Analyse (einmal je Modell): Besetzungsmuster der Blöcke von
+    H = [Z X]' W [Z X]. Der erste Zufallseffekt-Block muss ein Gruppierungsfaktor
+    sein (genau eine Spalte je Zeile) – dann ist er diagonal und wird zuerst
+    eliminiert, ohne Fill-in. Übrig bleibt ein kleines, dichtes Schur-Komplement.
+    """
+    coo = matrix.tocoo()
+    in_first = coo.col < n_first
+    if np.bincount(coo.row[in_first], minlength=matrix.shape[0]).max(initial=0) != 1:
+        raise ValueError("Erster Zufallseffekt-Block braucht genau eine Spalte je Zeile")
+    first = np.empty(matrix.shape[0], dtype=np.int32)
+    first[coo.row[in_first]] = coo.col[in_first]
+    row, col, value = coo.row[~in_first], coo.col[~in_first] - n_first, coo.data[~in_first]
+    m = matrix.shape[1] - n_first
+
+    # Kreuzblock erster Block × Rest: Zielplatz je Eintrag
+    keys, cross_slot = np.unique(first[row] * m + col, return_inverse=True)
+    # Rest × Rest: alle Eintragspaare innerhalb einer Zeile
+    order = np.argsort(row, kind="stable")
+    row, col, value = row[order], col[order], value[order]
+    start = np.searchsorted(row, np.arange(matrix.shape[0]))
+    count = np.bincount(row, minlength=matrix.shape[0])
+    pairs = [[], [], []]
+    for i in range(count.max(initial=0)):
+        for j in range(count.max(initial=0)):
+            rows = np.flatnonzero(count > max(i, j))
+            pairs[0].append(rows.astype(np.int32))
+            pairs[1].append((col[start[rows] + i] * m + col[start[rows] + j]).astype(np.int32))
+            pairs[2].append(value[start[rows] + i] * value[start[rows] + j])
+    return {"n_first": n_first, "m": m, "first": first, "transposed": matrix.T.tocsr(),
+            "row": row.astype(np.int32), "value": value,
+            "cross_slot": cross_slot[order].astype(np.int32),
+            "cross_rows": keys // m, "cross_cols": keys % m,
+            "pair_row": np.concatenate(pairs[0]), "pair_slot": np.concatenate(pairs[1]),
+            "pair_value": np.concatenate(pairs[2])}
+
+
+def _factorize(pattern: dict, weights: np.ndarray, penalty: np.ndarray):
+    """Numerische Zerlegung für neue Gewichte → (solve, log det H)."""
+    n_first, m = pattern["n_first"], pattern["m"]
+    diag = np.bincount(pattern["first"], weights, minlength=n_first) + penalty[:n_first]
+    cross = sparse.csr_matrix(
+        (np.bincount(pattern["cross_slot"], weights[pattern["row"]] * pattern["value"],
+                     minlength=len(pattern["cross_rows"])),
+         (pattern["cross_rows"], pattern["cross_cols"])), shape=(n_first, m))
+    schur = np.bincount(pattern["pair_slot"],
+                        weights[pattern["pair_row"]] * pattern["pair_value"],
+                        minlength=m * m).reshape(m, m) + np.diag(penalty[n_first:])
+    schur -= (cross.T @ sparse.diags(1 / diag) @ cross).toarray()
+    factor = cho_factor(schur)
+    logdet = np.log(diag).sum() + 2 * np.log(np.diag(factor[0])).sum()
+
+    def solve(b: np.ndarray) -> np.ndarray:
+        b_first, b_rest = b[:n_first], b[n_first:]
+        scale = diag if b.ndim == 1 else diag[:, None]
+        x_rest = cho_solve(factor, b_rest - cross.T @ (b_first / scale))
+        return np.concatenate([(b_first - cross @ x_rest) / scale, x_rest])
+
+    return solve, logdet
+
+
+def _penalized_loglik(matrix, y, penalty, coef) -> float:
+    eta = matrix @ coef
+    return float((y * log_expit(eta) + (1 - y) * log_expit(-eta)).sum()
+                 - 0.5 * (penalty * coef ** 2).sum())
+
+
+def _pirls(matrix, pattern: dict, y: np.ndarray, penalty: np.ndarray, start: np.ndarray,
+           max_iter: int = MAX_ITER, tol: float = TOL):
+    """
+    Penalisiertes IRLS für (u, β) bei festen Varianzen: maximiert
+    log L(y | Z u + X β) − ½ Σ penalty·u² per Newton mit Schrittweitenhalbierung.
+    """
+    coef = start.copy()
+    current = _penalized_loglik(matrix, y, penalty, coef)
+    for _ in range(max_iter):
+        mu = expit(matrix @ coef)
+        solve, _ = _factorize(pattern, mu * (1 - mu), penalty)
+        step = solve(pattern["transposed"] @ (y - mu) - penalty * coef)
+        scale = 1.0
+        while True:
+            candidate = _penalized_loglik(matrix, y, penalty, coef + scale * step)
+            if candidate >= current - 1e-10 or scale < 1e-4:
+                break
+            scale /= 2
+        coef, current = coef + scale * step, candidate
+        if np.max(np.abs(scale * step)) < tol:
+            break
+    mu = expit(matrix @ coef)
+    solve, logdet = _factorize(pattern, mu * (1 - mu), penalty)
+    return coef, current, solve, logdet
+
+
+def fit_crossed_logit(matrix: sparse.csc_matrix, y: np.ndarray, sizes: list[int],
+                      units: np.ndarray | None = None, start_log_sd=(-1.0, -1.0),
+                      subsample: int = SUBSAMPLE, seed: int = SEED) -> dict:
+    """
+    Laplace-Näherung der Randlikelihood über (u, β) (flacher Prior auf β, REML-artig):
+      ℓ(σ) ≈ log L(y | û, β̂) − ½ û'Λ⁻¹û − ½ log|Λ| − ½ log|H|
+    maximiert über log σ je Zufallseffekt-Block (L-BFGS-B, PIRLS warm gestartet).
+    Bei mehr als `subsample` Einheiten (units: Teilnehmer je Zeile) liefert ein
+    Fit auf einer Zufallsauswahl die Startwerte für σ.
+    """
+    if units is not None and units.max() + 1 > subsample:
+        chosen = np.random.default_rng(seed).choice(units.max() + 1, subsample, replace=False)
+        rows = np.isin(units, chosen)
+        start_log_sd = np.log(fit_crossed_logit(matrix[rows], y[rows], sizes,
+                                                start_log_sd=start_log_sd)["sd"])
+
+    n_random = sum(sizes)
+    n_fixed = matrix.shape[1] - n_random
+    pattern = _analyze(matrix, sizes[0])
+    state = {"coef": np.zeros(matrix.shape[1])}
+
+    def penalty_of(log_sd: np.ndarray) -> np.ndarray:
+        precision = np.repeat(np.exp(-2 * np.asarray(log_sd)), sizes)
+        return np.concatenate([precision, np.zeros(n_fixed)])
+
+    def negative_laplace(log_sd: np.ndarray) -> float:
+        coef, loglik, _, logdet = _pirls(matrix, pattern, y, penalty_of(log_sd), state["coef"])
+        state["coef"] = coef
+        log_det_lambda = (2 * np.asarray(log_sd) * np.asarray(sizes)).sum()
+        return -(loglik - 0.5 * log_det_lambda - 0.5 * logdet)
+
+    result = minimize(negative_laplace, np.asarray(start_log_sd, float), method="L-BFGS-B",
+                      bounds=[LOG_SD_BOUNDS] * len(sizes), options={"eps": FD_STEP})
+    coef, _, solve, _ = _pirls(matrix, pattern, y, penalty_of(result.x), state["coef"])
+
+    # Kovarianz von β: untere rechte Ecke von H⁻¹
+    unit = np.zeros((matrix.shape[1], n_fixed))
+    unit[n_random + np.arange(n_fixed), np.arange(n_fixed)] = 1
+    cov = solve(unit)[n_random:]
+    return {"beta": coef[n_random:], "cov": cov,
+            "random": np.split(coef[:n_random], np.cumsum(sizes)[:-1]),
+            "sd": np.exp(result.x), "laplace": -result.fun, "evaluations": result.nfev}
+
+
+def fixed_table(fit: dict, design: StudyDesign, alpha: float = ALPHA) -> pd.DataFrame:
+    """β je Emotion × System; Test gegen Zufallswahl logit(1/k)."""
+    k = design.n_systems
+    se = np.sqrt(np.clip(np.diag(fit["cov"]), 0, None))
+    chance = np.log(1 / (k - 1))
+    z = (fit["beta"] - chance) / se
+    q = norm.ppf(1 - alpha / 2)
+    return pd.DataFrame({
+        "Emotion": np.repeat(design.emotions, k),
+        "System": np.tile(design.systems, len(design.emotions)),
+        "beta": fit["beta"], "SE": se,
+        "P_typisch": expit(fit["beta"]),
+        "p": 2 * norm.sf(np.abs(z)),
+        "CI_low": fit["beta"] - q * se, "CI_high": fit["beta"] + q * se,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Logit mit gekreuzten Zufallseffekten")
+    parser.add_argument("--outcome", choices=("best", "worst"), default="best")
+    args = parser.parse_args()
+
+    # ---------- Daten laden ----------
+    design = load_design()
+    long = pd.read_csv(LONG_PATH)
+    run = ResultStore().run("crossed_mixed_logit", inputs=[LONG_PATH], seed=SEED,
+                            params={"outcome": args.outcome, "alpha": ALPHA})
+    rows = long_design(choice_sets(long, design), design, args.outcome)
+    matrix, sizes = design_matrices(rows, design)
+    print(f"{len(rows)} Zeilen, {rows['participant'].nunique()} Teilnehmer, "
+          f"{design.n_questions} Sätze, Designmatrix {matrix.shape[0]} × {matrix.shape[1]} "
+          f"({matrix.nnz} Einträge)")
+
+    # ---------- Schätzung ----------
+    fit = fit_crossed_logit(matrix, rows["y"].to_numpy(), sizes, rows["participant"].to_numpy())
+    sd_participant, sd_item = fit["sd"]
+    print(f"Laplace-Log-Likelihood {fit['laplace']:.1f} nach {fit['evaluations']} Auswertungen")
+    print(f"SD Teilnehmer:System = {sd_participant:.3f}, SD Satz:System = {sd_item:.3f}")
+
+    table = fixed_table(fit, design)
+    print(f"\nFeste Effekte ({args.outcome}, Test gegen Zufall 1/{design.n_systems}):")
+    for r in table.itertuples():
+        star = " *" if r.p < ALPHA else ""
+        print(f"  {r.Emotion:<10} {r.System:<11} β = {r.beta:+.3f} (SE {r.SE:.3f}), "
+              f"P = {r.P_typisch:.3f}, p = {r.p:.4f}{star}")
+
+    # Satzeffekte je System: stärkste Abweichungen vom Systemmittel
+    item_effects = pd.DataFrame({
+        "Item": np.repeat(design.question_ids, design.n_systems),
+        "System": np.tile(design.systems, design.n_questions),
+        "effekt": fit["random"][1],
+    })
+    print("\nStärkste Satzeffekte (Item:System):")
+    for r in item_effects.reindex(item_effects["effekt"].abs()
+                                  .sort_values(ascending=False).index).head(8).itertuples():
+        print(f"  {r.Item:<4} {r.System:<11} {r.effekt:+.3f}")
+
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    # ---------- Ergebnisspeicher ----------
+    stored = table.rename(columns={"Emotion": "emotion", "System": "system", "beta": "value",
+                                   "p": "p_value", "CI_low": "ci_low", "CI_high": "ci_high"})
+    run.add_frame(stored[["emotion", "system", "value", "p_value", "ci_low", "ci_high"]],
+                  statistic="mixed_logit_beta", n=rows["participant"].nunique())
+    run.add("random_sd", sd_participant, item="Teilnehmer:System")
+    run.add("random_sd", sd_item, item="Item:System")
+    run.add_frame(item_effects.rename(columns={"Item": "item", "System": "system",
+                                               "effekt": "value"}),
+                  statistic="item_effect")
+    run.save()
@@ -1,38 +1,36 @@
 import pandas as pd
 from pathlib import Path
 
+from result_store import ResultStore, stratum_label
+from study_design import load_design
+from survey_validation import load_survey
+
 DATA_PATH = Path("Survey_Entries.csv")
-df = pd.read_csv(DATA_PATH)
+design = load_design()
+df, best, worst = load_survey(DATA_PATH, design)
 
-q_cols = [c for c in df.columns if c.startswith("Q") and "_best" not in c and "_worst" not in c]
-for q in q_cols:
-    df[f"{q}_best"] = df[q].str.split(",", n=1).str[0].str.strip().astype(int)
-    df[f"{q}_worst"] = df[q].str.split(",", n=1).str[1].str.strip().astype(int)
+q_cols = design.question_ids
+for j, q in enumerate(q_cols):
+    df[f"{q}_best"] = design.system_codes[best[:, j]]
+    df[f"{q}_worst"] = design.system_codes[worst[:, j]]
 
-voice_labels = {1: "CosyVoice", 2: "EmoSpeech", 3: "EmoKnob", 4: "EmotiVoice"}
+voice_labels = design.voice_labels
+system_codes = list(voice_labels)
 
-emotion_groups = {
-    "Happy": ["Q1", "Q2", "Q3"],
-    "Sad": ["Q7", "Q8", "Q9"],
-    "Angry": ["Q13", "Q14", "Q15"],
-    "Surprised": ["Q19", "Q20", "Q21"]
-}
+# Demografische Auswertung nur über die kongruenten Fragen je Emotion
+emotion_groups = {emotion: design.questions_for(emotion, "Congruent")
+                  for emotion in design.emotions}
 
-demographics = {
-    "Geschlecht": {1: "Male", 2: "Female", 3: "Diverse"},
-    "Altersgruppe": {1: "<30", 2: "30-44", 3: "45-59", 4: ">60"},
-    "Englischkenntnisse": {1: "A1-A2", 2: "B1-B2", 3: "C1-C2"}
-}
+demographics = {col: codebook.mapping for col, codebook in design.demographics.items()}
 
 output_file = Path("demographic_bws_raw_results.txt")
+run = ResultStore().run("demographic_bws", inputs=[DATA_PATH])
 
 def calculate_raw_scores(subset_df, questions):
-    raw_scores = pd.Series(0, index=range(1, 5))
-    for q in questions:
-        for _, row in subset_df.iterrows():
-            raw_scores[row[f"{q}_best"]] += 1
-            raw_scores[row[f"{q}_worst"]] -= 1
-    return raw_scores
+    best = subset_df[[f"{q}_best" for q in questions]].stack().value_counts()
+    worst = subset_df[[f"{q}_worst" for q in questions]].stack().value_counts()
+    return (best.reindex(system_codes, fill_value=0)
+            - worst.reindex(system_codes, fill_value=0))
 
 # def calculate_raw_scores(subset_df, questions):
 #     raw_scores = pd.Series(0, index=range(1, 5))
@@ -54,7 +52,7 @@ with open(output_file, "w") as file:
             n_samples = len(subset_df)
             file.write(f"{demo_col}: {label} (N={n_samples})\n\n")
 
-            overall_scores = pd.Series(0, index=range(1, 5))
+            overall_scores = pd.Series(0, index=system_codes)
 
             for emotion, questions in emotion_groups.items():
                 raw_scores = calculate_raw_scores(subset_df, questions)
@@ -62,17 +60,23 @@ with open(output_file, "w") as file:
 
                 file.write(f"{emotion} Emotion Raw Scores:\n")
                 file.write("Voice System\tScore\n")
-                for i in range(1, 5):
+                for i in system_codes:
                     file.write(f"{voice_labels[i]}\t{raw_scores[i]}\n")
+                    run.add("raw_score", raw_scores[i], n=n_samples, emotion=emotion,
+                            congruence="Congruent", system=voice_labels[i],
+                            stratum=stratum_label(demo_col, label))
                 file.write("\n")
 
             file.write("Overall Raw Scores per Voice System:\n")
             file.write("Voice System\tOverall Score\n")
-            for i in range(1, 5):
+            for i in system_codes:
                 file.write(f"{voice_labels[i]}\t{overall_scores[i]}\n")
+                run.add("raw_score", overall_scores[i], n=n_samples, congruence="Congruent",
+                        system=voice_labels[i], stratum=stratum_label(demo_col, label))
             file.write("\n")
 
             file.write("-----------------------------------\n")
         file.write("\n")
 
+run.save()
 print("Demographic analysis results saved to demographic_bws_raw_results.txt.")
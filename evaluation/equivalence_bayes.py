@@ -0,0 +1,163 @@
+# -----------------------------------------------------------
+# Welch-t, TOST und JZS-Bayes-Faktor für alle Stufenpaare (Realismus)
+#   • alle Demografie-Faktoren und ihre Schnitte (z. B. Geschlecht × Alter),
+#     jedes Paar von Zellen – auch „Diverse“, sobald n ≥ 2
+#   • alles aus Zell-Suffizienzstatistiken (n, Mittel, Varianz) per bincount
+#   • Welch/TOST wie realism_gender.py (statsmodels ttost_ind, usevar="unequal"),
+#     BF10 wie pingouin.bayesfactor_ttest, Integral über log g auf einem
+#     gemeinsamen Gitter für alle Vergleiche
+# -----------------------------------------------------------
+
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import logsumexp
+from scipy.stats import t as t_dist
+
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("equivalence_bayes_results.csv")
+EQUIVALENCE_BOUNDS = (-0.30, 0.30)       # Rohskala wie realism_gender.py
+CAUCHY_R = 0.707
+LOG_G_GRID = np.linspace(-20, 40, 401)    # Trapez über log g: glatt, ~1e-12 genau
+MIN_N = 2
+ALPHA = 0.05
+
+
+# ---------- Hilfsfunktionen ----------
+def cell_statistics(values: np.ndarray, cell: np.ndarray, n_cells: int) -> tuple[np.ndarray, ...]:
+    """(n, Mittel, Varianz mit ddof = 1) je Zelle; cell = −1 wird ignoriert."""
+    keep = (cell >= 0) & np.isfinite(values)
+    n = np.bincount(cell[keep], minlength=n_cells).astype(float)
+    total = np.bincount(cell[keep], values[keep], minlength=n_cells)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+        squares = np.bincount(cell[keep], (values[keep] - mean[cell[keep]]) ** 2,
+                              minlength=n_cells)
+        var = squares / (n - 1)
+    return n, mean, var
+
+
+def welch(n1, m1, v1, n2, m2, v2) -> dict[str, np.ndarray]:
+    """
+    Welch-t mit Satterthwaite-df und zweiseitigem p, Cohens d (gepoolte SD).
+    Beide Varianzen 0 → NaN (Test nicht definiert).
+    """
+    a, b = v1 / n1, v2 / n2
+    se = np.sqrt(a + b)
+    diff = m1 - m2
+    pooled = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+        t = diff / se
+        d = diff / pooled
+    return {"diff": diff, "se": se, "df": df, "t": t, "p": 2 * t_dist.sf(np.abs(t), df), "d": d}
+
+
+def tost(diff, se, df, bounds=EQUIVALENCE_BOUNDS) -> tuple[np.ndarray, np.ndarray]:
+    """Einseitige p-Werte gegen untere und obere Äquivalenzgrenze (Welch-df)."""
+    low, high = bounds
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return t_dist.sf((diff - low) / se, df), t_dist.cdf((diff - high) / se, df)
+
+
+def jzs_bf10(t, nx, ny, r: float = CAUCHY_R, log_g: np.ndarray = LOG_G_GRID) -> np.ndarray:
+    """
+    JZS-Bayes-Faktor (Rouder et al. 2009, Gl. 1) wie pingouin.bayesfactor_ttest
+    (unabhängige Stichproben) für Arrays von t. Trapezregel über log g im Log-Raum.
+    """
+    t, nx, ny = (np.asarray(x, float)[..., None] for x in (t, nx, ny))
+    n = nx * ny / (nx + ny)
+    df = nx + ny - 2
+    g = np.exp(log_g)
+    scale = 1 + n * g * r ** 2
+    log_integrand = (-0.5 * np.log(scale)
+                     - (df + 1) / 2 * np.log1p(t ** 2 / (scale * df))
+                     - 0.5 * np.log(2 * np.pi) - 1.5 * log_g - 1 / (2 * g)
+                     + log_g)                                       # dg = g · d(log g)
+    log_integral = logsumexp(log_integrand, axis=-1) + np.log(log_g[1] - log_g[0])
+    log_bf = log_integral + (df[..., 0] + 1) / 2 * np.log1p(t[..., 0] ** 2 / df[..., 0])
+    return np.where(np.isfinite(t[..., 0]), np.exp(log_bf), np.nan)
+
+
+def factor_cells(df: pd.DataFrame, design: StudyDesign):
+    """
+    Alle Faktorkombinationen (einzeln und Schnitte): (Name, Zellindex je Person,
+    Zell-Labels). Personen mit fehlender Stufe in einem Faktor → −1.
+    """
+    columns = list(design.demographics)
+    index = {col: design.demographics[col].index(df[col]) for col in columns}
+    for size in range(1, len(columns) + 1):
+        for combo in combinations(columns, size):
+            codebooks = [design.demographics[col] for col in combo]
+            shape = [len(cb.labels) for cb in codebooks]
+            codes = np.stack([index[col] for col in combo])
+            cell = np.where((codes >= 0).all(axis=0),
+                            np.ravel_multi_index(np.maximum(codes, 0), shape), -1)
+            labels = [", ".join(parts) for parts in
+                      np.array(np.meshgrid(*[cb.labels for cb in codebooks],
+                                           indexing="ij")).reshape(size, -1).T]
+            yield " × ".join(combo), cell, labels
+
+
+def compare_all(df: pd.DataFrame, design: StudyDesign, values: np.ndarray) -> pd.DataFrame:
+    """Alle Zellpaare aller Faktorkombinationen in einem vektorisierten Durchgang."""
+    frames = []
+    for name, cell, labels in factor_cells(df, design):
+        n, mean, var = cell_statistics(values, cell, len(labels))
+        usable = np.flatnonzero(n >= MIN_N)
+        if len(usable) < 2:
+            continue
+        i, j = np.array(list(combinations(usable, 2))).T
+        frames.append(pd.DataFrame({"Faktor": name, "A": np.array(labels)[i],
+                                    "B": np.array(labels)[j], "n_A": n[i], "n_B": n[j],
+                                    "M_A": mean[i], "M_B": mean[j],
+                                    "V_A": var[i], "V_B": var[j]}))
+    pairs = pd.concat(frames, ignore_index=True)
+
+    stats = welch(*pairs[["n_A", "M_A", "V_A", "n_B", "M_B", "V_B"]].to_numpy().T)
+    p_low, p_high = tost(stats["diff"], stats["se"], stats["df"])
+    return pairs.assign(Diff=stats["diff"], t=stats["t"], df=stats["df"], p=stats["p"],
+                        d=stats["d"], p_tost_low=p_low, p_tost_high=p_high,
+                        p_tost=np.maximum(p_low, p_high),
+                        BF10=jzs_bf10(stats["t"], pairs["n_A"], pairs["n_B"]))
+
+
+if __name__ == "__main__":
+    design = load_design()
+    df, _, _ = load_survey(DATA_PATH, design)
+    run = ResultStore().run("equivalence_bayes", inputs=[DATA_PATH],
+                            params={"bounds": EQUIVALENCE_BOUNDS, "r": CAUCHY_R, "min_n": MIN_N})
+    realism = pd.to_numeric(df[design.realism_column], errors="coerce").to_numpy(float)
+
+    start = time.perf_counter()
+    table = compare_all(df, design, realism)
+    elapsed = (time.perf_counter() - start) * 1e3
+    print(f"{len(table)} Vergleiche in {table['Faktor'].nunique()} Faktorkombinationen "
+          f"in {elapsed:.1f} ms\n")
+
+    low, high = EQUIVALENCE_BOUNDS
+    for r in table[~table["Faktor"].str.contains("×")].itertuples():
+        verdict = "äquivalent" if r.p_tost < ALPHA else ("verschieden" if r.p < ALPHA else "offen")
+        print(f"  {r.Faktor:<18} {r.A:>7} vs {r.B:<7} Δ = {r.Diff:+.2f}, "
+              f"t({r.df:.1f}) = {r.t:+.2f}, p = {r.p:.3f}, TOST [{low:+.2f}, {high:+.2f}] "
+              f"p = {r.p_tost:.3f}, BF10 = {r.BF10:.3f} → {verdict}")
+
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    cells = pd.DataFrame({"n": (table["n_A"] + table["n_B"]).astype(int),
+                          "stratum": table["Faktor"],
+                          "contrast": table["A"] + " vs " + table["B"]})
+    run.add_frame(cells.assign(value=table["t"], p_value=table["p"]), statistic="welch_t")
+    run.add_frame(cells.assign(value=table["d"]), statistic="cohens_d")
+    run.add_frame(cells.assign(value=low, p_value=table["p_tost_low"]), statistic="tost_low")
+    run.add_frame(cells.assign(value=high, p_value=table["p_tost_high"]), statistic="tost_high")
+    run.add_frame(cells.assign(value=table["BF10"]), statistic="bf10")
+    run.save()
@@ -0,0 +1,200 @@
+# -----------------------------------------------------------
+# Post-hoc-Tests für blockweise Designs (nach signifikantem Friedman-Test)
+#   • Ränge innerhalb jeder Person einmal berechnet – für Friedman-χ², Monte-Carlo
+#     (Permutation der Ränge je Zeile) und Post-hoc
+#   • Nemenyi (Studentized Range), Conover-Friedman (t), Wilcoxon-Vorzeichen-Rang
+#     je Systempaar (exakt über Rangsummen-Verteilung, sonst Monte-Carlo)
+#   • alle Systempaare aller Strata in einem vektorisierten Durchgang
+# -----------------------------------------------------------
+
+from itertools import combinations, permutations
+
+import numpy as np
+from scipy.stats import chi2 as chi2_dist
+from scipy.stats import rankdata, studentized_range, t as t_dist
+
+from multiple_testing import adjust_pvalues
+
+# ---------- Konfiguration ----------
+METHODS = ("nemenyi", "conover", "wilcoxon")
+P_ADJUST = "holm"            # je Stratum über die Systempaare (Nemenyi ist single-step)
+EXACT_MAX_N = 50             # Wilcoxon exakt bis zu so vielen Nicht-Null-Differenzen
+MC_PERMUTATIONS = 10_000
+MC_CHUNK = 20_000_000        # max. Einträge (Permutationen × Strata × n × k) je Chunk
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def stack_cells(cells: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Strata mit unterschiedlichem n → (S, n_max, k)-Array und (S, n_max)-Gültigkeitsmaske."""
+    n_max = max((len(c) for c in cells), default=0)
+    k = cells[0].shape[1] if cells else 0
+    data = np.zeros((len(cells), n_max, k))
+    valid = np.zeros((len(cells), n_max), bool)
+    for s, cell in enumerate(cells):
+        data[s, :len(cell)] = cell
+        valid[s, :len(cell)] = True
+    return data, valid
+
+
+def within_ranks(data: np.ndarray) -> np.ndarray:
+    """Durchschnittsränge innerhalb jeder Zeile (…, k)."""
+    less = (data[..., None, :] < data[..., :, None]).sum(axis=-1)
+    equal = (data[..., None, :] == data[..., :, None]).sum(axis=-1)
+    return less + (equal + 1) / 2
+
+
+def friedman(ranks: np.ndarray, valid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Friedman-χ² mit Bindungskorrektur wie scipy.stats.friedmanchisquare."""
+    k = ranks.shape[-1]
+    n = valid.sum(axis=1)
+    ranks = np.where(valid[..., None], ranks, 0)
+    rank_sums = ranks.sum(axis=1)
+    ties = np.where(valid, tie_terms(ranks), 0).sum(axis=1)
+    stat = friedman_statistic(rank_sums, ties, n)
+    return stat, chi2_dist.sf(stat, k - 1)
+
+
+def tie_terms(ranks: np.ndarray) -> np.ndarray:
+    """Σ(t³ − t) je Zeile aus den Rängen: Bindungsgruppe der Größe t ↔ t Einträge gleichen Rangs."""
+    group_size = (ranks[..., None, :] == ranks[..., :, None]).sum(axis=-1)
+    return (group_size ** 2 - 1).sum(axis=-1)
+
+
+def friedman_statistic(rank_sums: np.ndarray, ties: np.ndarray, n) -> np.ndarray:
+    """Bindungskorrigiertes Friedman-χ² aus Rangsummen (…, k), Σ Bindungsterme und n (broadcastfähig)."""
+    k = rank_sums.shape[-1]
+    stat = 12 / (n * k * (k + 1)) * (rank_sums ** 2).sum(axis=-1) - 3 * n * (k + 1)
+    return stat / (1 - ties / (k * (k ** 2 - 1) * n))
+
+
+def friedman_mc(ranks: np.ndarray, valid: np.ndarray, n_perm: int = MC_PERMUTATIONS,
+                seed: int = SEED, chunk: int = MC_CHUNK) -> np.ndarray:
+    """
+    Monte-Carlo-p des Friedman-χ² je Stratum: Ränge jeder Zeile zufällig permutiert
+    (Bindungsterme bleiben dabei gleich, nur die Rangsummen ändern sich),
+    alle Strata gemeinsam in Blöcken von höchstens `chunk` Einträgen. Die
+    Zeilenpermutationen sind Indizes in die k! vorab aufgezählten Ordnungen.
+    """
+    n = valid.sum(axis=1)
+    ranks = np.where(valid[..., None], ranks, 0)
+    ties = np.where(valid, tie_terms(ranks), 0).sum(axis=1)
+    observed = friedman_statistic(ranks.sum(axis=1), ties, n)
+    orders = np.array(list(permutations(range(ranks.shape[-1]))), dtype=np.int8)
+    rng = np.random.default_rng(seed)
+    count = np.zeros(len(ranks))
+    step = max(1, chunk // max(ranks.size, 1))
+    for start in range(0, n_perm, step):
+        size = min(step, n_perm - start)
+        order = orders[rng.integers(0, len(orders), (size, *ranks.shape[:-1]))]
+        rank_sums = np.take_along_axis(ranks[None], order, axis=-1).sum(axis=2)
+        count += (friedman_statistic(rank_sums, ties, n) >= observed - 1e-9).sum(axis=0)
+    return (count + 1) / (n_perm + 1)
+
+
+def nemenyi(ranks: np.ndarray, valid: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Nemenyi-Test über mittlere Ränge (wie scikit_posthocs.posthoc_nemenyi_friedman)."""
+    k = ranks.shape[-1]
+    n = valid.sum(axis=1)
+    mean_ranks = np.where(valid[..., None], ranks, 0).sum(axis=1) / n[:, None]
+    diff = np.abs(mean_ranks[:, pairs[:, 0]] - mean_ranks[:, pairs[:, 1]])
+    q = diff / np.sqrt(k * (k + 1) / (6 * n))[:, None]
+    return studentized_range.sf(q * np.sqrt(2), k, np.inf)
+
+
+def conover(ranks: np.ndarray, valid: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Conover-Friedman-t-Test (wie scikit_posthocs.posthoc_conover_friedman, unadjustiert)."""
+    k = ranks.shape[-1]
+    n = valid.sum(axis=1)
+    ranks = np.where(valid[..., None], ranks, 0)
+    rank_sums = ranks.sum(axis=1)
+    s2 = ((ranks ** 2).sum(axis=(1, 2)) - k * n * (k + 1) ** 2 / 4) / (k - 1)
+    t2 = ((rank_sums - (n * (k + 1) / 2)[:, None]) ** 2).sum(axis=-1) / s2
+    df = n * k - k - n + 1
+    a = s2 * 2 * n * (k - 1) / df
+    b = 1 - t2 / (n * (k - 1))
+    diff = np.abs(rank_sums[:, pairs[:, 0]] - rank_sums[:, pairs[:, 1]])
+    t = diff / np.sqrt(a * b)[:, None]
+    return 2 * t_dist.sf(t, df[:, None])
+
+
+def _signed_rank_exact(ranks: np.ndarray, t_plus: np.ndarray) -> np.ndarray:
+    """
+    Exakte zweiseitige p-Werte der Rangsumme T⁺ = Σ r·[d > 0] für Zeilen von
+    Rängen (Bindungen → halbe Ränge, 0 = inaktiv). Dichte von 2T⁺ per Faltung
+    über alle Zeilen gleichzeitig, je Position ein Schritt.
+    """
+    weights = np.rint(2 * ranks).astype(np.int64)                 # ganzzahlig
+    size = int(weights.sum(axis=1).max()) + 1
+    density = np.zeros((len(ranks), size))
+    density[:, 0] = 1
+    grid = np.arange(size)
+    for w in weights.T:
+        source = grid[None, :] - w[:, None]
+        shifted = np.where(source >= 0,
+                           np.take_along_axis(density, np.maximum(source, 0), axis=1), 0)
+        density = np.where((w > 0)[:, None], (density + shifted) / 2, density)
+    center = weights.sum(axis=1) / 2
+    observed = np.abs(np.rint(2 * t_plus) - center)
+    extreme = np.abs(grid[None, :] - center[:, None]) >= observed[:, None] - 1e-9
+    return np.minimum((density * extreme).sum(axis=1), 1.0)
+
+
+def wilcoxon_pairs(data: np.ndarray, valid: np.ndarray, pairs: np.ndarray,
+                   n_perm: int = MC_PERMUTATIONS, seed: int = SEED) -> np.ndarray:
+    """
+    Wilcoxon-Vorzeichen-Rang-Test je Systempaar (Nullen verworfen, Bindungen
+    gemittelt). Exakt bis EXACT_MAX_N Nicht-Null-Differenzen, sonst Monte-Carlo
+    mit gemeinsamer Vorzeichenmatrix für alle Strata (eine Matrixmultiplikation).
+    """
+    diff = data[..., pairs[:, 0]] - data[..., pairs[:, 1]]                # (S, n, P)
+    diff = np.moveaxis(diff, 2, 1).reshape(-1, data.shape[1])            # (S·P, n)
+    active = np.repeat(valid, len(pairs), axis=0) & (diff != 0)
+    ranks = rankdata(np.where(active, np.abs(diff), np.inf), axis=1)
+    ranks = np.where(active, ranks, 0)
+    t_plus = np.where(diff > 0, ranks, 0).sum(axis=1)
+    n_active = active.sum(axis=1)
+
+    p = np.ones(len(diff))
+    exact = (n_active > 0) & (n_active <= EXACT_MAX_N)
+    if exact.any():
+        # nur aktive Spalten behalten → Faltung über höchstens EXACT_MAX_N Schritte
+        order = np.argsort(~active[exact], axis=1, kind="stable")[:, :EXACT_MAX_N]
+        p[exact] = _signed_rank_exact(np.take_along_axis(ranks[exact], order, axis=1),
+                                      t_plus[exact])
+    sampled = n_active > EXACT_MAX_N
+    if sampled.any():
+        rng = np.random.default_rng(seed)
+        signs = rng.integers(0, 2, size=(n_perm, diff.shape[1]), dtype=np.int8)
+        center = ranks[sampled].sum(axis=1) / 2
+        perm = signs @ ranks[sampled].T                                   # (n_perm, Zellen)
+        extreme = np.abs(perm - center) >= np.abs(t_plus[sampled] - center) - 1e-9
+        p[sampled] = (extreme.sum(axis=0) + 1) / (n_perm + 1)
+    return p.reshape(len(data), len(pairs))
+
+
+def blocked_posthoc(data: np.ndarray, valid: np.ndarray, method: str = "conover",
+                    p_adjust: str | None = P_ADJUST, ranks: np.ndarray | None = None) -> dict:
+    """
+    Alle Systempaare aller Strata: data (S, n, k), valid (S, n).
+    Bereits berechnete within_ranks(data) können über `ranks` übergeben werden.
+    Gibt Paare, Friedman-χ²/p sowie rohe und (je Stratum) adjustierte p-Werte zurück.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unbekannte Post-hoc-Methode '{method}', erlaubt: {METHODS}")
+    pairs = np.array(list(combinations(range(data.shape[-1]), 2)))
+    if ranks is None:
+        ranks = within_ranks(data)
+    chi2, p_friedman = friedman(ranks, valid)
+    if method == "nemenyi":
+        p = nemenyi(ranks, valid, pairs)
+    elif method == "conover":
+        p = conover(ranks, valid, pairs)
+    else:
+        p = wilcoxon_pairs(data, valid, pairs)
+
+    p_adj = p
+    if method != "nemenyi" and p_adjust is not None:
+        families = np.repeat(np.arange(len(p)), len(pairs))
+        p_adj = adjust_pvalues(p.ravel(), families, p_adjust).reshape(p.shape)
+    return {"pairs": pairs, "chi2": chi2, "p_friedman": p_friedman, "p": p, "p_adj": p_adj}
@@ -1,92 +1,69 @@
 # -----------------------------------------------------------
 # Friedman-Tests (Monte-Carlo) nach Geschlecht × Kongruenz × Emotion
 #   • 4 TTS-Systeme → Rang-Daten (Best = +1, Worst = –1)
-#   • 10 000 Zufalls­permutationen, fester Seed
+#   • Ränge je Person einmal berechnet: χ², Bindungen, 10 000 Zufalls­permutationen
+#     (vektorisiert, fester Seed) und Post-hoc nutzen dieselben Ränge
+#   • Post-hoc blockweise (friedman_posthoc.py) für alle signifikanten Zellen
 # -----------------------------------------------------------
 
 import pandas as pd
 from pathlib import Path
 import numpy as np
-from scipy.stats import friedmanchisquare
-import scikit_posthocs as sp
+
+from friedman_posthoc import (P_ADJUST, blocked_posthoc, friedman, friedman_mc,
+                              stack_cells, tie_terms, within_ranks)
+from result_store import ResultStore, stratum_label
+from study_design import load_design
+from survey_validation import load_survey
 
 # ---------- Konfiguration ----------
 DATA_PATH = Path("Survey_Entries.csv")
 
-voice_labels = {1: "CosyVoice", 2: "EmoSpeech", 3: "EmoKnob", 4: "EmotiVoice"}
+design = load_design()
 
-gender_map = {1: "Male", 2: "Female", 3: "Diverse"}
+codebook = design.demographics["Geschlecht"]
 
-emotion_questions = {
-    "Happy":     ["Q1", "Q2", "Q3", "Q4", "Q5", "Q6"],
-    "Sad":       ["Q7", "Q8", "Q9", "Q10", "Q11", "Q12"],
-    "Angry":     ["Q13", "Q14", "Q15", "Q16", "Q17", "Q18"],
-    "Surprised": ["Q19", "Q20", "Q21", "Q22", "Q23", "Q24"],
-}
+# deutsche Labels der Kongruenz-Blöcke in der Ausgabe
+kongruenz_labels = {"Congruent": "Kongruent", "Incongruent": "Inkongruent"}
 
 MC_PERMUTATIONS = 10_000
+POSTHOC = "conover"          # nemenyi | conover | wilcoxon (blockweise, je Person gepaart)
 SEED = 2025
-rng = np.random.default_rng(SEED)           
-np.random.seed(SEED)
 
 # ---------- Daten laden & vorbereiten ----------
-df = pd.read_csv(DATA_PATH)
-
-# Best/Worst-Spalten erzeugen
-base_qs = [c for c in df.columns if c.startswith("Q") and "_best" not in c]
-for q in base_qs:
-    df[f"{q}_best"]  = df[q].str.split(",", n=1).str[0].str.strip().astype(int)
-    df[f"{q}_worst"] = df[q].str.split(",", n=1).str[1].str.strip().astype(int)
+# Prüfung/Quarantäne, Best/Worst-Systemindex je Frage und
+# Best-minus-Worst-Tensor (n, Blöcke, Systeme)
+df, best, worst = load_survey(DATA_PATH, design)
+net = design.net_scores(best, worst)
 
 
 # ---------- Hilfsfunktionen ----------
-def calc_scores(row: pd.Series, qs: list[str]) -> pd.Series:
-    scores = pd.Series(0, index=range(1, 5))
-    for q in qs:
-        scores[row[f"{q}_best"]]  += 1
-        scores[row[f"{q}_worst"]] -= 1
-    return scores
-
-def kendalls_w(chi2: float, n: int, k: int) -> float:
-    return chi2 / (n * (k - 1)) if n else np.nan
-
-def tie_stats(df_block: pd.DataFrame) -> tuple[int, float]:
-    k = df_block.shape[1]
-    tie_rows = df_block.apply(lambda r: len(set(r)) < k, axis=1)
-    return int(tie_rows.sum()), 100 * tie_rows.mean()
-
-def friedman_mc(data: np.ndarray, n_perm: int = MC_PERMUTATIONS) -> float:
-    obs = friedmanchisquare(*data.T).statistic
-    ge = (friedmanchisquare(*rng.permuted(data, axis=1).T).statistic >= obs
-          for _ in range(n_perm))
-    count = sum(ge)
-    return (count + 1) / (n_perm + 1)     # unbiased
+def kendalls_w(chi2: np.ndarray, n: np.ndarray, k: int) -> np.ndarray:
+    return chi2 / (n * (k - 1))
 
 # ---------- Long-Format-Tabelle ----------
-rows = []
-for pid, row in df.iterrows():
-    age = gender_map.get(row["Geschlecht"])
-    if age is None:
-        continue
-    for emotion, qs in emotion_questions.items():
-        cong_qs, incong_qs = qs[:3], qs[3:]
-        for label, sel_qs in [("Kongruent", cong_qs), ("Inkongruent", incong_qs)]:
-            scores = calc_scores(row, sel_qs)
-            for sys_id, score in scores.items():
-                rows.append(
-                    {
-                        "Participant":  pid,
-                        "Geschlecht": age,
-                        "Kongruenz":    label,
-                        "Emotion":      emotion,
-                        "System":       voice_labels[sys_id],
-                        "Score":        score,
-                    }
-                )
-
-scores_df = pd.DataFrame(rows)
+level = codebook.index(df["Geschlecht"])
+keep = level >= 0
+n_keep, n_blocks, k = int(keep.sum()), design.n_blocks, design.n_systems
+block_emotion, block_cong = zip(*design.block_labels)
+
+scores_df = pd.DataFrame(
+    {
+        "Participant":  np.repeat(df.index[keep], n_blocks * k),
+        "Geschlecht": np.repeat(np.array(codebook.labels)[level[keep]], n_blocks * k),
+        "Kongruenz":    np.tile(np.repeat([kongruenz_labels[c] for c in block_cong], k), n_keep),
+        "Emotion":      np.tile(np.repeat(block_emotion, k), n_keep),
+        "System":       np.tile(design.systems, n_keep * n_blocks),
+        "Score":        net[keep].ravel(),
+    }
+)
 
 # ---------- Friedman-Loops ----------
+run = ResultStore().run("friedman_geschlecht", inputs=[DATA_PATH], seed=SEED,
+                        params={"mc_permutations": MC_PERMUTATIONS})
+congruence_of = {label: c for c, label in kongruenz_labels.items()}
+cells = []            # (Stratum, Kongruenz, Emotion, Systeme, Daten) je Zelle
+
 for age in scores_df["Geschlecht"].unique():
     for cong in ["Kongruent", "Inkongruent"]:
         subset = scores_df.query("Geschlecht == @age & Kongruenz == @cong")
@@ -97,40 +74,59 @@ for age in scores_df["Geschlecht"].unique():
                               columns="System",
                               values="Score")
                  .dropna())
-
-        print(f"\nGeschlecht: {age}  |  {cong}")
         for emotion in pivot.index.get_level_values("Emotion").unique():
-            emo_data = pivot.xs(emotion, level="Emotion").to_numpy(int)
-            n, k = emo_data.shape
-            chi2, p_asymp = friedmanchisquare(*emo_data.T)
-            ties_n, ties_pct = tie_stats(pivot.xs(emotion, level="Emotion"))
-
-            use_mc = (n < 10) or (ties_pct > 50)
-            p_final = friedman_mc(emo_data) if use_mc else p_asymp
-            note = "Monte-Carlo" if use_mc else "asymptotisch"
-            W = kendalls_w(chi2, n, k)
-
-            print(f"  Emotion: {emotion:<9} χ²({k-1}) = {chi2:.3f}, "
-                  f"p = {p_final:.4f} ({note}), W = {W:.3f}, "
-                  f"Ties: {ties_n}/{n} ({ties_pct:.1f} %)")
-
-            if p_final < 0.05:
-                melted = (pivot.xs(emotion, level="Emotion")
-                               .reset_index()
-                               .melt(id_vars="Participant",
-                                     var_name="System",
-                                     value_name="Score"))
-                dunn = sp.posthoc_dunn(melted,
-                                        val_col="Score",
-                                        group_col="System",
-                                        p_adjust="bonferroni")
-                sig_pairs = [(a, b, dunn.loc[a, b])
-                             for a in dunn.index
-                             for b in dunn.columns
-                             if a < b and dunn.loc[a, b] < 0.05]
-                if sig_pairs:
-                    print("    Signifikante Paare:")
-                    for a, b, p in sig_pairs:
-                        print(f"      - {a} vs {b}: p = {p:.4f}")
-                else:
-                    print("    Keine signifikanten Paare")
+            cells.append((age, cong, emotion, list(pivot.columns),
+                          pivot.xs(emotion, level="Emotion").to_numpy(int)))
+
+# Ränge je Person einmal – χ², Bindungen, Monte-Carlo und Post-hoc teilen sie
+data, valid = stack_cells([emo_data for *_, emo_data in cells])
+ranks = within_ranks(data)
+chi2, p_asymp = friedman(ranks, valid)
+n = valid.sum(axis=1)
+ties_n = ((tie_terms(ranks) > 0) & valid).sum(axis=1)
+ties_pct = 100 * ties_n / n
+use_mc = (n < 10) | (ties_pct > 50)
+p_final = p_asymp.copy()
+if use_mc.any():
+    p_final[use_mc] = friedman_mc(ranks[use_mc], valid[use_mc], MC_PERMUTATIONS, SEED)
+W = kendalls_w(chi2, n, k)
+
+significant = []      # (Label, Ergebnisfelder, Systeme, Zellindex) je signifikanter Zelle
+header = None
+for s, (age, cong, emotion, systems, _) in enumerate(cells):
+    if (age, cong) != header:
+        header = (age, cong)
+        print(f"\nGeschlecht: {age}  |  {cong}")
+    note = "Monte-Carlo" if use_mc[s] else "asymptotisch"
+    print(f"  Emotion: {emotion:<9} χ²({k-1}) = {chi2[s]:.3f}, "
+          f"p = {p_final[s]:.4f} ({note}), W = {W[s]:.3f}, "
+          f"Ties: {ties_n[s]}/{n[s]} ({ties_pct[s]:.1f} %)")
+    cell = dict(n=int(n[s]), emotion=emotion, congruence=congruence_of[cong],
+                stratum=stratum_label("Geschlecht", age))
+    run.add("friedman_chi2", chi2[s], p_value=p_final[s], **cell)
+    run.add("kendalls_w", W[s], **cell)
+
+    if p_final[s] < 0.05:
+        significant.append((f"{age}  |  {cong}  |  {emotion}", cell, systems, s))
+
+# ---------- Post-hoc: alle signifikanten Zellen in einem Durchgang ----------
+if significant:
+    sig = [s for *_, s in significant]
+    posthoc = blocked_posthoc(data[sig], valid[sig], method=POSTHOC, ranks=ranks[sig])
+    print(f"\nPost-hoc ({POSTHOC}, {P_ADJUST} je Zelle) für {len(significant)} signifikante Zellen:")
+    for (label, cell, systems, _), p_raw, p_adj in zip(significant, posthoc["p"],
+                                                       posthoc["p_adj"]):
+        print(f"\n  {label}")
+        for (a, b), p, p_a in zip(posthoc["pairs"], p_raw, p_adj):
+            run.add(f"posthoc_{POSTHOC}", p_value=p, p_adjusted=p_a, adjust_method=P_ADJUST,
+                    system=systems[a], system_b=systems[b], **cell)
+        sig_pairs = [(systems[a], systems[b], p)
+                     for (a, b), p in zip(posthoc["pairs"], p_adj) if p < 0.05]
+        if sig_pairs:
+            print("    Signifikante Paare:")
+            for a, b, p in sig_pairs:
+                print(f"      - {a} vs {b}: p = {p:.4f}")
+        else:
+            print("    Keine signifikanten Paare")
+
+run.save()
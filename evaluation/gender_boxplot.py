@@ -1,4 +1,6 @@
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")                # headless (Cron); alle Abbildungen: render_figures.py
 import matplotlib.pyplot as plt
 
 # ------------------------------------------------------------------
@@ -30,4 +32,3 @@ plt.grid(axis='y', linestyle='--', linewidth=0.5, alpha=0.7)
 
 plt.tight_layout()
 plt.savefig("gender_realism_boxplot.png", dpi=1200)
-plt.show()
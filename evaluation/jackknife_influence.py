@@ -0,0 +1,265 @@
+# -----------------------------------------------------------
+# Jackknife-Einfluss je Teilnehmer (leave-one-out, geschlossen)
+#   • Statistiken je Emotion × Kongruenz-Block: Δ Net-Score aller Systempaare,
+#     Friedman-χ² und Kendalls W – gesamt und je Demografie-Stufe
+#   • Signifikanz nur als Näherung in geschlossener Form: gepaarter t-Test für
+#     Δ Net (analyse_bootstrap.py: BCa-Bootstrap-KI) und asymptotisches χ²
+#     (friedmann_*.py: Monte-Carlo-p bei > 50 % Bindungen) → „Kippend“ zählt
+#     Wechsel dieser Näherung, nicht der dort berichteten Entscheidungen
+#   • einmal Summen je Stratum (Σd, Σd², Rangsummen, Bindungsterme, n); das
+#     Ergebnis ohne Person i ist Summe − Beitrag von i → O(n × Statistiken),
+#     kein n-faches Neuschätzen, Teilnehmer in Chunks
+#   • Jackknife-SE, Anzahl „kippender“ Personen (Signifikanz ändert sich),
+#     Top-K-Einflüsse je Statistik und Rangliste der Teilnehmenden
+# -----------------------------------------------------------
+
+import argparse
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2 as chi2_dist
+from scipy.stats import t as t_dist
+
+from friedman_posthoc import friedman_statistic, tie_terms, within_ranks
+from result_store import ResultStore, stratum_label
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("jackknife_influence_results.csv")
+PARTICIPANT_PATH = Path("jackknife_influence_participants.csv")
+OVERALL = "Gesamt"
+TOP_K = 10                   # einflussreichste Personen je Statistik
+TOP_PARTICIPANTS = 25        # in der Ausgabe
+MIN_N = 3                    # kleinere Strata werden nicht berichtet
+CHUNK_ROWS = 20_000
+ALPHA = 0.05
+
+
+# ---------- Hilfsfunktionen ----------
+def participant_terms(net: np.ndarray, pairs: np.ndarray) -> dict[str, np.ndarray]:
+    """Beiträge je Person: Paar-Differenzen d (c, B, P), d², Ränge (c, B, k), Bindungsterme (c, B)."""
+    ranks = within_ranks(net)
+    d = (net[..., pairs[:, 0]] - net[..., pairs[:, 1]]).astype(float)
+    return {"n": np.ones(len(net)), "d": d, "d2": d ** 2, "r": ranks,
+            "t": tie_terms(ranks).astype(float)}
+
+
+def level_totals(terms: dict[str, np.ndarray], level: np.ndarray, n_levels: int) -> dict:
+    """Summen je Stufe (L, …); level = −1 zählt nirgends."""
+    onehot = (level[None, :] == np.arange(n_levels)[:, None]).astype(float)   # (L, c)
+    return {key: (onehot @ value.reshape(len(value), -1)).reshape(n_levels, *value.shape[1:])
+            for key, value in terms.items()}
+
+
+def statistics(totals: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Werte und p-Werte (…, B, P + 2) aus Summen: Spalten 0…P−1 Δ Net (gepaarter
+    t-Test), P Friedman-χ² (asymptotisch), P + 1 Kendalls W (p des χ²). Beide
+    p sind Näherungen der Bootstrap- bzw. Monte-Carlo-p der Auswertungsskripte.
+    """
+    n = totals["n"]
+    k = totals["r"].shape[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = totals["d"] / n[..., None, None]
+        var = (totals["d2"] - n[..., None, None] * mean ** 2) / (n[..., None, None] - 1)
+        t = mean / np.sqrt(var / n[..., None, None])
+        p_t = 2 * t_dist.sf(np.abs(t), n[..., None, None] - 1)
+        chi2 = friedman_statistic(totals["r"], totals["t"], n[..., None])
+        p_chi2 = chi2_dist.sf(chi2, k - 1)
+        w = chi2 / (n[..., None] * (k - 1))
+    values = np.concatenate([mean, chi2[..., None], w[..., None]], axis=-1)
+    p = np.concatenate([p_t, p_chi2[..., None], p_chi2[..., None]], axis=-1)
+    return values, p
+
+
+def leave_one_out(totals: dict, terms: dict, level: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Statistiken des eigenen Stratums ohne die jeweilige Person: Summe − Beitrag."""
+    return statistics({key: totals[key][level] - terms[key] for key in terms})
+
+
+def _merge_top(best: dict, candidates: dict, k: int) -> dict:
+    """Top-k nach |Einfluss| entlang Achse 0 aus bisherigen und neuen Kandidaten."""
+    merged = {key: np.concatenate([best[key], candidates[key]]) for key in best}
+    if len(merged["abs"]) > k:
+        keep = np.argpartition(-merged["abs"], k - 1, axis=0)[:k]
+        merged = {key: np.take_along_axis(value, keep, axis=0) for key, value in merged.items()}
+    return merged
+
+
+def groupings(df: pd.DataFrame, design: StudyDesign) -> dict[str, tuple[np.ndarray, list[str]]]:
+    """Gesamt und je Demografie-Faktor: (Stufenindex je Person, Labels)."""
+    result = {OVERALL: (np.zeros(len(df), int), [OVERALL])}
+    for column, codebook in design.demographics.items():
+        result[column] = (codebook.index(df[column]), codebook.labels)
+    return result
+
+
+def influence(net: np.ndarray, strata: dict, pairs: np.ndarray, participant: np.ndarray,
+              top_k: int = TOP_K, alpha: float = ALPHA, chunk: int = CHUNK_ROWS) -> dict:
+    """
+    Zwei Durchgänge über die Personen in Chunks: (1) Summen je Stratum, (2) Einfluss
+    ohne Person i, Jackknife-Momente, Kipp-Zählung, Top-k je Statistik und
+    Einflusswert je Person (mittleres quadriertes standardisiertes Einfluss­maß, Gesamt).
+    """
+    n = len(net)
+    chunks = [slice(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+    totals = {name: None for name in strata}
+    for part in chunks:
+        terms = participant_terms(net[part], pairs)
+        for name, (level, labels) in strata.items():
+            add = level_totals(terms, level[part], len(labels))
+            totals[name] = add if totals[name] is None else \
+                {key: totals[name][key] + add[key] for key in add}
+
+    result = {}
+    for name, (level, labels) in strata.items():
+        values, p = statistics(totals[name])
+        shape = values.shape                                             # (L, B, P + 2)
+        result[name] = {"n": totals[name]["n"], "values": values, "p": p,
+                        "sum": np.zeros(shape), "sum2": np.zeros(shape),
+                        "flips": np.zeros(shape, int),
+                        "top": [{"abs": np.empty((0, *shape[1:])),
+                                 "id": np.empty((0, *shape[1:]), participant.dtype),
+                                 "delta": np.empty((0, *shape[1:])),
+                                 "p": np.empty((0, *shape[1:]))} for _ in labels]}
+
+    # Durchgang 2a: Einfluss, Momente, Kippen, Top-k
+    for part in chunks:
+        terms = participant_terms(net[part], pairs)
+        for name, (level, labels) in strata.items():
+            res, lv = result[name], level[part]
+            inside = lv >= 0
+            own = lv[inside]
+            loo, loo_p = leave_one_out(totals[name], {key: value[inside]
+                                                      for key, value in terms.items()}, own)
+            delta = loo - res["values"][own]
+            flip = (loo_p < alpha) != (res["p"][own] < alpha)
+            onehot = (own[None, :] == np.arange(len(labels))[:, None]).astype(float)
+            flat = delta.reshape(len(own), -1)
+            res["sum"] += (onehot @ np.nan_to_num(flat)).reshape(res["sum"].shape)
+            res["sum2"] += (onehot @ np.nan_to_num(flat) ** 2).reshape(res["sum"].shape)
+            res["flips"] += (onehot @ flip.reshape(len(own), -1)).astype(int) \
+                .reshape(res["flips"].shape)
+            ids = participant[part][inside]
+            for l in range(len(labels)):
+                rows = own == l
+                if not rows.any():
+                    continue
+                cand = {"abs": np.nan_to_num(np.abs(delta[rows]), nan=-1.0),
+                        "id": np.broadcast_to(ids[rows][:, None, None], delta[rows].shape),
+                        "delta": delta[rows], "p": loo_p[rows]}
+                if rows.sum() > top_k:
+                    keep = np.argpartition(-cand["abs"], top_k - 1, axis=0)[:top_k]
+                    cand = {key: np.take_along_axis(v, keep, axis=0) for key, v in cand.items()}
+                res["top"][l] = _merge_top(res["top"][l], cand, top_k)
+
+    for res in result.values():
+        m = res["n"][:, None, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            res["se"] = np.sqrt((m - 1) / m * (res["sum2"] - res["sum"] ** 2 / m))
+
+    # Durchgang 2b: Einflusswert je Person über alle Gesamt-Statistiken
+    se = result[OVERALL]["se"][0]
+    score = np.zeros(n)
+    for part in chunks:
+        terms = participant_terms(net[part], pairs)
+        own = np.zeros(part.stop - part.start, int)
+        loo, _ = leave_one_out(totals[OVERALL], terms, own)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (loo - result[OVERALL]["values"][0]) / se
+        score[part] = np.nanmean((z ** 2).reshape(len(own), -1), axis=1)
+    result["score"] = score
+    return result
+
+
+def _labels(design: StudyDesign, pairs: np.ndarray):
+    """Je Statistikspalte: (Name, Kontrast, System, System B)."""
+    names = [("delta_net", f"{design.systems[a]} vs {design.systems[b]}",
+              design.systems[a], design.systems[b]) for a, b in pairs]
+    return names + [("friedman_chi2", None, None, None), ("kendalls_w", None, None, None)]
+
+
+def influence_tables(result: dict, strata: dict, design: StudyDesign,
+                     pairs: np.ndarray) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Rangliste der Top-k-Einflüsse aller Statistiken und Übersicht je Statistik."""
+    columns = _labels(design, pairs)
+    ranked, summary = [], []
+    for name, (_, labels) in strata.items():
+        res = result[name]
+        for l, label in enumerate(labels):
+            if res["n"][l] < MIN_N:
+                continue
+            stratum = None if name == OVERALL else stratum_label(name, label)
+            for b, (emotion, congruence) in enumerate(design.block_labels):
+                for j, (statistic, contrast, system, system_b) in enumerate(columns):
+                    fields = {"Stratum": stratum, "Statistik": statistic, "Emotion": emotion,
+                              "Kongruenz": congruence, "Kontrast": contrast, "System": system,
+                              "System_B": system_b}
+                    value, p, se = res["values"][l, b, j], res["p"][l, b, j], res["se"][l, b, j]
+                    summary.append({**fields, "N": int(res["n"][l]), "Wert": value, "p": p,
+                                    "Jackknife_SE": se, "Kippend": int(res["flips"][l, b, j])})
+                    top = res["top"][l]
+                    for r in range(len(top["abs"])):
+                        delta = top["delta"][r, b, j]
+                        ranked.append({**fields, "Teilnehmer": int(top["id"][r, b, j]),
+                                       "Wert": value, "Wert_ohne": value + delta,
+                                       "Einfluss": delta,
+                                       "Einfluss_std": delta / se if se > 0 else np.nan,
+                                       "p": p, "p_ohne": top["p"][r, b, j],
+                                       "Kippt": (p < ALPHA) != (top["p"][r, b, j] < ALPHA)})
+    ranked = pd.DataFrame(ranked)
+    ranked = ranked.reindex(ranked["Einfluss_std"].abs().sort_values(ascending=False).index)
+    return ranked.reset_index(drop=True), pd.DataFrame(summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leave-one-out-Einfluss je Teilnehmer")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    design = load_design()
+    df, best, worst = load_survey(DATA_PATH, design)
+    run = ResultStore().run("jackknife_influence", inputs=[DATA_PATH],
+                            params={"top_k": args.top_k, "alpha": ALPHA, "min_n": MIN_N,
+                                    "p": "paired_t / chi2_asymptotic"})
+    net = design.net_scores(best, worst)
+    pairs = np.array(list(combinations(range(design.n_systems), 2)))
+    strata = groupings(df, design)
+
+    result = influence(net, strata, pairs, df.index.to_numpy(), top_k=args.top_k)
+    ranked, summary = influence_tables(result, strata, design, pairs)
+    participants = (pd.DataFrame({"Teilnehmer": df.index, "Einflusswert": result["score"]})
+                    .sort_values("Einflusswert", ascending=False, ignore_index=True))
+    participants.insert(0, "Rang", np.arange(1, len(participants) + 1))
+
+    overall = summary[summary["Stratum"].isna()]
+    fragile = overall[(overall["Kippend"] > 0) & (overall["Statistik"] != "kendalls_w")]
+    print(f"Jackknife über {len(net)} Teilnehmer, {len(summary)} Statistiken "
+          f"({len(overall)} gesamt, Rest je Demografie-Stufe)")
+    print("Signifikanz hier genähert: gepaarter t-Test (Δ Net) und asymptotisches χ² "
+          "(Friedman); die Auswertungsskripte entscheiden per BCa-Bootstrap bzw. "
+          "Monte-Carlo-p – „Kippend“ bezieht sich auf diese Näherung.")
+    print(f"\nGesamt: Statistiken, deren genäherte Signifikanz (α = {ALPHA}) beim Weglassen "
+          f"einzelner Personen kippt: {len(fragile)}")
+    for r in fragile.itertuples():
+        label = r.Kontrast or r.Statistik
+        print(f"  {r.Emotion:<10} {r.Kongruenz:<12} {label:<26} Wert = {r.Wert:+.3f}, "
+              f"p = {r.p:.4f}, SE_jack = {r.Jackknife_SE:.3f}, {r.Kippend} Personen")
+    print("\nEinflussreichste Teilnehmende (mittleres quadriertes std. Einflussmaß):")
+    print(participants.head(TOP_PARTICIPANTS).round(3).to_string(index=False))
+
+    ranked.to_csv(OUTPUT_PATH, index=False)
+    participants.to_csv(PARTICIPANT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH} und {PARTICIPANT_PATH}.")
+
+    stored = summary.rename(columns={"Statistik": "item", "N": "n", "Emotion": "emotion",
+                                     "Kongruenz": "congruence", "System": "system",
+                                     "System_B": "system_b", "Stratum": "stratum",
+                                     "Kontrast": "contrast"})
+    fields = ["item", "n", "emotion", "congruence", "system", "system_b", "stratum", "contrast"]
+    run.add_frame(stored[fields].assign(value=summary["Jackknife_SE"]), statistic="jackknife_se")
+    run.add_frame(stored[fields].assign(value=summary["Kippend"]), statistic="jackknife_flips")
+    run.save()
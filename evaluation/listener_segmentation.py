@@ -0,0 +1,315 @@
+# -----------------------------------------------------------
+# Hörer-Segmentierung nach BWS-Präferenzprofil
+#   • Profil = Net-Scores Emotion × Kongruenz (8) × System (4) je Person
+#   • Export einmal chunkweise geprüft → kompakter int8-Cache (memory-mapped),
+#     alle weiteren Durchgänge streamen Chunks daraus → Speicher beschränkt
+#   • Mini-Batch-k-Means (partial_fit) auf den Profilen, Silhouette auf Stichprobe
+#   • Latent-Class-Best/Worst-MNL per EM: E-Schritt je Chunk, M-Schritt auf
+#     klassengewichteten Zählern (Block, Best, Worst) mit fit_utilities
+#   • Modellwahl über k (BIC bzw. Silhouette), Segment × Demografie (χ², Cramérs V)
+# -----------------------------------------------------------
+
+import argparse
+from pathlib import Path
+from textwrap import indent
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.special import logsumexp
+from scipy.stats import chi2_contingency
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+from adaptive_design import PRIOR_SD, _choice_moments, fit_utilities
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, validate_survey
+
+# ---------- Konfiguration ----------
+CACHE_PATH = Path("listener_segmentation_cache.bin")
+OUTPUT_PATH = Path("listener_segmentation_results.csv")
+K_RANGE = range(2, 7)
+CHUNK_ROWS = 100_000         # Zeilen je gestreamtem Chunk
+BATCH_SIZE = 2_048           # Mini-Batch für k-Means
+KMEANS_EPOCHS, KMEANS_TOL = 20, 1e-4
+EM_MAX_ITER, EM_TOL = 300, 1e-6          # Toleranz: Log-Likelihood-Änderung je Person
+SUBSAMPLE = 50_000           # Personen für die EM-Startwerte (danach volle Durchgänge)
+SILHOUETTE_SAMPLE = 5_000
+ALPHA = 0.05
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def build_cache(path: Path, design: StudyDesign, cache: Path = CACHE_PATH,
+                chunk_rows: int = CHUNK_ROWS) -> np.memmap:
+    """
+    Export chunkweise prüfen und als int8-Matrix [best | worst | Demografie-Stufe]
+    ablegen (−1 = fehlend). Dubletten werden nur innerhalb eines Chunks erkannt.
+    """
+    n = 0
+    with open(cache, "wb") as out:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            clean, _ = validate_survey(chunk, design)
+            best, worst = design.choice_arrays(clean)
+            levels = [codebook.index(clean[col]) for col, codebook in design.demographics.items()]
+            out.write(np.column_stack([best, worst, *levels]).astype(np.int8).tobytes())
+            n += len(clean)
+    width = 2 * design.n_questions + len(design.demographics)
+    return np.memmap(cache, np.int8, "r", shape=(n, width))
+
+
+def iter_chunks(cache: np.ndarray, design: StudyDesign, rows: int = CHUNK_ROWS):
+    """(best, worst, Demografie-Stufen) je Chunk des Caches."""
+    q = design.n_questions
+    for start in range(0, len(cache), rows):
+        part = np.asarray(cache[start:start + rows], dtype=np.int64)
+        yield part[:, :q], part[:, q:2 * q], part[:, 2 * q:]
+
+
+def profiles(design: StudyDesign, best: np.ndarray, worst: np.ndarray) -> np.ndarray:
+    """Net-Score-Profil (n, Blöcke · Systeme) als Float-Matrix für k-Means."""
+    return design.net_scores(best, worst).reshape(len(best), -1).astype(float)
+
+
+def answer_matrix(design: StudyDesign, best: np.ndarray, worst: np.ndarray) -> sparse.csr_matrix:
+    """Zähler je Person über (Block, Best, Worst): dünn (n, Blöcke · k · k)."""
+    k = design.n_systems
+    valid = (best >= 0) & (worst >= 0) & (best != worst)
+    rows = np.broadcast_to(np.arange(len(best))[:, None], best.shape)[valid]
+    block = np.broadcast_to(design.question_block, best.shape)[valid]
+    cols = (block * k + best[valid]) * k + worst[valid]
+    return sparse.csr_matrix((np.ones(len(cols)), (rows, cols)),
+                             shape=(len(best), design.n_blocks * k * k))
+
+
+def fit_kmeans(cache: np.ndarray, design: StudyDesign, k: int,
+               epochs: int = KMEANS_EPOCHS, seed: int = SEED) -> MiniBatchKMeans:
+    """Mini-Batch-k-Means über alle Chunks; Abbruch, wenn sich die Zentren kaum bewegen."""
+    model = MiniBatchKMeans(n_clusters=k, batch_size=BATCH_SIZE, random_state=seed, n_init=3)
+    rng = np.random.default_rng(seed)
+    previous = None
+    for _ in range(epochs):
+        for best, worst, _ in iter_chunks(cache, design):
+            x = profiles(design, best, worst)
+            for batch in np.array_split(rng.permutation(len(x)), -(-len(x) // BATCH_SIZE)):
+                model.partial_fit(x[batch])
+        centers = model.cluster_centers_.copy()
+        if previous is not None and np.abs(centers - previous).max() < KMEANS_TOL:
+            break
+        previous = centers
+    return model
+
+
+def evaluate_kmeans(model: MiniBatchKMeans, cache: np.ndarray, design: StudyDesign,
+                    sample: int = SILHOUETTE_SAMPLE, seed: int = SEED) -> tuple[float, float]:
+    """Inertia (gestreamt) und Silhouette auf einer Zufallsstichprobe der Personen."""
+    inertia = sum(-model.score(profiles(design, best, worst))
+                  for best, worst, _ in iter_chunks(cache, design))
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(cache), size=min(sample, len(cache)), replace=False))
+    q = design.n_questions
+    part = np.asarray(cache[rows], dtype=np.int64)
+    x = profiles(design, part[:, :q], part[:, q:2 * q])
+    labels = model.predict(x)
+    if not 1 < len(np.unique(labels)) < len(x):
+        return float(inertia), np.nan
+    return float(inertia), float(silhouette_score(x, labels))
+
+
+class LatentClassMNL:
+    """
+    Latent-Class-Best/Worst-MNL: je Klasse Nutzen (Blöcke, Systeme) wie in
+    adaptive_design, Klassenanteile π. EM mit gestreamten Suffizienzstatistiken.
+    """
+
+    def __init__(self, design: StudyDesign, n_classes: int, prior_sd: float = PRIOR_SD):
+        self.design = design
+        self.n_classes = n_classes
+        self.k = design.n_systems
+        self.subsets = np.arange(self.k)[None, :]                   # alle Systeme gezeigt
+        self.prior_precision = np.eye(self.k) / prior_sd ** 2
+        self.beta = np.zeros((n_classes, design.n_blocks, self.k))
+        self.weights = np.full(n_classes, 1 / n_classes)
+        self.loglik = -np.inf
+        self.n = 0
+        self.n_iter = 0
+
+    @property
+    def n_params(self) -> int:
+        return self.n_classes - 1 + self.n_classes * self.design.n_blocks * (self.k - 1)
+
+    @property
+    def bic(self) -> float:
+        return -2 * self.loglik + self.n_params * np.log(self.n)
+
+    def log_probs(self) -> np.ndarray:
+        """log P(Best = i, Worst = j | Block, Klasse) als (Klassen, Blöcke · k · k)."""
+        p, q = _choice_moments(self.beta.reshape(-1, self.k), self.subsets)
+        with np.errstate(divide="ignore"):
+            logp = np.log(p[:, 0, :, None]) + np.log(q[:, 0])
+        return np.where(np.isfinite(logp), logp, 0).reshape(self.n_classes, -1)
+
+    def posterior(self, answers: sparse.csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+        """Klassen-Posterior (n, Klassen) und Log-Likelihood je Person."""
+        joint = answers @ self.log_probs().T + np.log(self.weights)
+        marginal = logsumexp(joint, axis=1)
+        return np.exp(joint - marginal[:, None]), marginal
+
+    def fit(self, cache: np.ndarray, initial=None, max_iter: int = EM_MAX_ITER,
+            tol: float = EM_TOL, subsample: int = SUBSAMPLE,
+            seed: int = SEED) -> "LatentClassMNL":
+        """
+        EM über gestreamte Chunks, je Iteration ein Durchgang über den Cache.
+        initial(best, worst) → Start-Zuordnungen (n, Klassen), z. B. aus k-Means;
+        ohne initial starten die aktuellen Parameter. Bei mehr als `subsample`
+        Personen liefert ein EM auf einer Zufallsauswahl die Startwerte.
+        """
+        if len(cache) > subsample:
+            rows = np.sort(np.random.default_rng(seed).choice(len(cache), subsample,
+                                                              replace=False))
+            self.fit(np.asarray(cache[rows]), initial, max_iter, tol, subsample, seed)
+            initial = None
+
+        shape = (self.n_classes, self.design.n_blocks, self.k, self.k)
+        self.loglik = -np.inf
+        for iteration in range(max_iter + 1):
+            from_initial = iteration == 0 and initial is not None
+            counts = np.zeros(shape)
+            mass = np.zeros(self.n_classes)
+            loglik, n = (-np.inf if from_initial else 0.0), 0
+            for best, worst, _ in iter_chunks(cache, self.design):
+                answers = answer_matrix(self.design, best, worst)
+                if from_initial:
+                    resp = initial(best, worst)
+                else:
+                    resp, ll = self.posterior(answers)
+                    loglik += ll.sum()
+                counts += (answers.T @ resp).T.reshape(shape)
+                mass += resp.sum(axis=0)
+                n += len(best)
+            # Abbruch vor dem M-Schritt: loglik gehört zu den aktuellen Parametern
+            if loglik - self.loglik < tol * n:
+                self.loglik = loglik
+                break
+            self.loglik, self.n, self.n_iter = loglik, n, iteration
+            self.weights = np.maximum(mass, 1e-12) / mass.sum()
+            beta, _ = fit_utilities(counts.reshape(-1, 1, self.k, self.k), self.subsets,
+                                    self.prior_precision, self.beta.reshape(-1, self.k))
+            self.beta = beta.reshape(self.beta.shape)
+        # Klassen nach Größe ordnen → stabile Segmentnummern
+        order = np.argsort(-self.weights)
+        self.weights, self.beta = self.weights[order], self.beta[order]
+        return self
+
+    def predict(self, best: np.ndarray, worst: np.ndarray) -> np.ndarray:
+        return self.posterior(answer_matrix(self.design, best, worst))[0].argmax(axis=1)
+
+
+def segment_summary(cache: np.ndarray, design: StudyDesign, assign, n_segments: int):
+    """
+    Ein Durchgang: Segmentgrößen, mittleres Net-Score-Profil je Segment
+    (Segmente, Blöcke, Systeme) und Kreuztabellen Segment × Demografie-Stufe.
+    """
+    size = np.zeros(n_segments)
+    profile_sum = np.zeros((n_segments, design.n_blocks * design.n_systems))
+    tables = {col: np.zeros((n_segments, len(codebook.codes)), int)
+              for col, codebook in design.demographics.items()}
+    for best, worst, levels in iter_chunks(cache, design):
+        labels = assign(best, worst)
+        size += np.bincount(labels, minlength=n_segments)
+        profile_sum += np.eye(n_segments)[labels].T @ profiles(design, best, worst)
+        for d, (col, table) in enumerate(tables.items()):
+            known = levels[:, d] >= 0
+            flat = labels[known] * table.shape[1] + levels[known, d]
+            table += np.bincount(flat, minlength=table.size).reshape(table.shape)
+    with np.errstate(invalid="ignore"):
+        mean_profile = profile_sum / size[:, None]
+    return size, mean_profile.reshape(n_segments, design.n_blocks, design.n_systems), tables
+
+
+def crosstab_test(table: np.ndarray) -> tuple[float, float, float]:
+    """χ²-Unabhängigkeitstest (leere Zeilen/Spalten entfernt) und Cramérs V."""
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    if min(table.shape) < 2:
+        return np.nan, np.nan, np.nan
+    chi2, p, _, _ = chi2_contingency(table, correction=False)
+    return chi2, p, np.sqrt(chi2 / (table.sum() * (min(table.shape) - 1)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hörer-Segmentierung nach BWS-Profil")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--k", type=int, nargs="+", default=list(K_RANGE),
+                        help="zu vergleichende Segmentanzahlen")
+    args = parser.parse_args()
+
+    design = load_design()
+    cache = build_cache(args.data, design)
+    n = len(cache)
+    run = ResultStore().run("listener_segmentation", inputs=[args.data], seed=SEED,
+                            params={"k": args.k, "prior_sd": PRIOR_SD,
+                                    "kmeans_epochs": KMEANS_EPOCHS, "em_max_iter": EM_MAX_ITER})
+    print(f"Segmentierung von {n} Teilnehmenden (Cache {CACHE_PATH}, "
+          f"{cache.nbytes / 1e6:.1f} MB)\n")
+
+    # ---------- Modellwahl über k ----------
+    rows, kmeans_models, lc_models = [], {}, {}
+    for k in args.k:
+        km = fit_kmeans(cache, design, k)
+        inertia, silhouette = evaluate_kmeans(km, cache, design)
+        one_hot = np.eye(k)
+        lc = LatentClassMNL(design, k).fit(
+            cache, lambda best, worst: one_hot[km.predict(profiles(design, best, worst))])
+        kmeans_models[k], lc_models[k] = km, lc
+        rows.append({"k": k, "Inertia": inertia, "Silhouette": silhouette,
+                     "LogLik": lc.loglik, "Parameter": lc.n_params, "BIC": lc.bic,
+                     "EM_Iterationen": lc.n_iter})
+        print(f"  k = {k}: Silhouette = {silhouette:.3f}, Inertia = {inertia:.1f} | "
+              f"Latent Class: LL = {lc.loglik:.1f}, BIC = {lc.bic:.1f} ({lc.n_iter} EM-Schritte)")
+
+    selection = pd.DataFrame(rows)
+    selection.insert(0, "N", n)
+    selection.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nModellwahl gespeichert in {OUTPUT_PATH}.")
+    run.add_frame(selection.rename(columns={"BIC": "value", "N": "n"})
+                  .assign(item=[f"k={k}" for k in selection["k"]])[["value", "n", "item"]],
+                  statistic="segment_bic")
+    run.add_frame(selection.rename(columns={"Silhouette": "value", "N": "n"})
+                  .assign(item=[f"k={k}" for k in selection["k"]])[["value", "n", "item"]],
+                  statistic="segment_silhouette")
+
+    # ---------- gewählte Modelle: Profile und Demografie ----------
+    k_lc = int(selection.loc[selection["BIC"].idxmin(), "k"])
+    silhouettes = selection["Silhouette"].fillna(-np.inf)
+    k_km = int(selection.loc[silhouettes.idxmax(), "k"])
+    chosen = {"Latent Class": (k_lc, lc_models[k_lc].predict),
+              "k-Means": (k_km, lambda best, worst: kmeans_models[k_km].predict(
+                  profiles(design, best, worst)))}
+
+    for method, (k, assign) in chosen.items():
+        size, mean_profile, tables = segment_summary(cache, design, assign, k)
+        print(f"\n{method}, k = {k}:")
+        for s in range(k):
+            stratum = f"{method} Segment {s + 1}"
+            overall = np.nan_to_num(mean_profile[s]).sum(axis=0)
+            print(f"  Segment {s + 1} ({size[s] / n:6.1%}): "
+                  + ", ".join(f"{design.systems[i]} {overall[i]:+.2f}"
+                              for i in np.argsort(-overall)))
+            run.add("segment_share", size[s] / n, n=int(size[s]), stratum=stratum)
+            for b, (emotion, congruence) in enumerate(design.block_labels):
+                for i, system in enumerate(design.systems):
+                    run.add("segment_net_score", mean_profile[s, b, i], n=int(size[s]),
+                            stratum=stratum, emotion=emotion, congruence=congruence,
+                            system=system)
+
+        for col, table in tables.items():
+            chi2, p, v = crosstab_test(table)
+            star = " *" if p < ALPHA else ""
+            print(f"  × {col:<18} χ² = {chi2:7.2f}, p = {p:.4f}, Cramérs V = {v:.3f}{star}")
+            crosstab = pd.DataFrame(table, index=[f"Segment {s + 1}" for s in range(k)],
+                                    columns=design.demographics[col].labels)
+            print(indent(crosstab.to_string(), " " * 6))
+            run.add("segment_demographics", v, p_value=p, n=int(table.sum()),
+                    item=col, stratum=method)
+    run.save()
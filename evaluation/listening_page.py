@@ -0,0 +1,212 @@
+# -----------------------------------------------------------
+# Hörseite (index.html) aus Korpusindex und Studiendesign
+#   • eine Zeile je Satz, eine Spalte je System (inkl. Systemen nur im Korpus)
+#   • Player erst beim Klick (preload="none"), keine Metadaten-Anfragen vorab
+#   • optionale Opus/OGG-Fassungen neben den WAVs (ffmpeg), WAV als Fallback
+#   • CSS inline, kein externes Stylesheet → offline lauffähig
+# -----------------------------------------------------------
+
+import argparse
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from pathlib import Path
+
+import pandas as pd
+
+from audio_corpus import SAMPLES_DIR, index_corpus
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = SAMPLES_DIR.parent / "index.html"
+TITLE = "Evaluation Audio Samples"
+FOOTER = "&copy; 2025 Widerhold"
+DISPLAY_NAMES = {"emosphere": "EmoSphere"}      # Systeme, die nicht im Studiendesign stehen
+OPUS_BITRATE = "48k"
+
+STYLE = """
+      :root { color-scheme: light dark; --border: #ccc; --head: #eee; --accent: #0d47a1; }
+      @media (prefers-color-scheme: dark) {
+        :root { --border: #555; --head: #2a2a2a; --accent: #90caf9; }
+      }
+      body { font-family: system-ui, sans-serif; line-height: 1.5; margin: 0 auto;
+             max-width: 80rem; padding: 0 1rem; }
+      header, footer { text-align: center; }
+      table { width: 100%; border-collapse: collapse; }
+      th, td { padding: 0.5em; border: 1px solid var(--border); text-align: center; }
+      th { background-color: var(--head); position: sticky; top: 0; }
+      td.sentence { text-align: left; }
+      button.play { font: inherit; padding: 0.3em 0.9em; cursor: pointer;
+                    border: 1px solid var(--accent); border-radius: 4px;
+                    background: none; color: var(--accent); }
+      audio { width: 100%; min-width: 10rem; }
+      .missing { color: #888; }
+      td.fallback { border-style: dashed; }
+      td.fallback small { display: block; color: #b26a00; }
+      @media (max-width: 40rem) { td, th { padding: 0.25em; font-size: 0.9em; } }"""
+
+# Ersetzt den Knopf beim ersten Klick durch einen Player; nur ein Player spielt gleichzeitig
+SCRIPT = """
+      document.addEventListener("click", function (event) {
+        var button = event.target.closest("button.play");
+        if (!button) return;
+        var audio = document.createElement("audio");
+        audio.controls = true;
+        audio.preload = "none";
+        if (button.dataset.ogg) {
+          var ogg = document.createElement("source");
+          ogg.src = button.dataset.ogg;
+          ogg.type = "audio/ogg; codecs=opus";
+          audio.appendChild(ogg);
+        }
+        var wav = document.createElement("source");
+        wav.src = button.dataset.wav;
+        wav.type = "audio/wav";
+        audio.appendChild(wav);
+        audio.addEventListener("play", function () {
+          document.querySelectorAll("audio").forEach(function (other) {
+            if (other !== audio) other.pause();
+          });
+        });
+        button.replaceWith(audio);
+        audio.play();
+      });"""
+
+
+# ---------- Hilfsfunktionen ----------
+def encode_opus(corpus: pd.DataFrame, bitrate: str = OPUS_BITRATE) -> int:
+    """Legt <name>.ogg neben jede WAV, falls fehlend oder älter. Gibt Anzahl neuer Dateien zurück."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print("ffmpeg nicht gefunden – keine OGG-Fassungen erzeugt.")
+        return 0
+    todo = [Path(p) for p in corpus["path"]
+            if not Path(p).with_suffix(".ogg").exists()
+            or Path(p).with_suffix(".ogg").stat().st_mtime < Path(p).stat().st_mtime]
+
+    def encode(wav: Path) -> None:
+        subprocess.run([ffmpeg, "-loglevel", "error", "-y", "-i", str(wav), "-c:a", "libopus",
+                        "-b:a", bitrate, str(wav.with_suffix(".ogg"))], check=True)
+
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(encode, todo))
+    return len(todo)
+
+
+def target_emotions(design: StudyDesign) -> pd.Series:
+    """Zielemotion (klein geschrieben wie im Korpus) je Satznummer laut Design."""
+    return pd.Series([design.emotions[t].lower() for t in design.question_target],
+                     index=design.question_sample)
+
+
+def clip_grid(corpus: pd.DataFrame, design: StudyDesign) -> pd.DataFrame:
+    """
+    Eine Datei je (Satz, System): bevorzugt der Clip mit der Zielemotion des
+    Designs, sonst der einzige Clip zu diesem Satz (in render_page markiert,
+    siehe clip_emotions). Fehlende Zellen → NaN.
+    """
+    target = target_emotions(design)
+    corpus = corpus.assign(
+        matches=corpus["target_emotion"].astype(str).to_numpy()
+        == target.reindex(corpus["sample"]).to_numpy())
+    best = (corpus.sort_values("matches", ascending=False)
+                  .drop_duplicates(["sample", "prefix"]))
+    grid = best.pivot(index="sample", columns="prefix", values="path")
+    return grid.reindex(index=design.question_sample,
+                        columns=[p for p in corpus["prefix"].cat.categories
+                                 if p in grid.columns])
+
+
+def clip_emotions(grid: pd.DataFrame, corpus: pd.DataFrame) -> pd.DataFrame:
+    """Tatsächliche Zielemotion des gewählten Clips je Zelle von clip_grid (NaN ohne Clip)."""
+    emotion_of = dict(zip(corpus["path"], corpus["target_emotion"].astype(str)))
+    return grid.apply(lambda clips: clips.map(emotion_of))
+
+
+def render_page(grid: pd.DataFrame, design: StudyDesign, output: Path = OUTPUT_PATH,
+                emotions: pd.DataFrame | None = None) -> str:
+    """
+    HTML der Hörseite. Mit `emotions` (siehe clip_emotions) werden Fallback-Clips,
+    deren Zielemotion nicht der des Designs entspricht, als td.fallback markiert.
+    """
+    base = Path(output).resolve().parent
+    names = dict(zip(design.sample_prefixes, design.systems)) | DISPLAY_NAMES
+    target = target_emotions(design)
+
+    def cell(path, actual, expected) -> str:
+        if pd.isna(path):
+            return '<td class="missing">–</td>'
+        fallback = isinstance(actual, str) and actual != expected
+        title = escape(f"Clip target emotion: {actual} (design: {expected})")
+        td = f'<td class="fallback" title="{title}">' if fallback else "<td>"
+        label = f"<small>{escape(actual)}</small>" if fallback else ""
+        wav = Path(path)
+        src = Path(os.path.relpath(wav, base)).as_posix()
+        ogg = wav.with_suffix(".ogg")
+        ogg_attr = (f' data-ogg="{escape(Path(os.path.relpath(ogg, base)).as_posix())}"'
+                    if ogg.exists() else "")
+        return (f'{td}<button class="play" type="button" data-wav="{escape(src)}"{ogg_attr}>'
+                f'▶ Play</button><noscript><a href="{escape(src)}">WAV</a></noscript>{label}</td>')
+
+    header = "".join(f"<th>{escape(names.get(p, p))}</th>" for p in grid.columns)
+    texts = dict(zip(design.question_sample.tolist(), design.question_text))
+    rows = []
+    for sample, clips in grid.iterrows():
+        actual = emotions.loc[sample] if emotions is not None else [None] * len(clips)
+        cells = "".join(cell(path, emotion, target.get(sample))
+                        for path, emotion in zip(clips, actual))
+        rows.append(f'          <tr><td>{sample}</td><td class="sentence">'
+                    f'{escape(texts.get(sample, ""))}</td>{cells}</tr>')
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{TITLE}</title>
+    <style>{STYLE}
+    </style>
+  </head>
+  <body>
+    <header>
+      <h1>{TITLE}</h1>
+    </header>
+    <main>
+      <table>
+        <thead>
+          <tr><th>No.</th><th>Sentence</th>{header}</tr>
+        </thead>
+        <tbody>
+{chr(10).join(rows)}
+        </tbody>
+      </table>
+    </main>
+    <footer>
+      <p>{FOOTER}</p>
+    </footer>
+    <script>{SCRIPT}
+    </script>
+  </body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Erzeugt die Hörseite aus dem Korpus")
+    parser.add_argument("--ogg", action="store_true", help="Opus/OGG-Fassungen mit ffmpeg erzeugen")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    design = load_design()
+    corpus = index_corpus(design=design)
+    if args.ogg:
+        print(f"{encode_opus(corpus)} OGG-Dateien erzeugt.")
+
+    grid = clip_grid(corpus, design)
+    emotions = clip_emotions(grid, corpus)
+    args.output.write_text(render_page(grid, design, args.output, emotions), encoding="utf-8")
+    fallback = (emotions.notna() & emotions.ne(target_emotions(design), axis=0)).sum().sum()
+    print(f"{grid.notna().sum().sum()} Clips in {len(grid)} Zeilen × {grid.shape[1]} Systemen "
+          f"({fallback} mit abweichender Zielemotion) → {args.output}")
@@ -5,6 +5,7 @@
 #   • Outcome       : best  (1 = System wurde als „best“ gewählt)
 # -----------------------------------------------------------
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from statsmodels.genmod.generalized_estimating_equations import GEE
@@ -12,48 +13,36 @@ from statsmodels.genmod.families import Binomial
 from statsmodels.genmod.cov_struct import Exchangeable
 from statsmodels.stats.multitest import multipletests
 
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import load_survey
+
 # ---------- Einstellungen ----------
 DATA_PATH = Path("Survey_Entries.csv")
 
-voice_labels = {1: "CosyVoice", 2: "EmoSpeech", 3: "EmoKnob", 4: "EmotiVoice"}
-emotion_groups = {
-    "Happy":     ["Q1", "Q2", "Q3", "Q4", "Q5", "Q6"],
-    "Sad":       ["Q7", "Q8", "Q9", "Q10", "Q11", "Q12"],
-    "Angry":     ["Q13", "Q14", "Q15", "Q16", "Q17", "Q18"],
-    "Surprised": ["Q19", "Q20", "Q21", "Q22", "Q23", "Q24"]
-}
+design = load_design()
 
-# Mapping Alterscode → Label
-age_map = {1: "<30", 2: "30-44", 3: "45-59", 4: ">60"}
+voice_labels = design.voice_labels
+emotion_groups = {emotion: design.questions_for(emotion) for emotion in design.emotions}
 
-# ---------- Daten einlesen und splitten ----------
-df_raw = pd.read_csv(DATA_PATH)
+age_map = design.demographics["Altersgruppe"].mapping
 
-for q in [c for c in df_raw.columns if c.startswith("Q") and "_best" not in c]:
-    df_raw[f"{q}_best"]  = df_raw[q].str.split(",", n=1).str[0].astype(int)
-    df_raw[f"{q}_worst"] = df_raw[q].str.split(",", n=1).str[1].astype(int)
+# ---------- Daten einlesen und splitten ----------
+df_raw, best, _ = load_survey(DATA_PATH, design)
+run = ResultStore().run("gee_altersgruppe", inputs=[DATA_PATH])
 
 # ---------- Long-Format: jede Entscheidung = 1 Zeile ----------
-rows = []
-for pid, row in df_raw.iterrows():
-    age_label = age_map.get(row["Altersgruppe"])
-    if age_label is None:           # unbekannter Code
-        continue
-    for emotion, qs in emotion_groups.items():
-        for q in qs:
-            best_sys = row[f"{q}_best"]
-            for sys_id, sys_name in voice_labels.items():
-                rows.append(
-                    {
-                        "Participant":  pid,
-                        "Altersgruppe": age_label,
-                        "Emotion":      emotion,
-                        "System":       sys_name,
-                        "best":         int(best_sys == sys_id)
-                    }
-                )
-
-long_df = pd.DataFrame(rows)
+codes = df_raw["Altersgruppe"].to_numpy()
+keep = pd.Series(codes).isin(age_map).to_numpy()
+n_keep, n_q, k = int(keep.sum()), design.n_questions, design.n_systems
+
+long_df = pd.DataFrame({
+    "Participant": np.repeat(df_raw.index[keep], n_q * k),
+    "Altersgruppe": np.repeat(pd.Series(codes[keep]).map(age_map).to_numpy(), n_q * k),
+    "Emotion":     np.tile(np.repeat(np.array(design.emotions)[design.question_emotion], k), n_keep),
+    "System":      np.tile(design.systems, n_keep * n_q),
+    "best":        (best[keep][:, :, None] == np.arange(k)).astype(int).ravel(),
+})
 
 # ---------- Modell-Loop ----------
 results = []
@@ -90,6 +79,13 @@ res_df = pd.DataFrame(results,
                       columns=["Emotion", "System", "Contrast",
                                "β", "p_raw", "CI_low", "CI_high"])
 
+# ---------- Ergebnisspeicher ----------
+stored = res_df.rename(columns={"Emotion": "emotion", "System": "system", "Contrast": "item",
+                                "β": "value", "p_raw": "p_value", "CI_low": "ci_low",
+                                "CI_high": "ci_high"})
+run.add_frame(stored.drop(columns="p_adj", errors="ignore"), statistic="beta")
+run.save()
+
 if not res_df.empty:
     res_df["p_adj"] = multipletests(res_df["p_raw"], method="holm")[1]
 
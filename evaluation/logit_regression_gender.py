@@ -13,43 +13,37 @@ from statsmodels.genmod.families import Binomial
 from statsmodels.genmod.cov_struct import Exchangeable
 from statsmodels.stats.multitest import multipletests
 
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import load_survey
+
 # ---------- Einstellungen ----------
 DATA_PATH = Path("Survey_Entries.csv")
 
-voice_labels = {1: "CosyVoice", 2: "EmoSpeech", 3: "EmoKnob", 4: "EmotiVoice"}
-emotion_groups = {
-    "Happy":     ["Q1","Q2","Q3","Q4","Q5","Q6"],
-    "Sad":       ["Q7","Q8","Q9","Q10","Q11","Q12"],
-    "Angry":     ["Q13","Q14","Q15","Q16","Q17","Q18"],
-    "Surprised": ["Q19","Q20","Q21","Q22","Q23","Q24"]
-}
-gender_map = {1: "Male", 2: "Female"}   # Diverse wird ignoriert
+design = load_design()
 
-# ---------- Daten einlesen & splitten ----------
-df_raw = pd.read_csv(DATA_PATH)
+voice_labels = design.voice_labels
+emotion_groups = {emotion: design.questions_for(emotion) for emotion in design.emotions}
+
+gender_map = {c: l for c, l in design.demographics["Geschlecht"].mapping.items()
+              if c in (1, 2)}   # Diverse wird ignoriert
 
-for q in [c for c in df_raw.columns if c.startswith("Q") and "_best" not in c]:
-    df_raw[f"{q}_best"]  = df_raw[q].str.split(",", n=1).str[0].astype(int)
-    df_raw[f"{q}_worst"] = df_raw[q].str.split(",", n=1).str[1].astype(int)
+# ---------- Daten einlesen & splitten ----------
+df_raw, best, _ = load_survey(DATA_PATH, design)
+run = ResultStore().run("gee_geschlecht", inputs=[DATA_PATH])
 
 # ---------- Long-Format (jede Entscheidung = 1 Zeile) ----------
-rows = []
-for pid, row in df_raw.iterrows():
-    gender = gender_map.get(row["Geschlecht"])
-    if gender is None:        # Diverse / missing
-        continue
-    for emotion, qs in emotion_groups.items():
-        for q in qs:
-            best_sys = row[f"{q}_best"]
-            for sys_id, sys_name in voice_labels.items():
-                rows.append({
-                    "Participant": pid,
-                    "Geschlecht":  gender,
-                    "Emotion":     emotion,
-                    "System":      sys_name,
-                    "best":        int(best_sys == sys_id)
-                })
-long_df = pd.DataFrame(rows)
+codes = df_raw["Geschlecht"].to_numpy()
+keep = pd.Series(codes).isin(gender_map).to_numpy()
+n_keep, n_q, k = int(keep.sum()), design.n_questions, design.n_systems
+
+long_df = pd.DataFrame({
+    "Participant": np.repeat(df_raw.index[keep], n_q * k),
+    "Geschlecht":  np.repeat(pd.Series(codes[keep]).map(gender_map).to_numpy(), n_q * k),
+    "Emotion":     np.tile(np.repeat(np.array(design.emotions)[design.question_emotion], k), n_keep),
+    "System":      np.tile(design.systems, n_keep * n_q),
+    "best":        (best[keep][:, :, None] == np.arange(k)).astype(int).ravel(),
+})
 
 # ---------- Modell-Loop ----------
 results, skip_counter = [], 0
@@ -80,13 +74,20 @@ for emotion in emotion_groups:
         pval   = gee_res.pvalues[pname]
         ci_low, ci_high = gee_res.conf_int().loc[pname]
 
-        results.append([emotion, sys, coef, pval, ci_low, ci_high])
+        results.append([emotion, sys, pname, coef, pval, ci_low, ci_high])
 
 # ---------- Multiple-Test-Korrektur ----------
 res_df = pd.DataFrame(results,
-                      columns=["Emotion","System","β","p_raw","CI_low","CI_high"])
+                      columns=["Emotion","System","Contrast","β","p_raw","CI_low","CI_high"])
 res_df["p_adj"] = multipletests(res_df["p_raw"], method="holm")[1]
 
+# ---------- Ergebnisspeicher ----------
+stored = res_df.rename(columns={"Emotion": "emotion", "System": "system", "Contrast": "item",
+                                "β": "value", "p_raw": "p_value", "CI_low": "ci_low",
+                                "CI_high": "ci_high"})
+run.add_frame(stored.drop(columns="p_adj", errors="ignore"), statistic="beta")
+run.save()
+
 # ---------- Ausgaben ----------
 print(f"\nTests insgesamt durchgeführt: {len(res_df)}")
 print(f"Kombinationen übersprungen (nur ein Geschlecht präsent): {skip_counter}\n")
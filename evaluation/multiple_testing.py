@@ -0,0 +1,155 @@
+# -----------------------------------------------------------
+# Mehrfachkorrektur über alle Auswertungsstufen
+#   • p-Werte aller Stufen aus dem Ergebnisspeicher → benannte Testfamilien
+#   • Holm, Hochberg, Benjamini–Hochberg, Benjamini–Yekutieli
+#   • alle Familien (oder global) in einem vektorisierten Durchgang
+#   • adjustierte p-Werte werden in den Speicher zurückgeschrieben
+# -----------------------------------------------------------
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from result_store import SCHEMA, ResultStore, latest_mask
+
+# ---------- Konfiguration ----------
+METHODS = ("holm", "hochberg", "bh", "by", "bonferroni")
+DEFAULT_METHOD = "holm"
+DEFAULT_FAMILY = ("stage", "test")       # eine Familie je Stufe und Testart
+ALPHA = 0.05
+
+# Statistiken, die gemeinsam eine Testart bilden (Chi² bzw. Fisher je nach Zellbesetzung)
+TEST_OF_STATISTIC = {"fisher": "chi2"}
+
+# Nicht in Familien aufgenommen: Voraussetzungsprüfungen, bereits adjustierte
+# Post-hoc-p-Werte (Dunn/Bonferroni, friedman_posthoc.py je Zelle) und die
+# beiden einseitigen TOST-Teiltests
+EXCLUDED_STATISTICS = {"shapiro", "levene", "dunn", "posthoc_nemenyi", "posthoc_conover",
+                       "posthoc_wilcoxon", "tost_low", "tost_high"}
+
+
+# ---------- Hilfsfunktionen ----------
+def _segmented_cummax(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Kumulatives Maximum je Gruppe; values ∈ [0, 1], groups aufsteigend sortiert."""
+    offset = 2.0 * groups
+    return np.maximum.accumulate(values + offset) - offset
+
+
+def _segmented_reverse_cummin(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Kumulatives Minimum je Gruppe von hinten; values ∈ [0, 1], groups aufsteigend."""
+    rev_groups = groups[-1] - groups[::-1]
+    return -_segmented_cummax(-values[::-1], rev_groups)[::-1]
+
+
+def adjust_pvalues(p, families=None, method: str = DEFAULT_METHOD) -> np.ndarray:
+    """
+    Adjustiert p-Werte je Familie in einem Durchgang (ein lexsort über alle).
+
+    families: Familienkennung je p-Wert (beliebige Labels), None = eine Familie.
+    NaN-p-Werte bleiben NaN und zählen nicht zur Familiengröße.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unbekannte Methode '{method}', erlaubt: {METHODS}")
+    p = np.asarray(p, dtype=float)
+    out = np.full(p.shape, np.nan)
+    valid = ~np.isnan(p)
+    if not valid.any():
+        return out
+
+    if families is None:
+        groups = np.zeros(valid.sum(), dtype=np.int64)
+    else:
+        groups = np.unique(np.asarray(families)[valid], return_inverse=True)[1].ravel()
+    pv = p[valid]
+
+    order = np.lexsort((pv, groups))
+    ps, gs = pv[order], groups[order]
+    sizes = np.bincount(gs)
+    start = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank = np.arange(len(ps)) - start[gs] + 1        # Rang innerhalb der Familie, 1…m
+    m = sizes[gs]
+
+    if method == "bonferroni":
+        adj = np.minimum(m * ps, 1.0)
+    elif method == "holm":
+        adj = _segmented_cummax(np.minimum((m - rank + 1) * ps, 1.0), gs)
+    elif method == "hochberg":
+        adj = _segmented_reverse_cummin(np.minimum((m - rank + 1) * ps, 1.0), gs)
+    else:
+        factor = m / rank
+        if method == "by":
+            harmonic = np.cumsum(1.0 / np.arange(1, sizes.max() + 1))
+            factor = factor * harmonic[m - 1]
+        adj = _segmented_reverse_cummin(np.minimum(factor * ps, 1.0), gs)
+
+    result = np.empty_like(adj)
+    result[order] = adj
+    out[valid] = result
+    return out
+
+
+def family_labels(frame: pd.DataFrame, by=DEFAULT_FAMILY) -> pd.Series:
+    """Familienname je Zeile aus den Spalten in by; 'test' = Statistik mit TEST_OF_STATISTIC."""
+    if not by:
+        return pd.Series("global", index=frame.index)
+    parts = []
+    for col in by:
+        if col == "test":
+            parts.append(frame["statistic"].replace(TEST_OF_STATISTIC))
+        else:
+            parts.append(frame[col].fillna("").astype(str))
+    label = parts[0].astype(str)
+    for part in parts[1:]:
+        label = label + "/" + part.astype(str)
+    return label
+
+
+def adjust_store(store: ResultStore, method: str = DEFAULT_METHOD, by=DEFAULT_FAMILY,
+                 stages=None) -> pd.DataFrame:
+    """
+    Sammelt alle p-Werte der jüngsten Läufe, adjustiert je Familie (by=() → global)
+    und schreibt family, p_adjusted und adjust_method in den Speicher zurück.
+    Gibt die adjustierten Zeilen zurück.
+    """
+    table = store.table()
+    frame = table.to_pandas()
+    eligible = (latest_mask(table)
+                & frame["p_value"].notna().to_numpy()
+                & ~frame["statistic"].isin(EXCLUDED_STATISTICS).to_numpy())
+    if stages is not None:
+        eligible &= frame["stage"].isin(list(stages)).to_numpy()
+
+    families = family_labels(frame[eligible], by)
+    frame.loc[eligible, "family"] = families
+    frame.loc[eligible, "p_adjusted"] = adjust_pvalues(frame.loc[eligible, "p_value"],
+                                                       families.to_numpy(), method)
+    frame.loc[eligible, "adjust_method"] = method
+    store.replace(pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False))
+    return frame[eligible].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mehrfachkorrektur über den Ergebnisspeicher")
+    parser.add_argument("--method", choices=METHODS, default=DEFAULT_METHOD)
+    parser.add_argument("--by", nargs="*", default=list(DEFAULT_FAMILY),
+                        help="Spalten, die eine Familie bilden ('test' = Testart)")
+    parser.add_argument("--global", dest="global_family", action="store_true",
+                        help="alle p-Werte als eine Familie")
+    parser.add_argument("--stages", nargs="*", default=None)
+    args = parser.parse_args()
+
+    store = ResultStore()
+    adjusted = adjust_store(store, method=args.method,
+                            by=() if args.global_family else tuple(args.by),
+                            stages=args.stages)
+    if adjusted.empty:
+        print(f"Keine p-Werte in {store.root}.")
+    else:
+        summary = (adjusted.assign(significant=adjusted["p_adjusted"] < ALPHA)
+                           .groupby("family")
+                           .agg(m=("p_value", "size"), significant=("significant", "sum"),
+                                min_p_adjusted=("p_adjusted", "min")))
+        print(f"{len(adjusted)} Hypothesen in {len(summary)} Familien ({args.method}):")
+        print(summary.to_string())
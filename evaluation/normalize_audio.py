@@ -0,0 +1,196 @@
+# -----------------------------------------------------------
+# Normalisierung der Hörproben auf ein kanonisches Format
+#   • Polyphasen-Resampling auf eine Zielrate, Mono, PCM16
+#   • Lautheit nach ITU-R BS.1770 (K-Filter, Gating) → Ziel-LUFS,
+#     Sample-Peak-Obergrenze gegen Clipping
+#   • Prozesspool; Cache je (Quell-Hash, Zielparameter) in manifest.json,
+#     nach jeder fertigen Datei gesichert; unveränderte Dateien werden nicht
+#     erneut konvertiert, fehlerhafte Dateien einzeln gemeldet
+# -----------------------------------------------------------
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+from scipy.io import wavfile
+from scipy.signal import lfilter, resample_poly
+
+from audio_corpus import SAMPLES_DIR, index_corpus, payload, to_float
+from result_store import ResultStore, input_hash
+
+# ---------- Konfiguration ----------
+OUTPUT_DIR = SAMPLES_DIR.with_name(SAMPLES_DIR.name + "-normalized")
+MANIFEST_NAME = "manifest.json"
+
+TARGET_RATE = 16000          # niedrigste Rate im Korpus → gleiche Bandbreite für alle Systeme
+TARGET_LUFS = -23.0          # EBU R128
+PEAK_CEILING_DB = -1.0
+PARAMS = {"sample_rate": TARGET_RATE, "lufs": TARGET_LUFS, "peak_db": PEAK_CEILING_DB,
+          "dtype": "int16", "channels": 1, "k_filter": "bs1770"}
+
+BLOCK_S, STEP_S = 0.4, 0.1   # BS.1770-Gating: 400-ms-Blöcke, 75 % Überlappung
+ABS_GATE, REL_GATE = -70.0, -10.0
+
+
+# ---------- Hilfsfunktionen ----------
+def k_weighting(fs: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Biquads des BS.1770-K-Filters für beliebige Abtastraten: Vorfilter
+    (High-Shelf ≈ +4 dB um 1,68 kHz) und RLB-Hochpass (≈ 38 Hz), Parameter so
+    gewählt, dass bei 48 kHz die Koeffizienten der Norm herauskommen.
+    """
+    # Stufe 1: Vorfilter (High-Shelf)
+    gain, fc, q = 3.999843853973347, 1681.974450955533, 0.7071752369554196
+    k = np.tan(np.pi * fc / fs)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k ** 2
+    shelf_b = np.array([vh + vb * k / q + k ** 2, 2 * (k ** 2 - vh), vh - vb * k / q + k ** 2]) / a0
+    shelf_a = np.array([a0, 2 * (k ** 2 - 1), 1 - k / q + k ** 2]) / a0
+    # Stufe 2: RLB-Hochpass
+    fc, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * fc / fs)
+    a0 = 1 + k / q + k ** 2
+    hp_b = np.array([1.0, -2.0, 1.0])
+    hp_a = np.array([a0, 2 * (k ** 2 - 1), 1 - k / q + k ** 2]) / a0
+    return [(shelf_b, shelf_a), (hp_b, hp_a)]
+
+
+def integrated_loudness(signal: np.ndarray, fs: int) -> float:
+    """Integrierte Lautheit (LUFS) eines Mono-Signals mit absolutem und relativem Gate."""
+    x = np.asarray(signal, dtype=np.float64)
+    for b, a in k_weighting(fs):
+        x = lfilter(b, a, x)
+    block, step = int(round(BLOCK_S * fs)), int(round(STEP_S * fs))
+    if len(x) < block:                                   # kürzer als ein Block → ein Block
+        block = step = max(len(x), 1)
+
+    # Blockenergien über kumulative Summe statt Schleife
+    energy = np.concatenate([[0.0], np.cumsum(x ** 2)])
+    starts = np.arange(0, len(x) - block + 1, step)
+    z = (energy[starts + block] - energy[starts]) / block
+    loudness = -0.691 + 10 * np.log10(np.maximum(z, 1e-20))
+
+    gated = z[loudness > ABS_GATE]
+    if gated.size == 0:
+        return -np.inf
+    threshold = -0.691 + 10 * np.log10(gated.mean()) + REL_GATE
+    gated = z[(loudness > ABS_GATE) & (loudness > threshold)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def cache_key(source_hash: str, params: dict = PARAMS) -> str:
+    return hashlib.sha256((source_hash + json.dumps(params, sort_keys=True)).encode()).hexdigest()
+
+
+def normalize_file(entry: dict, output: str, params: dict = PARAMS) -> dict:
+    """Konvertiert eine Korpusdatei (Zeile aus index_corpus als dict) nach output."""
+    samples = to_float(payload(entry))
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+
+    ratio = Fraction(params["sample_rate"], int(entry["sample_rate"]))
+    if ratio != 1:
+        samples = resample_poly(samples, ratio.numerator, ratio.denominator)
+
+    lufs_in = integrated_loudness(samples, params["sample_rate"])
+    gain_db = params["lufs"] - lufs_in if np.isfinite(lufs_in) else 0.0
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    if peak > 0:                                          # Peak-Obergrenze hat Vorrang
+        gain_db = min(gain_db, params["peak_db"] - 20 * np.log10(peak))
+    out = samples * 10 ** (gain_db / 20)
+    pcm = np.clip(np.round(out * 32767), -32768, 32767).astype(np.int16)
+
+    output = Path(output)
+    tmp = output.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        wavfile.write(fh, params["sample_rate"], pcm)
+    tmp.replace(output)
+    # Stille bzw. komplett weggegatete Clips haben keine Lautheit (−∞): kein Ziel-Gain,
+    # also auch keine Peak-Begrenzung; im Manifest als null statt −Infinity
+    silent = not np.isfinite(lufs_in)
+    lufs_out = integrated_loudness(pcm / 32768.0, params["sample_rate"])
+    return {"lufs_in": None if silent else lufs_in, "gain_db": float(gain_db),
+            "lufs_out": lufs_out if np.isfinite(lufs_out) else None,
+            "limited": not silent and bool(gain_db < params["lufs"] - lufs_in),
+            "silent": silent}
+
+
+def _write_manifest(path: Path, manifest: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    tmp.replace(path)
+
+
+def normalize_corpus(output_dir: Path = OUTPUT_DIR, params: dict = PARAMS,
+                     workers: int | None = None) -> tuple[dict, int, dict[str, str]]:
+    """
+    Konvertiert alle Korpusdateien, deren (Quell-Hash, Parameter) noch nicht im
+    Manifest stehen. Das Manifest wird nach jeder fertigen Datei geschrieben;
+    eine fehlerhafte Datei bricht den Lauf nicht ab. Gibt (Manifest, Anzahl neu
+    konvertierter Dateien, Fehlermeldung je Datei) zurück.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    corpus = index_corpus()
+    todo = []
+    for entry in corpus.to_dict("records"):
+        name = Path(entry["path"]).name
+        key = cache_key(input_hash([entry["path"]]), params)
+        cached = manifest.get(name)
+        if cached and cached["key"] == key and (output_dir / name).exists():
+            continue
+        todo.append((name, key, entry))
+
+    failed = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(normalize_file, entry, str(output_dir / name), params):
+                   (name, key, entry) for name, key, entry in todo}
+        for future in as_completed(futures):
+            name, key, entry = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:                     # Datei überspringen, Rest behalten
+                failed[name] = f"{type(exc).__name__}: {exc}"
+                manifest.pop(name, None)
+                continue
+            manifest[name] = {"key": key, "system": str(entry["system"]),
+                              "source_rate": int(entry["sample_rate"]), **result}
+            _write_manifest(manifest_path, manifest)
+
+    # Einträge zu gelöschten Quelldateien entfernen
+    current = {Path(p).name for p in corpus["path"]}
+    for name in set(manifest) - current:
+        manifest.pop(name)
+        (output_dir / name).unlink(missing_ok=True)
+
+    _write_manifest(manifest_path, manifest)
+    return manifest, len(todo) - len(failed), failed
+
+
+if __name__ == "__main__":
+    run = ResultStore().run("normalize_audio", params=PARAMS)
+    manifest, converted, failed = normalize_corpus()
+    print(f"{converted} von {len(manifest)} Dateien konvertiert → {OUTPUT_DIR}")
+    for name, error in sorted(failed.items()):
+        print(f"  Fehler bei {name}: {error}")
+
+    limited = sorted(name for name, m in manifest.items() if m["limited"])
+    if limited:
+        print(f"Peak-Obergrenze aktiv (Ziel-LUFS nicht erreicht): {', '.join(limited)}")
+    silent = sorted(name for name, m in manifest.items() if m.get("silent"))
+    if silent:
+        print(f"Warnung: still bzw. unter dem Gate, nicht normalisiert: {', '.join(silent)}")
+
+    for name, m in sorted(manifest.items()):
+        if not m.get("silent"):
+            run.add("loudness_lufs", m["lufs_in"], item=name, system=m["system"])
+        run.add("gain_db", m["gain_db"], item=name, system=m["system"])
+    run.save()
@@ -0,0 +1,286 @@
+# -----------------------------------------------------------
+# Exakte Permutationstests für Realismus-Gruppenunterschiede
+#   • Kruskal–Wallis (alle Stufen eines Faktors), Mann–Whitney (jedes Paar),
+#     Wilcoxon-Vorzeichen-Rang gegen die Skalenmitte
+#   • alles aus Häufigkeiten je Gruppe × Likert-Kategorie: Ränge sind
+#     Mittelränge der Kategorien, Bindungen sind damit automatisch exakt
+#   • Rangsummentests: DP über die Gruppen, Zustand = verbleibende
+#     Kategorienhäufigkeiten, Statistik als exakter Ganzzahlschlüssel;
+#     zu großer Zustandsraum → Monte-Carlo über hypergeometrische Tabellen
+#     (Aufwand unabhängig von der Teilnehmerzahl)
+#   • Vorzeichen-Rang: Faltung der Binomialverteilungen je |Differenz|-Kategorie
+# -----------------------------------------------------------
+
+from itertools import combinations
+from math import lcm
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.special import gammaln
+
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("permutation_tests_results.csv")
+MAX_PAIRS = 5_000_000          # max. (Zustand, Zeile)-Paare je DP-Schritt, sonst Monte-Carlo
+MAX_SUPPORT = 5_000_000        # max. Träger der Vorzeichen-Rang-Verteilung
+MC_REPS = 100_000
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def category_table(values: np.ndarray, group: np.ndarray, n_groups: int,
+                   scale: tuple[int, int]) -> np.ndarray:
+    """Häufigkeiten (Gruppen, Kategorien); group = −1 und Werte außerhalb der Skala fallen weg."""
+    low, high = scale
+    n_cat = high - low + 1
+    finite = np.isfinite(values)
+    category = np.full(len(values), -1)
+    category[finite] = np.rint(values[finite]).astype(int) - low
+    keep = (group >= 0) & (category >= 0) & (category < n_cat)
+    return np.bincount(group[keep] * n_cat + category[keep],
+                       minlength=n_groups * n_cat).reshape(n_groups, n_cat)
+
+
+def twice_midranks(totals: np.ndarray) -> np.ndarray:
+    """2 × Mittelrang je Kategorie (ganzzahlig): 2·(Anzahl darunter) + Anzahl + 1."""
+    below = np.concatenate([[0], np.cumsum(totals)[:-1]])
+    return 2 * below + totals + 1
+
+
+def _count_compositions(n: int, caps: np.ndarray) -> float:
+    """Anzahl der Zeilen x ≥ 0 mit Σ x = n, x ≤ caps (Koeffizient von tⁿ in Π Σ_{i≤cap} tⁱ)."""
+    count = np.zeros(n + 1)
+    count[0] = 1
+    for cap in caps:
+        cumulative = np.cumsum(count)
+        count = cumulative - np.concatenate([np.zeros(min(cap, n) + 1),
+                                             cumulative[:n - min(cap, n)]])
+    return count[n]
+
+
+def _compositions(n: int, caps: np.ndarray) -> np.ndarray:
+    """Alle Zeilen x ≥ 0 mit Σ x = n und x ≤ caps: (M, Kategorien)."""
+    room = np.concatenate([np.cumsum(caps[::-1])[::-1][1:], [0]])   # Kapazität danach
+    rows, used = np.zeros((1, 0), int), np.zeros(1, int)
+    for c, cap in enumerate(caps):
+        # nur Werte, nach denen Σ = n noch erreichbar ist
+        lo = np.maximum(0, n - used - room[c])
+        hi = np.minimum(cap, n - used)
+        length = hi - lo + 1
+        parent = np.repeat(np.arange(len(rows)), length)
+        x = lo[parent] + np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+        rows, used = np.column_stack([rows[parent], x]), used[parent] + x
+    return rows
+
+
+def _log_comb(n: np.ndarray, k: np.ndarray) -> np.ndarray:
+    return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
+
+def _merge(keys: tuple[np.ndarray, ...], prob: np.ndarray):
+    """Gleiche Schlüsseltupel zusammenfassen, Wahrscheinlichkeiten addieren."""
+    order = np.lexsort(keys[::-1])
+    sorted_keys = [k[order] for k in keys]
+    new = np.ones(len(order), bool)
+    new[1:] = np.any([np.diff(k) != 0 for k in sorted_keys], axis=0)
+    start = np.flatnonzero(new)
+    return tuple(k[start] for k in sorted_keys), np.add.reduceat(prob[order], start)
+
+
+def rank_sum_key(table: np.ndarray) -> np.ndarray | None:
+    """
+    Gewichte je Gruppe für den Ganzzahlschlüssel S = Σ_g (2·R_g)² · L/n_g
+    (L = kgV der Gruppengrößen); S ist monoton in H bzw. |U − E[U]|.
+    None, wenn L nicht in int64 passt (große, teilerfremde Gruppen).
+    """
+    n = table.sum(axis=1)
+    multiple = lcm(*n.tolist())
+    if multiple >= 2 ** 62:
+        return None
+    return multiple // n
+
+
+def exact_rank_sum_distribution(table: np.ndarray, max_pairs: int = MAX_PAIRS):
+    """
+    Exakte Nullverteilung von S über alle Tabellen mit festen Rändern
+    (multivariat hypergeometrisch): DP über die Gruppen, kleinste zuerst, die
+    größte ergibt sich aus dem Rest. (Werte, Wahrscheinlichkeiten) oder None,
+    wenn der Zustandsraum max_pairs überschreitet oder S nicht in int64 passt.
+    """
+    n, totals = table.sum(axis=1), table.sum(axis=0)
+    ranks = twice_midranks(totals)
+    weight = rank_sum_key(table)
+    if weight is None or ((float(ranks.max()) * n) ** 2 * weight).sum() >= 2.0 ** 62:
+        return None
+    strides = np.concatenate([[1], np.cumprod(totals[::-1] + 1)[:-1]])[::-1]
+
+    states, keys, prob = totals[None, :], np.zeros(1, np.int64), np.ones(1)
+    order = np.argsort(n, kind="stable")
+    for g in order[:-1]:
+        if len(states) * _count_compositions(int(n[g]), totals) > max_pairs:
+            return None
+        rows = _compositions(int(n[g]), totals)
+        s, r = np.nonzero((rows[None] <= states[:, None]).all(axis=-1))
+        before, x = states[s], rows[r]
+        log_p = (_log_comb(before, x).sum(axis=1)
+                 - _log_comb(before.sum(axis=1), n[g]))
+        keys = keys[s] + (x @ ranks) ** 2 * weight[g]
+        (code, keys), prob = _merge(((before - x) @ strides, keys), prob[s] * np.exp(log_p))
+        states = code[:, None] // strides % (totals + 1)
+    last = order[-1]
+    keys = keys + (states @ ranks) ** 2 * weight[last]
+    (values,), prob = _merge((keys,), prob)
+    return values, prob
+
+
+def random_tables(totals: np.ndarray, sizes: np.ndarray, reps: int,
+                  rng: np.random.Generator) -> np.ndarray:
+    """
+    Zufällige Tabellen (reps, Gruppen, Kategorien) mit festen Rändern: je Gruppe
+    und Kategorie eine vektorisierte hypergeometrische Ziehung.
+    """
+    n_groups, n_cat = len(sizes), len(totals)
+    remaining = np.broadcast_to(totals, (reps, n_cat)).copy()
+    tables = np.zeros((reps, n_groups, n_cat), np.int64)
+    for g in range(n_groups - 1):
+        need = np.full(reps, sizes[g])
+        for c in range(n_cat - 1):
+            rest = remaining[:, c + 1:].sum(axis=1)
+            x = rng.hypergeometric(remaining[:, c], rest, need)
+            tables[:, g, c] = x
+            need -= x
+        tables[:, g, -1] = need
+        remaining -= tables[:, g]
+    tables[:, -1] = remaining
+    return tables
+
+
+def rank_sum_test(table: np.ndarray, reps: int = MC_REPS, rng: np.random.Generator | None = None,
+                  max_pairs: int = MAX_PAIRS) -> dict:
+    """
+    Kruskal–Wallis-H (bindungskorrigiert wie scipy.stats.kruskal), für zwei
+    Gruppen zusätzlich Mann–Whitney-U der ersten Gruppe; p exakt oder Monte-Carlo.
+    Leere Gruppen werden entfernt.
+    """
+    table = table[table.sum(axis=1) > 0]
+    n, totals = table.sum(axis=1), table.sum(axis=0)
+    total = int(n.sum())
+    ranks = twice_midranks(totals)
+    observed = ((table @ ranks).astype(float) ** 2 / n).sum()      # Σ (2·R_g)² / n_g
+
+    tie = 1 - (totals ** 3 - totals).sum() / (total ** 3 - total)
+    h = (12 / (total * (total + 1)) * observed / 4 - 3 * (total + 1)) / tie
+    result = {"H": h, "df": len(n) - 1, "N": total}
+    if len(n) == 2:
+        result["U"] = table[0] @ ranks / 2 - n[0] * (n[0] + 1) / 2
+
+    exact = exact_rank_sum_distribution(table, max_pairs)
+    if exact is not None:
+        values, prob = exact
+        weight = rank_sum_key(table)
+        key = sum(int(r) ** 2 * int(w) for r, w in zip(table @ ranks, weight))
+        result.update(p=min(1.0, prob[values >= key].sum()), method="exakt")
+    else:
+        rng = rng or np.random.default_rng(SEED)
+        sums = random_tables(totals, n, reps, rng) @ ranks
+        sampled = (sums.astype(float) ** 2 / n).sum(axis=1)
+        hits = (sampled >= observed * (1 - 1e-12)).sum()
+        result.update(p=(hits + 1) / (reps + 1), method="Monte-Carlo")
+    return result
+
+
+def signed_rank_test(values: np.ndarray, mu: float, reps: int = MC_REPS,
+                     rng: np.random.Generator | None = None,
+                     max_support: int = MAX_SUPPORT) -> dict:
+    """
+    Wilcoxon-Vorzeichen-Rang gegen mu (Nullen verworfen, zero_method="wilcox"),
+    W = min(W+, W−) wie scipy. Unter H0 ist die Zahl positiver Vorzeichen je
+    |Differenz|-Kategorie Binomial(m, ½) → Verteilung von 2·W+ per Faltung
+    (dünn besetzt: nur erreichbare Werte, höchstens Π (m + 1)).
+    """
+    diff = values[np.isfinite(values)] - mu
+    diff = diff[diff != 0]
+    magnitude, counts = np.unique(np.abs(diff), return_counts=True)
+    positive = np.bincount(np.searchsorted(magnitude, np.abs(diff[diff > 0])),
+                           minlength=len(magnitude))
+    ranks = twice_midranks(counts)
+    twice_w = int(positive @ ranks)
+    twice_total = int(counts @ ranks)
+    deviation = abs(2 * twice_w - twice_total)          # |2·(2W+) − 2·E[2W+]|
+    result = {"W": min(twice_w, twice_total - twice_w) / 2, "N": int(counts.sum())}
+
+    if np.prod(counts + 1.0) <= max_support:
+        support, dist = np.zeros(1, np.int64), np.ones(1)
+        for m, r in zip(counts, ranks):
+            k = np.arange(m + 1)
+            (support,), dist = _merge(((support[:, None] + k * r).ravel(),),
+                                      (dist[:, None] * stats.binom.pmf(k, m, 0.5)).ravel())
+        result.update(p=min(1.0, dist[np.abs(2 * support - twice_total) >= deviation].sum()),
+                      method="exakt")
+    else:
+        rng = rng or np.random.default_rng(SEED)
+        sampled = rng.binomial(counts, 0.5, (reps, len(counts))) @ ranks
+        hits = (np.abs(2 * sampled - twice_total) >= deviation).sum()
+        result.update(p=(hits + 1) / (reps + 1), method="Monte-Carlo")
+    return result
+
+
+if __name__ == "__main__":
+    design = load_design()
+    df, _, _ = load_survey(DATA_PATH, design)
+    run = ResultStore().run("permutation_tests", inputs=[DATA_PATH], seed=SEED,
+                            params={"mc_reps": MC_REPS, "max_pairs": MAX_PAIRS})
+    rng = np.random.default_rng(SEED)
+    realism = pd.to_numeric(df[design.realism_column], errors="coerce").to_numpy(float)
+    low, high = design.realism_scale
+    levels = np.arange(low, high + 1)
+
+    rows = []
+    for column, codebook in design.demographics.items():
+        group = codebook.index(df[column])
+        table = category_table(realism, group, len(codebook.labels), design.realism_scale)
+        present = np.flatnonzero(table.sum(axis=1) > 0)
+        samples = [np.repeat(levels, table[g]) for g in present]
+
+        omnibus = rank_sum_test(table, rng=rng)
+        asymptotic = stats.kruskal(*samples).pvalue
+        print(f"\n{column}: Kruskal–Wallis H({omnibus['df']}) = {omnibus['H']:.3f}, "
+              f"p = {omnibus['p']:.4f} ({omnibus['method']}), asymptotisch p = {asymptotic:.4f}")
+        rows.append({"Test": "kruskal_H", "Faktor": column, "Kontrast": None, "N": omnibus["N"],
+                     "Wert": omnibus["H"], "p": omnibus["p"], "p_asymptotisch": asymptotic,
+                     "Methode": omnibus["method"]})
+
+        for (i, a), (j, b) in combinations(zip(present, samples), 2):
+            pair = rank_sum_test(table[[i, j]], rng=rng)
+            asymptotic = stats.mannwhitneyu(a, b, alternative="two-sided").pvalue
+            contrast = f"{codebook.labels[i]} vs {codebook.labels[j]}"
+            print(f"  {contrast:<18} U = {pair['U']:6.1f}, p = {pair['p']:.4f} ({pair['method']}), "
+                  f"asymptotisch p = {asymptotic:.4f}")
+            rows.append({"Test": "mannwhitney_U", "Faktor": column, "Kontrast": contrast,
+                         "N": pair["N"], "Wert": pair["U"], "p": pair["p"],
+                         "p_asymptotisch": asymptotic, "Methode": pair["method"]})
+
+    mu = (low + high) / 2
+    signed = signed_rank_test(realism, mu, rng=rng)
+    asymptotic = stats.wilcoxon(realism[np.isfinite(realism)] - mu, zero_method="wilcox",
+                                correction=True).pvalue
+    print(f"\nWilcoxon gegen {mu:g}: W = {signed['W']:.1f}, p = {signed['p']:.4f} "
+          f"({signed['method']}), asymptotisch p = {asymptotic:.4f}")
+    rows.append({"Test": "wilcoxon_W", "Faktor": None, "Kontrast": f"vs {mu:g}", "N": signed["N"],
+                 "Wert": signed["W"], "p": signed["p"], "p_asymptotisch": asymptotic,
+                 "Methode": signed["method"]})
+
+    table = pd.DataFrame(rows)
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    for statistic, part in table.groupby("Test", sort=False):
+        run.add_frame(part.rename(columns={"Wert": "value", "p": "p_value", "N": "n",
+                                           "Faktor": "stratum", "Kontrast": "contrast"})
+                      [["value", "p_value", "n", "stratum", "contrast"]], statistic=statistic)
+    run.save()
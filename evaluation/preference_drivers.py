@@ -0,0 +1,207 @@
+# -----------------------------------------------------------
+# Akustische Treiber der BWS-Präferenzen
+#   • bws_long.csv × prosodic_features.parquet über Integer-Schlüssel
+#     (Systemindex, Satznummer, Zielemotion) → dichtes Lookup-Array
+#   • sequentielles Conditional Logit: Best aus 4, Worst aus den übrigen 3,
+#     gemeinsame Gewichte β auf z-standardisierten Merkmalen
+#   • Newton-Raphson über alle Auswahlmengen gleichzeitig, je Emotion + gesamt
+#   • Standardfehler cluster-robust, gekreuzt nach Teilnehmer und Frage
+#     (Cameron–Gelbach–Miller): alle hören dieselben Mengen, die Mengen sind
+#     also nicht unabhängig; Tests mit t(G − 1), G = kleinste Clusterzahl
+# -----------------------------------------------------------
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import t as t_dist
+
+from prosodic_features import OUTPUT_PATH as FEATURES_PATH
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+LONG_PATH = Path("bws_long.csv")
+OUTPUT_PATH = Path("preference_drivers_results.csv")
+DRIVERS = ["f0_mean", "f0_range_st", "rms_mean_db", "pause_ratio", "syllable_rate",
+           "spectral_centroid", "spectral_tilt", "duration_s"]
+ALPHA = 0.05
+MAX_ITER, TOL = 100, 1e-9
+
+
+# ---------- Hilfsfunktionen ----------
+def feature_lookup(features: pd.DataFrame, design: StudyDesign,
+                   drivers=DRIVERS) -> np.ndarray:
+    """
+    Dichtes Array F[System, Satz, Zielemotion, Merkmal] (z-standardisiert über
+    alle Clips der Designsysteme); fehlende Clips → NaN.
+    """
+    system = pd.Index(design.systems).get_indexer(features["system"].astype(str))
+    target = pd.Index([e.lower() for e in design.emotions]).get_indexer(
+        features["target_emotion"].astype(str))
+    keep = (system >= 0) & (target >= 0)
+    values = features.loc[keep, list(drivers)].to_numpy(float)
+    values = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+
+    sample = features["sample"].to_numpy()[keep]
+    lookup = np.full((design.n_systems, int(sample.max()) + 1, len(design.emotions),
+                      len(drivers)), np.nan)
+    lookup[system[keep], sample, target[keep]] = values
+    return lookup
+
+
+def choice_sets(long: pd.DataFrame, design: StudyDesign) -> pd.DataFrame:
+    """Eine Zeile je (Teilnehmer, Frage) mit Frage-, Best- und Worst-Index."""
+    question = pd.Index(design.question_ids).get_indexer(long["Item"])
+    system = pd.Index(design.systems).get_indexer(long["System"])
+    frame = pd.DataFrame({"participant": long["Teilnehmer"].to_numpy(), "question": question,
+                          "system": system, "choice": long["choice"].to_numpy()})
+    frame = frame[(frame["question"] >= 0) & (frame["system"] >= 0)]
+    sets = frame.pivot_table(index=["participant", "question"], columns="choice",
+                             values="system", aggfunc="first")
+    sets = sets.dropna().astype(int).rename(columns={1: "best", 0: "worst"})
+    return sets.reset_index()
+
+
+def fit_sequential_logit(x: np.ndarray, best: np.ndarray, worst: np.ndarray,
+                         max_iter: int = MAX_ITER, tol: float = TOL) -> dict:
+    """
+    Sequentielles Best/Worst-Conditional-Logit per Newton-Raphson.
+
+    x: (Mengen, Alternativen, Merkmale); Best ~ softmax(xβ) über alle,
+    Worst ~ softmax(−xβ) über die Alternativen ohne Best.
+    Gibt β, modellbasierte Kovarianz, Score-Beiträge je Menge (für
+    cluster-robuste Varianzen), Log-Likelihood und Iterationen zurück.
+    """
+    n, k, p = x.shape
+    rows = np.arange(n)
+    not_best = np.ones((n, k), bool)
+    not_best[rows, best] = False
+    observed = x[rows, best] - x[rows, worst]                  # Beitrag zum Gradienten
+
+    def moments(u: np.ndarray, mask: np.ndarray | None = None):
+        if mask is not None:
+            u = np.where(mask, u, -np.inf)
+        u = u - u.max(axis=1, keepdims=True)
+        w = np.exp(u)
+        log_norm = np.log(w.sum(axis=1))
+        w /= w.sum(axis=1, keepdims=True)
+        mean = np.einsum("nk,nkp->np", w, x)
+        second = np.einsum("nk,nkp,nkq->pq", w, x, x)
+        return u, log_norm, mean, second - mean.T @ mean
+
+    beta = np.zeros(p)
+    for iteration in range(1, max_iter + 1):
+        util = x @ beta
+        u_best, norm_best, mean_best, cov_best = moments(util)
+        u_worst, norm_worst, mean_worst, cov_worst = moments(-util, not_best)
+        grad = observed.sum(axis=0) - mean_best.sum(axis=0) + mean_worst.sum(axis=0)
+        info = cov_best + cov_worst
+        step = np.linalg.pinv(info, hermitian=True) @ grad
+        beta = beta + step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    util = x @ beta
+    u_best, norm_best, mean_best, cov_best = moments(util)
+    u_worst, norm_worst, mean_worst, cov_worst = moments(-util, not_best)
+    loglik = (u_best[rows, best] - norm_best).sum() + (u_worst[rows, worst] - norm_worst).sum()
+    return {"beta": beta, "cov": np.linalg.pinv(cov_best + cov_worst, hermitian=True),
+            "scores": observed - mean_best + mean_worst,
+            "loglik": float(loglik), "iterations": iteration}
+
+
+def _meat(scores: np.ndarray, cluster: np.ndarray) -> np.ndarray:
+    """Σ_g s_g s_gᵀ über Cluster-Summen der Scores, mit Faktor G/(G − 1)."""
+    _, codes = np.unique(cluster, return_inverse=True, axis=0)
+    sums = np.zeros((codes.max() + 1, scores.shape[1]))
+    np.add.at(sums, codes, scores)
+    g = len(sums)
+    return g / max(g - 1, 1) * sums.T @ sums
+
+
+def crossed_cluster_cov(fit: dict, participant: np.ndarray,
+                        item: np.ndarray) -> tuple[np.ndarray, int]:
+    """
+    Zweifach cluster-robuste Kovarianz (Teilnehmer × Frage) nach Cameron, Gelbach
+    & Miller (2011): V = B (M_T + M_F − M_{T∩F}) B mit B = modellbasierte Kovarianz.
+    Negative Eigenwerte werden auf 0 gesetzt. Gibt (Kovarianz, Freiheitsgrade
+    G − 1 der kleineren Clusterdimension) zurück.
+    """
+    scores = fit["scores"]
+    meat = (_meat(scores, participant) + _meat(scores, item)
+            - _meat(scores, np.column_stack([participant, item])))
+    bread = fit["cov"]
+    cov = bread @ meat @ bread
+    values, vectors = np.linalg.eigh((cov + cov.T) / 2)
+    cov = (vectors * np.clip(values, 0, None)) @ vectors.T
+    df = min(len(np.unique(participant)), len(np.unique(item))) - 1
+    return cov, df
+
+
+def driver_table(fit: dict, cov: np.ndarray, df: int, drivers=DRIVERS,
+                 alpha: float = ALPHA) -> pd.DataFrame:
+    se = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = fit["beta"] / se
+    q = t_dist.ppf(1 - alpha / 2, df)
+    return pd.DataFrame({"Merkmal": list(drivers), "beta": fit["beta"], "SE": se, "z": z,
+                         "p": 2 * t_dist.sf(np.abs(z), df),
+                         "CI_low": fit["beta"] - q * se, "CI_high": fit["beta"] + q * se})
+
+
+if __name__ == "__main__":
+    # ---------- Daten laden & verknüpfen ----------
+    design = load_design()
+    long = pd.read_csv(LONG_PATH)
+    features = pd.read_parquet(FEATURES_PATH)
+    run = ResultStore().run("preference_drivers", inputs=[LONG_PATH, FEATURES_PATH],
+                            params={"drivers": DRIVERS, "alpha": ALPHA})
+
+    lookup = feature_lookup(features, design)
+    sets = choice_sets(long, design)
+    q = sets["question"].to_numpy()
+    # (Mengen, Systeme, Merkmale): Clip jedes Systems zum Satz und zur Zielemotion der Frage
+    x = lookup[np.arange(design.n_systems)[None, :],
+               design.question_sample[q][:, None],
+               design.question_target[q][:, None]]
+    complete = ~np.isnan(x).any(axis=(1, 2))
+    if not complete.all():
+        print(f"{(~complete).sum()} Auswahlmengen ohne vollständige Merkmale ausgelassen.")
+    x, sets = x[complete], sets[complete].reset_index(drop=True)
+    emotion = design.question_emotion[sets["question"].to_numpy()]
+    participant, question = sets["participant"].to_numpy(), sets["question"].to_numpy()
+
+    # ---------- Schätzung je Emotion + gesamt ----------
+    tables = []
+    for label, mask in [("Gesamt", np.ones(len(sets), bool)),
+                        *[(e, emotion == i) for i, e in enumerate(design.emotions)]]:
+        fit = fit_sequential_logit(x[mask], sets["best"].to_numpy()[mask],
+                                   sets["worst"].to_numpy()[mask])
+        cov, df = crossed_cluster_cov(fit, participant[mask], question[mask])
+        table = driver_table(fit, cov, df)
+        table.insert(0, "Emotion", label)
+        table["N_Mengen"] = int(mask.sum())
+        table["N_Teilnehmende"] = len(np.unique(participant[mask]))
+        table["N_Fragen"] = len(np.unique(question[mask]))
+        table["df"] = df
+        table["LogLik"] = fit["loglik"]
+        tables.append(table)
+        print(f"\n{label}  |  N = {mask.sum()} Auswahlmengen "
+              f"({table['N_Teilnehmende'].iat[0]} Teilnehmende × {table['N_Fragen'].iat[0]} Fragen), "
+              f"LL = {fit['loglik']:.1f}, SE cluster-robust, t({df})")
+        for r in table.itertuples():
+            star = " *" if r.p < ALPHA else ""
+            print(f"  {r.Merkmal:<18} β = {r.beta:+.3f} (SE {r.SE:.3f}, p = {r.p:.4f}){star}")
+
+    results = pd.concat(tables, ignore_index=True)
+    results.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    # Merkmal als item, Emotion leer = gesamt
+    stored = results.rename(columns={"Merkmal": "item", "beta": "value", "p": "p_value",
+                                     "CI_low": "ci_low", "CI_high": "ci_high", "N_Mengen": "n"})
+    stored["emotion"] = stored["Emotion"].where(stored["Emotion"] != "Gesamt")
+    run.add_frame(stored[["item", "value", "p_value", "ci_low", "ci_high", "n", "emotion"]],
+                  statistic="clogit_beta")
+    run.save()
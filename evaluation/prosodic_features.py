@@ -0,0 +1,199 @@
+# -----------------------------------------------------------
+# Prosodische Merkmale der Hörproben
+#   • F0-Kontur (YIN über FFT-Autokorrelation), RMS-Energie,
+#     Pausenanteil, Sprechtempo-Proxy, spektraler Schwerpunkt & Tilt
+#   • alle Frames einer Datei auf einmal (sliding_window_view, Batch-FFT),
+#     keine Schleife über Frames; Dateien parallel im Prozesspool
+#   • Schlüssel (System, Satz, Textemotion, Kongruenz, Zielemotion),
+#     Cache als Parquet je (Quell-Hash, Parameter)
+# -----------------------------------------------------------
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import find_peaks, resample_poly
+
+from audio_corpus import index_corpus, payload, to_float
+from normalize_audio import cache_key
+from result_store import ResultStore, input_hash
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("prosodic_features.parquet")
+KEY_COLUMNS = ["system", "sample", "text_emotion", "congruence", "target_emotion"]
+
+ANALYSIS_RATE = 16000
+WINDOW_S, HOP_S = 0.025, 0.010
+F0_MIN, F0_MAX = 60.0, 500.0
+YIN_THRESHOLD = 0.15
+SILENCE_DB = -35.0           # Frames > 35 dB unter dem lautesten Frame gelten als Pause
+MIN_PAUSE_S = 0.15           # kürzere Lücken zählen nicht als Pause
+SPECTRUM_FMIN = 100.0        # untere Grenze für Schwerpunkt und Tilt
+PARAMS = {"rate": ANALYSIS_RATE, "window_s": WINDOW_S, "hop_s": HOP_S, "f0_min": F0_MIN,
+          "f0_max": F0_MAX, "yin_threshold": YIN_THRESHOLD, "silence_db": SILENCE_DB,
+          "min_pause_s": MIN_PAUSE_S, "spectrum_fmin": SPECTRUM_FMIN}
+
+FEATURES = ["duration_s", "f0_mean", "f0_median", "f0_std", "f0_range_st", "voiced_ratio",
+            "rms_mean_db", "rms_std_db", "pause_ratio", "n_pauses", "syllable_rate",
+            "spectral_centroid", "spectral_tilt"]
+
+
+# ---------- Hilfsfunktionen ----------
+def _frames(x: np.ndarray, length: int, hop: int) -> np.ndarray:
+    """(n_frames, length)-Sicht auf das Signal, am Ende mit Nullen aufgefüllt."""
+    if len(x) < length:
+        x = np.pad(x, (0, length - len(x)))
+    return sliding_window_view(x, length)[::hop]
+
+
+def yin_f0(frames: np.ndarray, fs: int, window: int, min_lag: int, max_lag: int,
+           threshold: float = YIN_THRESHOLD) -> np.ndarray:
+    """
+    YIN-Grundfrequenz für alle Frames gleichzeitig; stimmlose Frames → NaN.
+
+    frames: (n, window + max_lag). Differenzfunktion d(τ) = E₀ + E_τ − 2·r(τ),
+    r(τ) per FFT-Kreuzkorrelation, danach kumulative Normierung und
+    parabolische Interpolation des ersten Minimums unter der Schwelle.
+    """
+    n_fft = 1 << int(np.ceil(np.log2(frames.shape[1] + window)))
+    head = frames[:, :window]
+    r = np.fft.irfft(np.conj(np.fft.rfft(head, n_fft)) * np.fft.rfft(frames, n_fft),
+                     n_fft)[:, :max_lag + 1]
+    energy = np.concatenate([np.zeros((len(frames), 1)), np.cumsum(frames ** 2, axis=1)], axis=1)
+    lags = np.arange(max_lag + 1)
+    e_lag = energy[:, lags + window] - energy[:, lags]
+    diff = np.maximum(e_lag[:, :1] + e_lag - 2 * r, 0.0)
+
+    cmnd = np.ones_like(diff)
+    running = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * lags[1:] / np.where(running > 0, running, np.inf)
+
+    search = cmnd[:, min_lag:max_lag]
+    rising = np.concatenate([search[:, 1:] >= search[:, :-1],
+                             np.ones((len(search), 1), bool)], axis=1)
+    candidate = (search < threshold) & rising                 # erstes lokales Minimum unter Schwelle
+    voiced = candidate.any(axis=1)
+    tau = np.argmax(candidate, axis=1) + min_lag
+
+    # parabolische Interpolation um tau
+    rows = np.arange(len(frames))
+    left, mid = cmnd[rows, tau - 1], cmnd[rows, tau]
+    right = cmnd[rows, np.minimum(tau + 1, max_lag)]
+    denom = left - 2 * mid + right
+    safe = np.abs(denom) > 1e-12
+    shift = np.divide(0.5 * (left - right), denom, out=np.zeros_like(denom), where=safe)
+    f0 = fs / (tau + np.clip(shift, -1, 1))
+    return np.where(voiced, f0, np.nan)
+
+
+def clip_features(entry: dict, params: dict = PARAMS) -> dict:
+    """Merkmale einer Korpusdatei (Zeile aus index_corpus als dict)."""
+    x = to_float(payload(entry)).astype(np.float64)
+    if x.ndim > 1:
+        x = x.mean(axis=1)
+    fs = params["rate"]
+    ratio = Fraction(fs, int(entry["sample_rate"]))
+    if ratio != 1:
+        x = resample_poly(x, ratio.numerator, ratio.denominator)
+
+    window, hop = int(round(params["window_s"] * fs)), int(round(params["hop_s"] * fs))
+    min_lag, max_lag = int(fs / params["f0_max"]), int(np.ceil(fs / params["f0_min"]))
+    frames = _frames(x, window + max_lag, hop)
+    head = frames[:, :window]
+
+    # ---------- Energie & Pausen ----------
+    rms_db = 10 * np.log10(np.mean(head ** 2, axis=1) + 1e-12)
+    active = rms_db > rms_db.max() + params["silence_db"]
+    idx = np.flatnonzero(active)
+    span = slice(idx[0], idx[-1] + 1) if idx.size else slice(0, 0)
+    inner = ~active[span]                                      # Stille zwischen Sprachanfang und -ende
+    edges = np.diff(np.concatenate([[0], inner.astype(np.int8), [0]]))
+    gap_len = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    min_gap = params["min_pause_s"] / params["hop_s"]
+    speech_s = max(inner.size * params["hop_s"], params["hop_s"])
+
+    # ---------- F0 ----------
+    f0 = yin_f0(frames, fs, window, min_lag, max_lag, params["yin_threshold"])
+    f0 = np.where(active, f0, np.nan)
+    voiced = f0[~np.isnan(f0)]
+
+    # ---------- Sprechtempo: Energiegipfel (Silbenkerne) je Sekunde Sprache ----------
+    envelope = np.convolve(np.where(active, rms_db, rms_db.min()), np.ones(5) / 5, mode="same")
+    peaks, _ = find_peaks(envelope, prominence=3.0, distance=max(int(0.1 / params["hop_s"]), 1))
+
+    # ---------- Spektrum ----------
+    spectrum = np.abs(np.fft.rfft(head * np.hanning(window), axis=1))[active]
+    freqs = np.fft.rfftfreq(window, 1 / fs)
+    band = freqs >= params["spectrum_fmin"]
+    mag, f = spectrum[:, band], freqs[band]
+    centroid = (mag @ f) / np.maximum(mag.sum(axis=1), 1e-12)
+    # Tilt: Steigung der Regressionsgeraden dB über Oktaven (dB/Oktave), alle Frames in einem Schritt
+    octaves = np.log2(f) - np.log2(f).mean()
+    level = 20 * np.log10(mag + 1e-12)
+    tilt = (level - level.mean(axis=1, keepdims=True)) @ octaves / (octaves @ octaves)
+
+    return {
+        "duration_s": len(x) / fs,
+        "f0_mean": voiced.mean() if voiced.size else np.nan,
+        "f0_median": np.median(voiced) if voiced.size else np.nan,
+        "f0_std": voiced.std() if voiced.size else np.nan,
+        "f0_range_st": (12 * np.log2(np.percentile(voiced, 95) / np.percentile(voiced, 5))
+                        if voiced.size else np.nan),
+        "voiced_ratio": voiced.size / max(active.sum(), 1),
+        "rms_mean_db": rms_db[active].mean() if idx.size else np.nan,
+        "rms_std_db": rms_db[active].std() if idx.size else np.nan,
+        "pause_ratio": gap_len[gap_len >= min_gap].sum() / max(inner.size, 1),
+        "n_pauses": int((gap_len >= min_gap).sum()),
+        "syllable_rate": len(peaks) / speech_s,
+        "spectral_centroid": centroid.mean() if centroid.size else np.nan,
+        "spectral_tilt": tilt.mean() if tilt.size else np.nan,
+    }
+
+
+def extract_features(corpus: pd.DataFrame | None = None, output: Path = OUTPUT_PATH,
+                     params: dict = PARAMS, workers: int | None = None) -> pd.DataFrame:
+    """
+    Merkmalstabelle für alle Korpusdateien; Dateien mit passendem Cache-Schlüssel
+    werden aus output übernommen, nur neue/geänderte Dateien werden berechnet.
+    """
+    corpus = index_corpus() if corpus is None else corpus
+    corpus = corpus.assign(cache_key=[cache_key(input_hash([p]), params) for p in corpus["path"]])
+    cached = pd.read_parquet(output) if Path(output).exists() else pd.DataFrame(columns=["cache_key"])
+    cached = cached[cached["cache_key"].isin(corpus["cache_key"])]
+
+    todo = corpus[~corpus["cache_key"].isin(cached["cache_key"])]
+    rows = todo.to_dict("records")
+    if rows:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            values = list(pool.map(clip_features, rows, [params] * len(rows), chunksize=8))
+        fresh = pd.concat([todo[["cache_key", *KEY_COLUMNS]].reset_index(drop=True),
+                           pd.DataFrame(values, columns=FEATURES)], axis=1)
+        fresh.insert(0, "file", [Path(p).name for p in todo["path"]])
+        features = pd.concat([cached, fresh], ignore_index=True) if len(cached) else fresh
+    else:
+        features = cached
+
+    for col in KEY_COLUMNS:                                    # Kategorien wie im Korpus
+        features[col] = features[col].astype(corpus[col].dtype)
+    features = features.sort_values(KEY_COLUMNS + ["file"]).reset_index(drop=True)
+    features.to_parquet(output, index=False)
+    return features
+
+
+if __name__ == "__main__":
+    run = ResultStore().run("prosodic_features", params=PARAMS)
+    features = extract_features()
+    print(f"{len(features)} Dateien, Merkmale in {OUTPUT_PATH}\n")
+    print(features.groupby("system", observed=True)[FEATURES].mean().T.round(2).to_string())
+
+    long = features.melt(id_vars=["file", "system", "text_emotion", "congruence"],
+                         value_vars=FEATURES, var_name="statistic")
+    stored = long.rename(columns={"file": "item", "text_emotion": "emotion"})
+    stored[["system", "emotion", "congruence"]] = stored[["system", "emotion",
+                                                          "congruence"]].astype(str)
+    run.add_frame(stored)
+    run.save()
@@ -2,7 +2,7 @@
 """
 Analyse des Realismusgrads nach Altersgruppen
 
-Dieses Skript lädt die Daten aus survey_entries.csv
+Dieses Skript lädt die validierten Daten aus dem Survey-Export (survey_validation.DATA_PATH)
 berechnet deskriptive Kennwerte
 prüft die Voraussetzungen der ANOVA
 führt je nach Ergebnis eine klassische ANOVA oder eine Welch ANOVA durch
@@ -18,18 +18,23 @@ import pandas as pd
 from scipy import stats
 import pingouin as pg
 
+from result_store import ResultStore, stratum_label
+from study_design import load_design
+from survey_validation import DATA_PATH, load_survey
+
 # Laufzeitwarnungen unterdrücken damit der Output übersichtlich bleibt
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 # ---------- Daten laden ----------
-DATA_PATH = "survey_entries.csv"
-data = pd.read_csv(DATA_PATH)
+design = load_design()
+data, _, _ = load_survey(DATA_PATH, design)        # validiert, Quarantäne ausgeschlossen
+run = ResultStore().run("realism_altersgruppe", inputs=[DATA_PATH])
 
 # Spalte Realismus als numerisch sicherstellen
-data["Realismus"] = pd.to_numeric(data["Realismus"], errors="coerce")
+data["Realismus"] = pd.to_numeric(data[design.realism_column], errors="coerce")
 
 # Altersgruppe kodieren
-age_map = {1: "<30", 2: "30-44", 3: "45-59", 4: ">60"}
+age_map = design.demographics["Altersgruppe"].mapping
 data["Altersgruppe"] = data["Altersgruppe"].map(age_map)
 
 # Gruppen als Dictionary zusammenstellen
@@ -85,22 +90,38 @@ norm_ok = all(p > 0.05 for p in shapiro.values())
 var_ok = levene_p > 0.05
 
 # ---------- Omnibus Tests ----------
+
+def pingouin_column(table: pd.DataFrame, *names: str) -> str:
+    """
+    Liefert den ersten vorhandenen Spaltennamen (Pingouin benennt je nach
+    Version z. B. 'p-unc' → 'p_unc' und 'eta-square' → 'np2' um)
+    """
+    return next(name for name in names if name in table.columns)
+
 if norm_ok and var_ok:
     f_stat, p_val = stats.f_oneway(*groups.values())
-    eta2 = pg.anova(data=data, dv="Realismus", between="Altersgruppe")[
-        "eta-square"
-    ][0]
+    aov = pg.anova(data=data, dv="Realismus", between="Altersgruppe")
+    eta2 = aov[pingouin_column(aov, "eta-square", "np2")].iloc[0]
     print(
         f"\nKlassische ANOVA   F = {f_stat:.3f}   p = {p_val:.3f}   η² = {eta2:.3f}"
     )
+    omnibus = [("anova_F", f_stat, p_val), ("eta2", eta2, None)]
 else:
-    welch = pg.welch_anova(data=data, dv="Realismus", between="Altersgruppe")
-    f_stat = welch.loc[0, "F"]
-    p_val = welch.loc[0, "p-unc"]
-    omega2 = welch.loc[0, "np2"]
+    # Welch-Gewichte n/s² sind nur für Gruppen mit n ≥ 2 und s² > 0 definiert
+    welch_groups = [g for g, vals in groups.items() if len(vals) > 1 and vals.var() > 0]
+    dropped = sorted(set(groups) - set(welch_groups))
+    if dropped:
+        print("\nWelch ANOVA ohne Gruppen mit n < 2 oder Varianz 0:", dropped)
+    welch = pg.welch_anova(
+        data=data[data["Altersgruppe"].isin(welch_groups)], dv="Realismus", between="Altersgruppe"
+    )
+    f_stat = welch["F"].iloc[0]
+    p_val = welch[pingouin_column(welch, "p-unc", "p_unc")].iloc[0]
+    eta2 = welch["np2"].iloc[0]
     print(
-        f"\nWelch ANOVA        F = {f_stat:.3f}   p = {p_val:.3f}   ω² = {omega2:.3f}"
+        f"\nWelch ANOVA        F = {f_stat:.3f}   p = {p_val:.3f}   η² = {eta2:.3f}"
     )
+    omnibus = [("welch_F", f_stat, p_val), ("eta2", eta2, None)]
 
 # Kruskal Wallis als robuste Alternative
 H, p_kw = stats.kruskal(*groups.values())
@@ -126,3 +147,15 @@ for a, b in combinations(sorted(groups.keys()), 2):
 delta_df = pd.DataFrame(delta_rows, columns=["A", "B", "Cliff_delta"])
 print("\nCliff δ pro Paar")
 print(delta_df.round(3).to_string(index=False))
+
+# ---------- Ergebnisspeicher ----------
+for r in desc_df.itertuples():
+    run.add("mean", r.Mittelwert, n=r.N, ci_low=r.CI_low, ci_high=r.CI_high,
+            stratum=stratum_label("Altersgruppe", r.Gruppe))
+for statistic, value, p in omnibus + [("kruskal_H", H, p_kw), ("levene", None, levene_p)]:
+    run.add(statistic, value, p_value=p, n=len(data), stratum="Altersgruppe")
+for g, p in shapiro.items():
+    run.add("shapiro", p_value=p, stratum=stratum_label("Altersgruppe", g))
+for r in delta_df.itertuples():
+    run.add("cliffs_delta", r.Cliff_delta, stratum="Altersgruppe", contrast=f"{r.A} vs {r.B}")
+run.save()
@@ -4,17 +4,24 @@ from scipy import stats
 from statsmodels.stats import weightstats as smws
 from pingouin import compute_effsize, welch_anova, ttest
 
+from result_store import ResultStore, stratum_label
+from study_design import load_design
+from survey_validation import DATA_PATH, load_survey
+
 # ------------------------------------------------------------------
-# Daten laden und aufbereiten
+# Daten laden und aufbereiten (validiert, Labels aus dem Studiendesign)
 # ------------------------------------------------------------------
-df = pd.read_csv("survey_entries.csv")
-df["Realismus"] = pd.to_numeric(df["Realismus"], errors="coerce")
+design = load_design()
+df, _, _ = load_survey(DATA_PATH, design)
+run = ResultStore().run("realism_geschlecht", inputs=[DATA_PATH])
+df["Realismus"] = pd.to_numeric(df[design.realism_column], errors="coerce")
 
-geschlecht_map = {1: "männlich", 2: "weiblich", 3: "divers"}
-df["Geschlecht"] = df["Geschlecht"].map(geschlecht_map)
+gender = design.demographics["Geschlecht"]
+df["Geschlecht"] = df["Geschlecht"].map(gender.mapping)
+male, female = gender.labels[:2]
 
-m = df.loc[df.Geschlecht == "männlich", "Realismus"].dropna()
-w = df.loc[df.Geschlecht == "weiblich", "Realismus"].dropna()
+m = df.loc[df.Geschlecht == male, "Realismus"].dropna()
+w = df.loc[df.Geschlecht == female, "Realismus"].dropna()
 
 # ------------------------------------------------------------------
 # Deskriptivstatistik
@@ -46,9 +53,10 @@ print("Levene (Varianzgleichheit):", stats.levene(m, w).pvalue, "\n")
 # Welch-t-Test
 # ------------------------------------------------------------------
 t_stat, p_val = stats.ttest_ind(m, w, equal_var=False)
-df_welch = welch_anova(dv="Realismus", between="Geschlecht", data=df)
+df_welch = welch_anova(dv="Realismus", between="Geschlecht",
+                       data=df[df.Geschlecht.isin([male, female])])
 print(f"Welch-t: t = {t_stat:.2f}, p = {p_val:.3f}")
-print("Welch-df laut Pingouin:", float(df_welch['ddof2']), "\n")
+print("Welch-df laut Pingouin:", float(df_welch['ddof2'].iloc[0]), "\n")
 
 # Effektstärke
 d = compute_effsize(m, w, eftype='cohen')
@@ -64,11 +72,11 @@ print(f"Mann-Whitney-U: U = {u}, p = {p_u:.3f}\n")
 # Äquivalenztest (TOST, ±0.30 SD)
 # ------------------------------------------------------------------
 low, high = -0.30, 0.30
-p_low, p_high, _ = smws.ttost_ind(m, w, low, high, usevar='unequal')
+_, test_low, test_high = smws.ttost_ind(m, w, low, high, usevar='unequal')
 
-# Extrahieren der p-Werte aus den Tupeln
-p_low_value = p_low[0] if isinstance(p_low, tuple) else p_low
-p_high_value = p_high[0] if isinstance(p_high, tuple) else p_high
+# Extrahieren der p-Werte aus den Tupeln (t, p, df) der beiden Einzeltests
+p_low_value = test_low[1]
+p_high_value = test_high[1]
 
 print("TOST (Δ = ±0,30 SD):")
 print(f"  p_low  = {p_low_value:.3f}, p_high = {p_high_value:.3f}\n")
@@ -88,3 +96,18 @@ print(ttest_results)
 bf10 = bayesfactor_ttest(ttest_results['T'].iloc[0], nx=len(m), ny=len(w), paired=False)
 
 print(f"\nBayes-Faktor (BF10) = {bf10:.3f}")
+
+# ------------------------------------------------------------------
+# Ergebnisspeicher
+# ------------------------------------------------------------------
+for label, desc in [(male, desc_m), (female, desc_w)]:
+    run.add("mean", desc["M"], n=desc["N"], ci_low=desc["95% CI"][0],
+            ci_high=desc["95% CI"][1], stratum=stratum_label("Geschlecht", label))
+cell = dict(n=len(m) + len(w), stratum="Geschlecht", contrast=f"{male} vs {female}")
+run.add("welch_t", t_stat, p_value=p_val, **cell)
+run.add("cohens_d", d, **cell)
+run.add("mann_whitney_U", u, p_value=p_u, **cell)
+run.add("tost_low", low, p_value=p_low_value, **cell)
+run.add("tost_high", high, p_value=p_high_value, **cell)
+run.add("bf10", float(bf10), **cell)
+run.save()
@@ -0,0 +1,200 @@
+# -----------------------------------------------------------
+# Reliabilität der BWS-Net-Scores und Bootstrap-KIs für Kendalls W
+#   • Split-Half: viele zufällige, je Block geschichtete Hälften der Fragen,
+#     Spearman–Brown-korrigiert; Übereinstimmung der Hälften (Lin-CCC) als
+#     Test-Retest-Ersatz; 2.5–97.5 %-Streuung über die Splits (kein KI)
+#   • alle Splits über die (Systeme, Q, Q)-Kovarianz der Fragen-Scores →
+#     Aufwand unabhängig von der Teilnehmerzahl
+#   • Cronbachs α je Block × System (nur drei Fragen je Block)
+#   • Kendalls W je Block mit Perzentil-Bootstrap (Gewichte × Ränge = eine
+#     Matrixmultiplikation je Chunk)
+# -----------------------------------------------------------
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from friedman_posthoc import friedman_statistic, tie_terms, within_ranks
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("reliability_results.csv")
+N_SPLITS = 5_000
+BOOT_REPS = 2_000
+BOOT_CHUNK = 20_000_000      # max. Einträge der Gewichtsmatrix je Chunk
+ALPHA = 0.05
+SEED = 2025
+
+
+# ---------- Hilfsfunktionen ----------
+def item_scores(best: np.ndarray, worst: np.ndarray, k: int) -> np.ndarray:
+    """Best = +1, Worst = −1 je Frage und System: (n, Q, Systeme); ungültig → 0."""
+    n, q = best.shape
+    scores = np.zeros((n, q, k))
+    rows, cols = np.indices((n, q))
+    valid = (best >= 0) & (worst >= 0)
+    scores[rows[valid], cols[valid], best[valid]] += 1
+    scores[rows[valid], cols[valid], worst[valid]] -= 1
+    return scores
+
+
+def item_moments(scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mittel (Systeme, Q) und Kovarianz (Systeme, Q, Q) über Teilnehmer (ddof = 0)."""
+    mean = scores.mean(axis=0).T
+    centered = scores - mean.T
+    cov = np.einsum("nqk,nrk->kqr", centered, centered) / len(scores)
+    return mean, cov
+
+
+def random_splits(question_block: np.ndarray, n_splits: int,
+                  rng: np.random.Generator) -> np.ndarray:
+    """
+    Zufällige Hälften (S, Q) als Bool-Maske, je Block geschichtet: jeder Block gibt
+    ⌊m/2⌋ bzw. ⌈m/2⌉ Fragen in Hälfte A, die ⌈·⌉ gehen an die Hälfte der
+    ungeraden Blöcke → beide Hälften gleich lang und aus allen Blöcken.
+    """
+    # dichte Blocknummern 0..B−1, auch bei Lücken oder beliebigen Block-IDs
+    blocks, block_of, size = np.unique(question_block, return_inverse=True, return_counts=True)
+    # Rang jeder Frage innerhalb ihres Blocks nach Zufallsschlüssel
+    keys = rng.random((n_splits, len(question_block))) + block_of
+    order = np.argsort(keys, axis=1)
+    rank = np.empty_like(order)
+    start = np.concatenate([[0], np.cumsum(size)[:-1]])
+    np.put_along_axis(rank, order, np.arange(len(question_block)) - start[block_of[order]],
+                      axis=1)
+    # Zusatzfrage für zufällige Hälfte der ungeraden Blöcke
+    odd = np.flatnonzero(size % 2)
+    extra = np.zeros((n_splits, len(blocks)), int)
+    if len(odd):
+        pick = np.argsort(rng.random((n_splits, len(odd))), axis=1) < len(odd) // 2
+        extra[:, odd] = pick
+    take = size // 2 + extra                                           # (S, Blöcke)
+    return rank < take[:, block_of]
+
+
+def split_half(mean: np.ndarray, cov: np.ndarray, splits: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Korrelation der Hälften-Summen je Split und System, Spearman–Brown-korrigiert,
+    und Lin-CCC (absolute Übereinstimmung) – alles aus den Fragen-Momenten.
+    """
+    a = splits.astype(float)
+    b = 1 - a
+    var_a = np.einsum("sq,kqr,sr->sk", a, cov, a)
+    var_b = np.einsum("sq,kqr,sr->sk", b, cov, b)
+    cov_ab = np.einsum("sq,kqr,sr->sk", a, cov, b)
+    shift = (a - b) @ mean.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = cov_ab / np.sqrt(var_a * var_b)
+        ccc = 2 * cov_ab / (var_a + var_b + shift ** 2)
+    return {"r": r, "spearman_brown": 2 * r / (1 + r), "ccc": ccc}
+
+
+def cronbach_alpha(cov: np.ndarray, question_block: np.ndarray, n_blocks: int) -> np.ndarray:
+    """Cronbachs α je Block und System (Blöcke, Systeme) aus der Fragen-Kovarianz."""
+    member = np.eye(n_blocks)[question_block].T                         # (Blöcke, Q)
+    size = member.sum(axis=1)
+    item_var = member @ np.diagonal(cov, axis1=1, axis2=2).T            # Σ Var(Frage)
+    total_var = np.einsum("bq,kqr,br->bk", member, cov, member)         # Var(Σ Fragen)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (size / (size - 1))[:, None] * (1 - item_var / total_var)
+
+
+def _kendalls_w(rank_sums: np.ndarray, ties: np.ndarray, n: float, k: int) -> np.ndarray:
+    """W = χ²_F / (n·(k − 1)) mit Bindungskorrektur wie friedman_posthoc.friedman."""
+    return friedman_statistic(rank_sums, ties, n) / (n * (k - 1))
+
+
+def kendalls_w_bootstrap(net: np.ndarray, reps: int = BOOT_REPS, seed: int = SEED,
+                         chunk: int = BOOT_CHUNK) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kendalls W je Block für net (n, Blöcke, Systeme) und seine Bootstrap-Verteilung
+    (reps, Blöcke). Ränge und Bindungsterme einmal; je Resample nur Gewichte × Ränge.
+    """
+    n, n_blocks, k = net.shape
+    ranks = within_ranks(net)
+    ties = tie_terms(ranks).astype(float)                               # (n, Blöcke)
+    flat = ranks.reshape(n, -1)
+
+    point = _kendalls_w(flat.sum(axis=0).reshape(n_blocks, k), ties.sum(axis=0), n, k)
+    rng = np.random.default_rng(seed)
+    step = max(1, chunk // n)
+    boot = []
+    for start in range(0, reps, step):
+        # Multinomial-Gewichte als Zählung gezogener Indizes (schneller als rng.multinomial)
+        size = min(step, reps - start)
+        draws = rng.integers(0, n, (size, n)) + n * np.arange(size)[:, None]
+        weights = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(float)
+        sums = (weights @ flat).reshape(-1, n_blocks, k)
+        boot.append(_kendalls_w(sums, weights @ ties, n, k))
+    return point, np.concatenate(boot)
+
+
+def _interval(samples: np.ndarray, alpha: float = ALPHA) -> tuple[np.ndarray, np.ndarray]:
+    return tuple(np.nanquantile(samples, [alpha / 2, 1 - alpha / 2], axis=0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split-Half-Reliabilität und W-Bootstrap")
+    parser.add_argument("--splits", type=int, default=N_SPLITS)
+    parser.add_argument("--reps", type=int, default=BOOT_REPS)
+    args = parser.parse_args()
+
+    design = load_design()
+    df, best, worst = load_survey(DATA_PATH, design)
+    run = ResultStore().run("reliability", inputs=[DATA_PATH], seed=SEED,
+                            params={"splits": args.splits, "reps": args.reps, "alpha": ALPHA})
+    n, k = len(best), design.n_systems
+    rng = np.random.default_rng(SEED)
+
+    mean, cov = item_moments(item_scores(best, worst, k))
+    halves = split_half(mean, cov, random_splits(design.question_block, args.splits, rng))
+    alpha = cronbach_alpha(cov, design.question_block, design.n_blocks)
+    w, w_boot = kendalls_w_bootstrap(design.net_scores(best, worst), args.reps, SEED)
+
+    rows = []
+    print(f"Split-Half über {args.splits} geschichtete Hälften ({n} Teilnehmer):")
+    for s, system in enumerate(design.systems):
+        sb, ccc = halves["spearman_brown"][:, s], halves["ccc"][:, s]
+        (sb_low, ccc_low), (sb_high, ccc_high) = _interval(np.column_stack([sb, ccc]))
+        print(f"  {system:<12} Spearman–Brown = {np.nanmean(sb):.3f} "
+              f"(Splits {sb_low:.3f}…{sb_high:.3f}), CCC = {np.nanmean(ccc):.3f}")
+        # Streuung über die Splits, kein KI (Teilnehmer werden nicht neu gezogen)
+        for statistic, values, low, high in (("split_half_sb", sb, sb_low, sb_high),
+                                             ("split_half_ccc", ccc, ccc_low, ccc_high)):
+            rows.append({"Statistik": statistic, "System": system, "Emotion": None,
+                         "Kongruenz": None, "Wert": np.nanmean(values),
+                         "KI_unten": np.nan, "KI_oben": np.nan,
+                         "Split_unten": low, "Split_oben": high})
+
+    low, high = _interval(w_boot)
+    print(f"\nKendalls W je Block ({args.reps} Bootstrap-Resamples) und Cronbachs α je System:")
+    for b, (emotion, congruence) in enumerate(design.block_labels):
+        print(f"  {emotion:<10} {congruence:<12} W = {w[b]:.3f} [{low[b]:.3f}, {high[b]:.3f}]  α: "
+              + ", ".join(f"{system} {a:.2f}" for system, a in zip(design.systems, alpha[b])))
+        rows.append({"Statistik": "kendalls_w", "System": None, "Emotion": emotion,
+                     "Kongruenz": congruence, "Wert": w[b], "KI_unten": low[b], "KI_oben": high[b]})
+        rows += [{"Statistik": "cronbach_alpha", "System": system, "Emotion": emotion,
+                  "Kongruenz": congruence, "Wert": a, "KI_unten": np.nan, "KI_oben": np.nan}
+                 for system, a in zip(design.systems, alpha[b])]
+
+    table = pd.DataFrame(rows)
+    table.insert(0, "N", n)
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nErgebnisse gespeichert in {OUTPUT_PATH}.")
+
+    stored = table.rename(columns={"Wert": "value", "KI_unten": "ci_low", "KI_oben": "ci_high",
+                                   "N": "n", "System": "system", "Emotion": "emotion",
+                                   "Kongruenz": "congruence"})
+    fields = ["n", "system", "emotion", "congruence"]
+    for statistic, part in stored.groupby("Statistik", sort=False):
+        run.add_frame(part[["value", "ci_low", "ci_high", *fields]], statistic=statistic)
+        if part["Split_unten"].notna().any():                   # Split-Streuung getrennt
+            run.add_frame(part[fields].assign(value=part["Split_unten"]),
+                          statistic=f"{statistic}_split_low")
+            run.add_frame(part[fields].assign(value=part["Split_oben"]),
+                          statistic=f"{statistic}_split_high")
+    run.save()
@@ -0,0 +1,319 @@
+# -----------------------------------------------------------
+# Abbildungen aus vorberechneten Zusammenfassungen (headless)
+#   • Stufe figure_summaries: Realismus-Histogramme und mittlere Net-Scores
+#     mit 95 %-KI je Stratum (Gesamt, Geschlecht, Alter, Englisch) → ResultStore
+#   • Renderer liest nur Ergebniszeilen, nie Rohdaten: Box-/Violinplots aus
+#     Histogrammen, Punkt-/Balkenplots der Net-Scores mit KI je Stratum
+#   • Figure-API ohne pyplot (Agg/SVG, kein GUI-Backend), Prozesspool;
+#     Cache je Abbildung (Eingabe-Hash, Daten, DPI, Format) in manifest.json,
+#     unveränderte Abbildungen werden übersprungen
+# -----------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from scipy.stats import gaussian_kde
+from scipy.stats import t as t_dist
+
+from result_store import ResultStore, stratum_label
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey
+
+# ---------- Konfiguration ----------
+FIGURE_DIR = Path("figures")
+MANIFEST_NAME = "manifest.json"
+SUMMARY_STAGE = "figure_summaries"
+DPI = 300
+FORMAT = "png"               # png | svg
+NET_STYLE = "dot"            # dot | bar
+CONFIDENCE = 0.95
+COLORS = ("#B1B3EB", "#EBC9B1", "#B1EBC4", "#E6B1EB")
+OVERALL_LABEL = "Gesamt"
+
+
+# ---------- Zusammenfassungen (einzige Stufe mit Rohdaten) ----------
+def summarize(df: pd.DataFrame, best: np.ndarray, worst: np.ndarray,
+              design: StudyDesign) -> pd.DataFrame:
+    """
+    Realismus-Histogramm und Net-Score-Mittel (je Person und Block) mit t-KI für
+    alle Strata; Zeilen bereits mit RECORD_FIELDS benannt.
+    """
+    net = design.net_scores(best, worst).astype(float)              # (n, Blöcke, k)
+    realism = pd.to_numeric(df[design.realism_column], errors="coerce").to_numpy()
+    low, high = design.realism_scale
+    levels = np.arange(low, high + 1)
+
+    strata = [(None, np.ones(len(df), bool))]
+    for col, codebook in design.demographics.items():
+        index = codebook.index(df[col])
+        strata += [(stratum_label(col, label), index == i) for i, label in enumerate(codebook.labels)]
+
+    block_emotion, block_cong = (np.array(x) for x in zip(*design.block_labels))
+    k = design.n_systems
+    frames = []
+    for stratum, mask in strata:
+        values = realism[mask]
+        values = values[np.isin(values, levels)].astype(int)
+        frames.append(pd.DataFrame({"statistic": "realism_histogram", "item": levels.astype(str),
+                                    "value": np.bincount(values - low, minlength=len(levels)),
+                                    "n": len(values), "stratum": stratum}))
+        n = int(mask.sum())
+        if n == 0:
+            continue
+        mean = net[mask].mean(axis=0)
+        sem = net[mask].std(axis=0, ddof=1) / np.sqrt(n) if n > 1 else np.full_like(mean, np.nan)
+        half = t_dist.ppf((1 + CONFIDENCE) / 2, max(n - 1, 1)) * sem
+        frames.append(pd.DataFrame({"statistic": "net_score_mean", "value": mean.ravel(),
+                                    "ci_low": (mean - half).ravel(), "ci_high": (mean + half).ravel(),
+                                    "n": n, "emotion": np.repeat(block_emotion, k),
+                                    "congruence": np.repeat(block_cong, k),
+                                    "system": np.tile(design.systems, design.n_blocks),
+                                    "stratum": stratum}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------- Abbildungsspezifikationen aus dem ResultStore ----------
+def _factor(stratum: str) -> str:
+    return stratum.split("=", 1)[0]
+
+
+def _level(stratum: str) -> str:
+    return stratum.split("=", 1)[1] if stratum else OVERALL_LABEL
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", text.lower()).strip("_")
+
+
+def figure_specs(rows: pd.DataFrame, design: StudyDesign) -> list[dict]:
+    """
+    Eine JSON-fähige Spezifikation je Abbildung (Name, Art, Daten, Eingabe-Hash).
+    Realismus: je Faktor ein Box- und ein Violinplot über dessen Stufen;
+    Net-Scores: je Stratum ein Punkt-/Balkenplot Blöcke × Systeme mit KI.
+    """
+    rows = rows.assign(stratum=rows["stratum"].fillna(""))              # "" = Gesamt
+    rows = rows.astype(object).where(rows.notna(), None)
+    source = sorted({h for h in rows["input_hash"] if h})
+    specs = []
+
+    hist = rows[rows["statistic"] == "realism_histogram"]
+    order = ["", *design.demographics]
+    for factor in order:
+        part = hist[hist["stratum"].map(_factor) == factor]
+        groups = []
+        for stratum, group in part.groupby("stratum", sort=False):
+            if not sum(group["value"]):
+                continue                                  # leeres Stratum (z. B. N = 0)
+            groups.append({"label": _level(stratum), "n": int(group["n"].iloc[0]),
+                           "levels": [int(x) for x in group["item"]],
+                           "counts": [int(x) for x in group["value"]]})
+        if not groups:
+            continue
+        title = factor or OVERALL_LABEL
+        for kind in ("box", "violin"):
+            specs.append({"name": f"realism_{kind}_{_slug(title)}", "kind": kind,
+                          "title": f"Realismus – {title}", "groups": groups,
+                          "scale": list(design.realism_scale), "source": source})
+
+    net = rows[rows["statistic"] == "net_score_mean"]
+    blocks = [f"{emotion}\n{congruence}" for emotion, congruence in design.block_labels]
+    for stratum, group in net.groupby("stratum", sort=False):
+        cells = group.set_index(["emotion", "congruence", "system"])
+        series = []
+        for system in design.systems:
+            values = [cells.loc[(e, c, system)] for e, c in design.block_labels]
+            series.append({"label": system,
+                           "value": [float(v["value"]) for v in values],
+                           "ci_low": [float(v["ci_low"]) if v["ci_low"] is not None else None
+                                      for v in values],
+                           "ci_high": [float(v["ci_high"]) if v["ci_high"] is not None else None
+                                       for v in values]})
+        title = f"{_factor(stratum)} {_level(stratum)}".strip()
+        specs.append({"name": f"net_scores_{_slug(title)}", "kind": "net",
+                      "title": f"BWS-Net-Scores – {title} (N={int(group['n'].iloc[0])})",
+                      "blocks": blocks, "series": series, "source": source})
+    return specs
+
+
+# ---------- Rendern (läuft im Prozesspool) ----------
+def histogram_stats(levels, counts, label: str = "") -> dict:
+    """
+    Boxplot-Kennwerte wie matplotlib.cbook.boxplot_stats (whis = 1.5), aber aus
+    einem Histogramm statt aus den Einzelwerten.
+    """
+    levels, counts = np.asarray(levels, float), np.asarray(counts)
+    levels, counts = levels[counts > 0], counts[counts > 0]
+    cum = np.cumsum(counts)
+    n = cum[-1]
+
+    def quantile(q: float) -> float:
+        pos = q * (n - 1)
+        below = levels[np.searchsorted(cum, np.floor(pos), side="right")]
+        above = levels[np.searchsorted(cum, np.ceil(pos), side="right")]
+        return below + (above - below) * (pos - np.floor(pos))
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    inside = levels[(levels >= q1 - 1.5 * iqr) & (levels <= q3 + 1.5 * iqr)]
+    return {"label": label, "mean": float((levels * counts).sum() / n), "med": med,
+            "q1": q1, "q3": q3, "iqr": iqr,
+            "whislo": min(inside.min(), q1) if len(inside) else q1,
+            "whishi": max(inside.max(), q3) if len(inside) else q3,
+            "fliers": levels[(levels < q1 - 1.5 * iqr) | (levels > q3 + 1.5 * iqr)]}
+
+
+def violin_stats(levels, counts, points: int = 100) -> dict:
+    """Violin-Kennwerte (Gauß-KDE mit Häufigkeiten als Gewichten) aus einem Histogramm."""
+    levels, counts = np.asarray(levels, float), np.asarray(counts, float)
+    levels, counts = levels[counts > 0], counts[counts > 0]
+    coords = np.linspace(levels.min(), levels.max(), points)
+    if len(levels) > 1:
+        vals = gaussian_kde(levels, weights=counts)(coords)
+    else:
+        vals = np.where(np.isclose(coords, levels[0]), 1.0, 0.0)
+    box = histogram_stats(levels, counts)
+    return {"coords": coords, "vals": vals, "mean": box["mean"], "median": box["med"],
+            "min": levels.min(), "max": levels.max(), "quantiles": []}
+
+
+def render(spec: dict, path: str, dpi: int = DPI, fmt: str = FORMAT,
+           net_style: str = NET_STYLE) -> str:
+    """Eine Abbildung nach path schreiben."""
+    if spec["kind"] in ("box", "violin"):
+        groups = spec["groups"]
+        fig = Figure(figsize=(1.2 + 1.3 * len(groups), 3))
+        ax = fig.subplots()
+        labels = [f"{g['label']}\n(N={g['n']})" for g in groups]
+        positions = np.arange(1, len(groups) + 1)
+        if spec["kind"] == "box":
+            stats = [histogram_stats(g["levels"], g["counts"], label)
+                     for g, label in zip(groups, labels)]
+            box = ax.bxp(stats, positions=positions, patch_artist=True, showmeans=True)
+            for patch in box["boxes"]:
+                patch.set_facecolor(COLORS[0])
+        else:
+            parts = ax.violin([violin_stats(g["levels"], g["counts"]) for g in groups],
+                              positions=positions, showmeans=True, showextrema=True)
+            for body in parts["bodies"]:
+                body.set_facecolor(COLORS[0])
+                body.set_alpha(0.8)
+            ax.set_xticks(positions, labels)
+        ax.set_ylabel(f"Realismusgrad ({spec['scale'][0]}–{spec['scale'][1]})")
+        ax.set_ylim(spec["scale"][0] - 0.25, spec["scale"][1] + 0.25)
+        ax.grid(axis="y", linestyle="--", linewidth=0.5, alpha=0.7)
+    else:
+        series = spec["series"]
+        fig = Figure(figsize=(8, 3.5))
+        ax = fig.subplots()
+        x = np.arange(len(spec["blocks"]))
+        width = 0.8 / len(series)
+        for i, s in enumerate(series):
+            value = np.array(s["value"])
+            low = np.array(s["ci_low"], dtype=float)
+            high = np.array(s["ci_high"], dtype=float)
+            err = np.nan_to_num(np.vstack([value - low, high - value]))
+            pos = x - 0.4 + width * (i + 0.5)
+            color = COLORS[i % len(COLORS)]
+            if net_style == "bar":
+                ax.bar(pos, value, width, yerr=err, color=color, label=s["label"],
+                       edgecolor="black", linewidth=0.5, capsize=2)
+            else:
+                ax.errorbar(pos, value, yerr=err, fmt="o", color=color, markeredgecolor="black",
+                            ecolor="black", elinewidth=0.8, capsize=2, label=s["label"])
+        ax.axhline(0, color="black", linewidth=0.6)
+        ax.set_xticks(x, spec["blocks"], fontsize=7)
+        ax.set_ylabel(f"Net-Score je Person ({CONFIDENCE:.0%}-KI)")
+        ax.grid(axis="y", linestyle="--", linewidth=0.5, alpha=0.7)
+        ax.legend(fontsize=7, ncol=len(series), loc="upper center", bbox_to_anchor=(0.5, -0.2),
+                  frameon=False)
+    ax.set_title(spec["title"], fontsize=9)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, format=fmt)
+    return path
+
+
+def cache_key(spec: dict, params: dict) -> str:
+    return hashlib.sha256((json.dumps(spec, sort_keys=True)
+                           + json.dumps(params, sort_keys=True)).encode()).hexdigest()
+
+
+def render_all(specs: list[dict], output_dir: Path = FIGURE_DIR, dpi: int = DPI,
+               fmt: str = FORMAT, net_style: str = NET_STYLE, force: bool = False,
+               workers: int | None = None) -> tuple[dict, int]:
+    """
+    Rendert alle Abbildungen, deren Cache-Schlüssel sich geändert hat oder deren
+    Datei fehlt. Gibt (Manifest, Anzahl neu gerenderter Abbildungen) zurück.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    params = {"dpi": dpi, "format": fmt, "net_style": net_style}
+
+    todo = []
+    for spec in specs:
+        key = cache_key(spec, params)
+        file = f"{spec['name']}.{fmt}"
+        cached = manifest.get(spec["name"])
+        if (not force and cached and cached["key"] == key and cached["file"] == file
+                and (output_dir / file).exists()):
+            continue
+        todo.append((spec, key, file))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [(spec, key, file, pool.submit(render, spec, str(output_dir / file),
+                                                     dpi, fmt, net_style))
+                       for spec, key, file in todo]
+            for spec, key, file, future in futures:
+                future.result()
+                old = manifest.get(spec["name"])
+                if old and old["file"] != file:
+                    (output_dir / old["file"]).unlink(missing_ok=True)
+                manifest[spec["name"]] = {"key": key, "file": file}
+
+    # Abbildungen, für die es keine Zusammenfassung mehr gibt, entfernen
+    for name in set(manifest) - {spec["name"] for spec in specs}:
+        (output_dir / manifest.pop(name)["file"]).unlink(missing_ok=True)
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    tmp.replace(manifest_path)
+    return manifest, len(todo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Abbildungen aus dem ResultStore rendern")
+    parser.add_argument("--summarize", action="store_true",
+                        help="Zusammenfassungen vorher aus dem Survey-Export neu berechnen")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--format", choices=("png", "svg"), default=FORMAT)
+    parser.add_argument("--net-style", choices=("dot", "bar"), default=NET_STYLE)
+    parser.add_argument("--force", action="store_true", help="Cache ignorieren")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    design = load_design()
+    store = ResultStore()
+    if args.summarize:
+        df, best, worst = load_survey(DATA_PATH, design)
+        run = store.run(SUMMARY_STAGE, inputs=[DATA_PATH], params={"confidence": CONFIDENCE})
+        run.add_frame(summarize(df, best, worst, design))
+        run.save()
+
+    rows = store.query(stage=SUMMARY_STAGE)
+    if rows.empty:
+        raise SystemExit("Keine Zusammenfassungen im ResultStore – zuerst mit --summarize aufrufen.")
+    specs = figure_specs(rows, design)
+    manifest, rendered = render_all(specs, dpi=args.dpi, fmt=args.format,
+                                    net_style=args.net_style, force=args.force,
+                                    workers=args.workers)
+    print(f"{rendered} von {len(manifest)} Abbildungen neu gerendert → {FIGURE_DIR}")
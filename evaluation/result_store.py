@@ -0,0 +1,247 @@
+# -----------------------------------------------------------
+# Spaltenbasierter Ergebnisspeicher (Arrow IPC / Parquet)
+#   • jede Kennzahl = eine typisierte Zeile (Stufe, Statistik, Wert, p, KI, …)
+#   • Laufmetadaten je Zeile: Input-Hash, Seed, Parameter, Zeitstempel, Dauer
+#   • ein Arrow-File je Lauf, compact() → eine memory-mapped Tabelle
+# -----------------------------------------------------------
+
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# ---------- Konfiguration ----------
+RESULTS_DIR = Path("results")
+TABLE_NAME = "results.arrow"
+RUNS_DIR = "runs"
+
+SCHEMA = pa.schema([
+    ("run_id",      pa.string()),
+    ("stage",       pa.string()),
+    ("statistic",   pa.string()),
+    ("value",       pa.float64()),
+    ("p_value",     pa.float64()),
+    ("ci_low",      pa.float64()),
+    ("ci_high",     pa.float64()),
+    ("n",           pa.int64()),
+    ("emotion",     pa.string()),
+    ("congruence",  pa.string()),
+    ("item",        pa.string()),
+    ("system",      pa.string()),
+    ("system_b",    pa.string()),
+    ("stratum",     pa.string()),     # z. B. „Geschlecht=Female“, leer = Gesamt
+    ("contrast",    pa.string()),     # Paarvergleich zwischen Gruppen, z. B. „<30 vs 30-44“
+    ("input_hash",  pa.string()),
+    ("seed",        pa.int64()),
+    ("params",      pa.string()),     # JSON
+    ("started_at",  pa.timestamp("us", tz="UTC")),
+    ("duration_s",  pa.float64()),
+    ("family",      pa.string()),     # Testfamilie der Mehrfachkorrektur (multiple_testing.py)
+    ("p_adjusted",  pa.float64()),
+    ("adjust_method", pa.string()),
+])
+
+RECORD_FIELDS = (SCHEMA.names[2:SCHEMA.get_field_index("contrast") + 1]   # statistic … contrast
+                 + ["p_adjusted", "adjust_method"])                        # Korrektur der Stufe selbst
+QUERY_FIELDS = ("run_id", "stage", "statistic", "emotion", "congruence", "item",
+                "system", "stratum", "family")
+
+
+# ---------- Hilfsfunktionen ----------
+def input_hash(paths) -> str:
+    """SHA-256 über Inhalt (und Reihenfolge) aller Eingabedateien."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).name.encode())
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stratum_label(factor: str | None = None, level=None) -> str | None:
+    return None if factor is None else f"{factor}={level}"
+
+
+def latest_mask(table: pa.Table) -> np.ndarray:
+    """Bool-Maske der Zeilen, die zum jüngsten Lauf ihrer Stufe gehören."""
+    if not table.num_rows:
+        return np.zeros(0, dtype=bool)
+    runs = table.select(["stage", "started_at"]).to_pandas()
+    return (runs["started_at"]
+            == runs.groupby("stage")["started_at"].transform("max")).to_numpy(copy=True)
+
+
+def _to_table(records: pd.DataFrame) -> pa.Table:
+    frame = records.reindex(columns=SCHEMA.names)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+
+def _read_arrow(path: Path) -> pa.Table:
+    """Liest eine Arrow-IPC-Datei memory-mapped (zero copy); die Buffer halten die Map offen."""
+    return _conform(ipc.open_file(pa.memory_map(str(path), "r")).read_all())
+
+
+def _conform(table: pa.Table) -> pa.Table:
+    """Ergänzt Spalten, die in älteren Dateien noch fehlen, als Nullspalten."""
+    if table.schema.names == SCHEMA.names:
+        return table
+    columns = [table[f.name] if f.name in table.schema.names
+               else pa.nulls(table.num_rows, f.type) for f in SCHEMA]
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
+
+
+# ---------- Lauf ----------
+class RunRecorder:
+    """Sammelt die Kennzahlen eines Laufs und schreibt sie mit save() in den Speicher."""
+
+    def __init__(self, store: "ResultStore", stage: str, inputs=(),
+                 seed: int | None = None, params: dict | None = None):
+        self.store = store
+        self.stage = stage
+        self.run_id = uuid.uuid4().hex[:12]
+        self.input_hash = input_hash(inputs) if inputs else None
+        self.seed = seed
+        self.params = json.dumps(params or {}, sort_keys=True, default=str)
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._rows: list[dict] = []
+        self._frames: list[pd.DataFrame] = []
+
+    def add(self, statistic: str, value=None, **fields) -> None:
+        unknown = set(fields) - set(RECORD_FIELDS)
+        if unknown:
+            raise KeyError(f"Unbekannte Felder: {sorted(unknown)}")
+        self._rows.append({"statistic": statistic, "value": value, **fields})
+
+    def add_frame(self, frame: pd.DataFrame, **constants) -> None:
+        """Übernimmt ein DataFrame, dessen Spalten bereits RECORD_FIELDS heißen."""
+        frame = frame.assign(**constants)
+        unknown = set(frame.columns) - set(RECORD_FIELDS)
+        if unknown:
+            raise KeyError(f"Unbekannte Spalten: {sorted(unknown)}")
+        self._frames.append(frame)
+
+    def save(self) -> Path:
+        records = pd.concat([pd.DataFrame(self._rows, columns=RECORD_FIELDS), *self._frames],
+                            ignore_index=True)
+        records["run_id"] = self.run_id
+        records["stage"] = self.stage
+        records["input_hash"] = self.input_hash
+        records["seed"] = self.seed
+        records["params"] = self.params
+        records["started_at"] = self.started_at
+        records["duration_s"] = time.perf_counter() - self._t0
+        return self.store.write(_to_table(records))
+
+    def __enter__(self) -> "RunRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.save()
+
+
+# ---------- Speicher ----------
+class ResultStore:
+    """
+    Ergebnisse aller Auswertungen in einem Verzeichnis:
+    runs/<stage>-<run_id>.arrow je Lauf, compact() fasst zu results.arrow zusammen.
+    """
+
+    def __init__(self, root: Path = RESULTS_DIR):
+        self.root = Path(root)
+
+    def run(self, stage: str, inputs=(), seed: int | None = None,
+            params: dict | None = None) -> RunRecorder:
+        return RunRecorder(self, stage, inputs=inputs, seed=seed, params=params)
+
+    def write(self, table: pa.Table) -> Path:
+        runs = self.root / RUNS_DIR
+        runs.mkdir(parents=True, exist_ok=True)
+        stage, run_id = table["stage"][0].as_py(), table["run_id"][0].as_py()
+        path = runs / f"{stage}-{run_id}.arrow"
+        tmp = path.with_suffix(".tmp")
+        with ipc.new_file(str(tmp), table.schema) as writer:
+            writer.write_table(table)
+        tmp.replace(path)
+        return path
+
+    def _files(self) -> list[Path]:
+        main = self.root / TABLE_NAME
+        runs = sorted((self.root / RUNS_DIR).glob("*.arrow"))
+        return ([main] if main.exists() else []) + runs
+
+    def table(self) -> pa.Table:
+        tables = [_read_arrow(p) for p in self._files()]
+        return pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+    def compact(self) -> Path:
+        """Fasst alle Läufe zu einer einzigen Arrow-Datei zusammen."""
+        return self.replace(self.table())
+
+    def replace(self, table: pa.Table) -> Path:
+        """Ersetzt den gesamten Speicherinhalt durch table (z. B. nach Mehrfachkorrektur)."""
+        files = self._files()
+        table = _conform(table).combine_chunks()
+        main = self.root / TABLE_NAME
+        tmp = main.with_suffix(".tmp")
+        self.root.mkdir(parents=True, exist_ok=True)
+        with ipc.new_file(str(tmp), SCHEMA) as writer:
+            writer.write_table(table)
+        tmp.replace(main)
+        for path in files:
+            if path != main:
+                path.unlink()
+        return main
+
+    def export_parquet(self, path: Path) -> None:
+        pq.write_table(self.table(), path)
+
+    def query(self, latest: bool = True, **filters) -> pd.DataFrame:
+        """
+        Filtert nach stage, statistic, emotion, congruence, item, system, stratum, family
+        oder run_id;
+        Listen wirken als „in“. latest=True behält je Stufe nur den jüngsten Lauf.
+        """
+        unknown = set(filters) - set(QUERY_FIELDS)
+        if unknown:
+            raise KeyError(f"Unbekannte Filter: {sorted(unknown)}")
+        table = self.table()
+        mask = latest_mask(table) if latest else np.ones(table.num_rows, dtype=bool)
+        for field, value in filters.items():
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            column = table[field].to_numpy(zero_copy_only=False)
+            mask &= np.isin(column, list(values))
+        frame = table.filter(pa.array(mask)).to_pandas()
+        return frame.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    store = ResultStore()
+    if sys.argv[1:] == ["compact"]:
+        print(f"Kompaktiert nach {store.compact()}.")
+    else:
+        overview = store.query(latest=False)
+        if overview.empty:
+            print(f"Keine Ergebnisse in {store.root}.")
+        else:
+            print(overview.groupby(["stage", "run_id"])
+                          .agg(started_at=("started_at", "first"),
+                               n_records=("statistic", "size"),
+                               duration_s=("duration_s", "first"))
+                          .sort_values("started_at")
+                          .to_string())
@@ -0,0 +1,232 @@
+# -----------------------------------------------------------
+# Gruppensequentielles Monitoring der Systemkontraste
+#   • Δ Net-Score je Person, Emotion × Kongruenz und Systempaar
+#   • laufende Summen (n, Σd, Σd²) → Update nur mit neuen Antworten
+#   • Lan-DeMets-Alpha-Spending (O'Brien–Fleming / Pocock), Grenzen über
+#     numerische Integration für die tatsächlich erreichten Informationsanteile
+#   • je Zwischenanalyse: stop (Sieger steht fest) oder weiter
+# -----------------------------------------------------------
+
+import argparse
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq
+from scipy.stats import norm
+
+from result_store import ResultStore
+from study_design import StudyDesign, load_design
+from survey_validation import DATA_PATH, load_survey, validate_survey
+
+# ---------- Konfiguration ----------
+OUTPUT_PATH = Path("sequential_monitor_results.csv")
+ALPHA = 0.05                 # zweiseitig, je Kontrast
+LOOKS = (0.25, 0.5, 0.75, 1.0)
+SPENDING = "obf"
+GRID_POINTS = 801            # Stützstellen für die Dichte der Teststatistik
+
+
+# ---------- Alpha-Spending ----------
+def spent_alpha(t: np.ndarray, alpha: float = ALPHA, kind: str = SPENDING) -> np.ndarray:
+    """Kumuliert verbrauchtes α bei Informationsanteil t (Lan & DeMets 1983)."""
+    t = np.clip(np.asarray(t, dtype=float), 1e-12, 1.0)
+    if kind == "obf":
+        # α/2 je Seite: α(t) = 2·2·(1 − Φ(z_{α/4}/√t)), bei t = 1 genau α
+        return 4 * (1 - norm.cdf(norm.ppf(1 - alpha / 4) / np.sqrt(t)))
+    if kind == "pocock":
+        return alpha * np.log1p((np.e - 1) * t)
+    raise ValueError(f"Unbekannte Spending-Funktion '{kind}'")
+
+
+def boundaries(t: np.ndarray, alpha: float = ALPHA, kind: str = SPENDING,
+               grid_points: int = GRID_POINTS) -> np.ndarray:
+    """
+    Zweiseitige z-Grenzen c_k für die Informationsanteile t_1 < … < t_K.
+
+    Rekursion über die Dichte der Score-Statistik S_k = Z_k·√t_k im
+    Fortsetzungsbereich: P(|S_k| ≥ c_k·√t_k, vorher nicht gestoppt) = α(t_k) − α(t_{k−1}).
+    """
+    t = np.asarray(t, dtype=float)
+    spend = np.diff(np.concatenate([[0.0], spent_alpha(t, alpha, kind)]))
+    c = np.empty(len(t))
+    c[0] = norm.ppf(1 - spend[0] / 2)
+    grid = np.linspace(-c[0], c[0], grid_points) * np.sqrt(t[0])
+    weights = np.full(grid_points, grid[1] - grid[0])
+    weights[[0, -1]] /= 2                                        # Trapezregel
+    density = norm.pdf(grid, scale=np.sqrt(t[0])) * weights
+
+    for k in range(1, len(t)):
+        sd = np.sqrt(t[k] - t[k - 1])
+
+        def crossing(b: float) -> float:
+            return np.sum(density * (norm.cdf((-b - grid) / sd) + norm.sf((b - grid) / sd)))
+
+        upper = 10 * np.sqrt(t[k])
+        if crossing(upper) >= spend[k]:
+            c[k] = upper / np.sqrt(t[k])
+        else:
+            b = brentq(lambda b: crossing(b) - spend[k], 1e-6, upper, xtol=1e-10)
+            c[k] = b / np.sqrt(t[k])
+        new_grid = np.linspace(-c[k], c[k], grid_points) * np.sqrt(t[k])
+        kernel = norm.pdf((new_grid[:, None] - grid[None, :]) / sd) / sd
+        weights = np.full(grid_points, new_grid[1] - new_grid[0])
+        weights[[0, -1]] /= 2
+        density = (kernel @ density) * weights
+        grid = new_grid
+    return c
+
+
+# ---------- Monitor ----------
+class SequentialMonitor:
+    """
+    Laufende Δ-Net-Score-Statistiken aller Systempaare je Block.
+
+    add() übernimmt nur neue Personen (Summen sind additiv), look() wertet die
+    nächste geplante Zwischenanalyse aus. Gestoppte Kontraste bleiben gestoppt.
+    """
+
+    def __init__(self, design: StudyDesign, n_max: int, looks=LOOKS, alpha: float = ALPHA,
+                 spending: str = SPENDING):
+        self.design = design
+        self.n_max = n_max
+        self.planned = np.asarray(looks, dtype=float)
+        self.alpha = alpha
+        self.spending = spending
+        self.pairs = np.array(list(combinations(range(design.n_systems), 2)))
+        shape = (design.n_blocks, len(self.pairs))
+        self.n = 0
+        self.sum = np.zeros(shape)
+        self.sumsq = np.zeros(shape)
+        self.fractions: list[float] = []                            # tatsächliche Looks
+        self.stopped = np.zeros(shape, bool)
+        self.stopped_at = np.full(shape, -1)
+        self.z_at_stop = np.full(shape, np.nan)
+
+    def add(self, best: np.ndarray, worst: np.ndarray) -> None:
+        # Net-Score je Block ist die Summe über 3 Fragen; Mittel je Frage wie im Bootstrap
+        net = self.design.net_scores(best, worst)                   # (n, Blöcke, k)
+        diff = net[..., self.pairs[:, 0]] - net[..., self.pairs[:, 1]]
+        self.n += len(net)
+        self.sum += diff.sum(axis=0)
+        self.sumsq += (diff.astype(float) ** 2).sum(axis=0)
+
+    @property
+    def due(self) -> bool:
+        """Ist der nächste geplante Informationsanteil erreicht?"""
+        k = len(self.fractions)
+        return k < len(self.planned) and self.n >= self.planned[k] * self.n_max
+
+    def statistics(self) -> tuple[np.ndarray, np.ndarray]:
+        mean = self.sum / max(self.n, 1)
+        var = (self.sumsq - self.n * mean ** 2) / max(self.n - 1, 1)
+        se = np.sqrt(np.maximum(var, 0) / max(self.n, 1))
+        z = np.divide(mean, se, out=np.zeros_like(mean), where=se > 0)
+        return mean, z
+
+    def look(self) -> pd.DataFrame:
+        """Zwischenanalyse beim aktuellen n; Entscheidung je Kontrast."""
+        t = min(self.n / self.n_max, 1.0)
+        if self.fractions and t <= self.fractions[-1]:
+            raise ValueError("Keine neue Information seit der letzten Zwischenanalyse")
+        final = len(self.fractions) + 1 == len(self.planned) or t >= 1.0
+        self.fractions.append(t)
+        c = boundaries(np.array(self.fractions), self.alpha, self.spending)[-1]
+        mean, z = self.statistics()
+
+        newly = ~self.stopped & (np.abs(z) >= c)
+        self.stopped |= newly
+        self.stopped_at[newly] = len(self.fractions)
+        self.z_at_stop[newly] = z[newly]
+
+        decision = np.where(self.stopped, "stop", "abgeschlossen" if final else "weiter")
+        a, b = self.pairs.T
+        blocks = np.repeat(np.arange(self.design.n_blocks), len(self.pairs))
+        winner = np.where(self.z_at_stop > 0, a, b).ravel()           # Richtung beim Stopp
+        emotions, congruence = zip(*self.design.block_labels)
+        return pd.DataFrame({
+            "Look": len(self.fractions),
+            "N": self.n,
+            "Info": t,
+            "Grenze": c,
+            "Emotion": np.array(emotions)[blocks],
+            "Kongruenz": np.array(congruence)[blocks],
+            "System 1": np.array(self.design.systems)[np.tile(a, self.design.n_blocks)],
+            "System 2": np.array(self.design.systems)[np.tile(b, self.design.n_blocks)],
+            "Δ_Net": mean.ravel(),
+            "z": z.ravel(),
+            "Entscheidung": decision.ravel(),
+            "Sieger": np.where(self.stopped.ravel(),
+                               np.array(self.design.systems)[winner], ""),
+            "Gestoppt_bei": self.stopped_at.ravel(),
+        })
+
+
+def survey_arrays(path: Path, design: StudyDesign) -> tuple[np.ndarray, np.ndarray]:
+    """Best/Worst-Arrays aus einem CSV-Export oder direkt aus dem Binärlog des Umfrage-Servers."""
+    if Path(path).suffix == ".log":
+        from survey_server import read_log, responses_frame
+        clean, _ = validate_survey(responses_frame(read_log(path)[0], design), design)
+        return design.choice_arrays(clean)
+    _, best, worst = load_survey(path, design)
+    return best, worst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gruppensequentielles Monitoring")
+    parser.add_argument("--data", type=Path, default=DATA_PATH,
+                        help="Survey-CSV oder Antwortlog (.log) des Umfrage-Servers")
+    parser.add_argument("--n-max", type=int, default=None,
+                        help="geplante Stichprobe (Standard: aktuelle Anzahl)")
+    parser.add_argument("--spending", choices=("obf", "pocock"), default=SPENDING)
+    args = parser.parse_args()
+
+    design = load_design()
+    best, worst = survey_arrays(args.data, design)
+    n_max = args.n_max or len(best)
+    run = ResultStore().run("sequential_monitor", inputs=[args.data],
+                            params={"alpha": ALPHA, "looks": LOOKS, "spending": args.spending,
+                                    "n_max": n_max})
+
+    planned = boundaries(np.array(LOOKS), ALPHA, args.spending)
+    print(f"Geplante Grenzen ({args.spending}, α = {ALPHA}): "
+          + ", ".join(f"t={t:.2f}: |z| ≥ {c:.3f}" for t, c in zip(LOOKS, planned)))
+
+    # Antworten in Eingangsreihenfolge nachspielen; Looks, sobald fällig
+    monitor = SequentialMonitor(design, n_max, spending=args.spending)
+    looks = []
+    for start in range(len(best)):
+        monitor.add(best[start:start + 1], worst[start:start + 1])
+        if monitor.due:
+            looks.append(monitor.look())
+            now = looks[-1]
+            stopped = now[now["Gestoppt_bei"] == now["Look"]]
+            print(f"\nLook {now['Look'].iloc[0]}: N = {monitor.n}, "
+                  f"Grenze |z| ≥ {now['Grenze'].iloc[0]:.3f}, neu gestoppt: {len(stopped)}")
+            for r in stopped.rename(columns={"System 1": "System_1",
+                                             "System 2": "System_2"}).itertuples():
+                print(f"  {r.Emotion:<10} {r.Kongruenz:<12} {r.System_1} vs {r.System_2}: "
+                      f"z = {r.z:+.2f} → {r.Sieger}")
+
+    if looks:
+        results = pd.concat(looks, ignore_index=True)
+        last = looks[-1]
+        print(f"\nStand: {(last['Entscheidung'] == 'stop').sum()} von {len(last)} Kontrasten "
+              f"entschieden, {(last['Entscheidung'] != 'stop').sum()} offen.")
+        results.to_csv(OUTPUT_PATH, index=False)
+        print(f"Alle Looks gespeichert in {OUTPUT_PATH}.")
+
+        stored = results.rename(columns={"Emotion": "emotion", "Kongruenz": "congruence",
+                                         "System 1": "system", "System 2": "system_b",
+                                         "z": "value", "N": "n"})
+        stored["item"] = "Look " + stored["Look"].astype(str)
+        run.add_frame(stored[["emotion", "congruence", "system", "system_b", "value", "n",
+                              "item"]], statistic="sequential_z")
+        bounds = results.drop_duplicates("Look")
+        for r in bounds.itertuples():
+            run.add("sequential_boundary", r.Grenze, n=r.N, item=f"Look {r.Look}")
+        run.save()
+    else:
+        print(f"\nNoch keine Zwischenanalyse fällig: N = {monitor.n}, "
+              f"erster Look bei {LOOKS[0] * n_max:.0f}.")
@@ -0,0 +1,238 @@
+# -----------------------------------------------------------
+# Studiendesign aus study_design.json
+#   • Systeme, Fragen, Emotionen, Kongruenz, Demografie-Codebücher
+#   • einmal kompiliert zu Integer-Index-Arrays für alle Auswertungen
+#   • je Prozess gecacht (Datei + Änderungszeit), Code-Lookups je Codebuch
+#     einmal gebaut → auch an Worker-Prozesse übergebbar (batch_waves.py)
+# -----------------------------------------------------------
+
+import json
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ---------- Konfiguration ----------
+DESIGN_PATH = Path(__file__).with_name("study_design.json")
+
+
+@dataclass(frozen=True)
+class Codebook:
+    """Demografie-Variable: Spaltenname, Codes und Labels in Design-Reihenfolge."""
+    column: str
+    codes: np.ndarray
+    labels: list[str]
+
+    @property
+    def mapping(self) -> dict[int, str]:
+        return dict(zip(self.codes.tolist(), self.labels))
+
+    @cached_property
+    def table(self) -> np.ndarray:
+        return _lookup_table(self.codes)
+
+    def index(self, values) -> np.ndarray:
+        """Codes → 0-basierter Stufenindex, unbekannte/fehlende Codes → -1."""
+        return _lookup(self.table, values)
+
+
+@dataclass(frozen=True)
+class StudyDesign:
+    systems: list[str]
+    system_codes: np.ndarray          # Antwortcode je System (1…k)
+    sample_prefixes: list[str]        # Präfix der WAV-Dateien in evaluation-samples/
+    emotions: list[str]
+    congruence: list[str]
+    question_ids: list[str]
+    question_emotion: np.ndarray      # Index in emotions je Frage
+    question_congruence: np.ndarray   # Index in congruence je Frage
+    question_target: np.ndarray       # Index in emotions: synthetisierte Zielemotion
+    question_sample: np.ndarray       # Satznummer der Audiodateien
+    question_text: list[str]
+    demographics: dict[str, Codebook]
+    realism_column: str
+    realism_scale: tuple[int, int]
+
+    # ---------- abgeleitete Indizes ----------
+    @property
+    def n_systems(self) -> int:
+        return len(self.systems)
+
+    @property
+    def n_questions(self) -> int:
+        return len(self.question_ids)
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.emotions) * len(self.congruence)
+
+    @property
+    def question_block(self) -> np.ndarray:
+        """Emotion × Kongruenz-Block je Frage (emotion * n_congruence + congruence)."""
+        return self.question_emotion * len(self.congruence) + self.question_congruence
+
+    @property
+    def block_labels(self) -> list[tuple[str, str]]:
+        return [(e, c) for e in self.emotions for c in self.congruence]
+
+    @property
+    def voice_labels(self) -> dict[int, str]:
+        return dict(zip(self.system_codes.tolist(), self.systems))
+
+    @property
+    def emotion_lookup(self) -> dict[str, tuple[str, str]]:
+        return {q: (self.emotions[e], self.congruence[c])
+                for q, e, c in zip(self.question_ids, self.question_emotion,
+                                   self.question_congruence)}
+
+    def questions_for(self, emotion: str | None = None,
+                      congruence: str | None = None) -> list[str]:
+        """Frage-IDs eines Emotions- und/oder Kongruenz-Blocks in Design-Reihenfolge."""
+        mask = np.ones(self.n_questions, dtype=bool)
+        if emotion is not None:
+            mask &= self.question_emotion == self.emotions.index(emotion)
+        if congruence is not None:
+            mask &= self.question_congruence == self.congruence.index(congruence)
+        return [q for q, m in zip(self.question_ids, mask) if m]
+
+    @cached_property
+    def system_table(self) -> np.ndarray:
+        return _lookup_table(self.system_codes)
+
+    def system_index(self, codes) -> np.ndarray:
+        """Antwortcodes → 0-basierter Systemindex, unbekannte Codes → -1."""
+        return _lookup(self.system_table, codes)
+
+    # ---------- Antworten ----------
+    def choice_codes(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Liest die „best, worst“-Zellen aller Fragen als rohe Antwortcodes in
+        zwei (n, q)-Float-Arrays; nicht als Zahlenpaar lesbare Zellen → NaN.
+        """
+        cells = pd.Series(df[self.question_ids].to_numpy().ravel(), dtype="string")
+        # nur die (wenigen) verschiedenen Zellwerte parsen, dann zurück verteilen
+        index, uniques = pd.factorize(cells)
+        parts = pd.Series(uniques, dtype="string").str.extract(r"^\s*(-?\d+)\s*,\s*(-?\d+)\s*$")
+        parsed = np.vstack([parts.apply(pd.to_numeric, errors="coerce").to_numpy(float),
+                            np.full((1, 2), np.nan)])                  # index −1 = fehlend
+        codes = parsed[index]
+        shape = (len(df), self.n_questions)
+        return codes[:, 0].reshape(shape), codes[:, 1].reshape(shape)
+
+    def choice_arrays(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best/Worst aller Fragen als zwei (n, q)-Arrays mit 0-basiertem
+        Systemindex; nicht lesbare Zellen und unbekannte Codes → -1.
+        """
+        best, worst = self.choice_codes(df)
+        return self.system_index(best), self.system_index(worst)
+
+    def net_scores(self, best: np.ndarray, worst: np.ndarray) -> np.ndarray:
+        """Best-minus-Worst-Zählung als (n, Blöcke, Systeme)-Tensor."""
+        n = best.shape[0]
+        k, n_blocks = self.n_systems, self.n_blocks
+        base = (np.arange(n)[:, None] * n_blocks + self.question_block[None, :]) * k
+        size = n * n_blocks * k
+        valid = (best >= 0) & (worst >= 0)
+        plus = np.bincount((base + best)[valid], minlength=size)
+        minus = np.bincount((base + worst)[valid], minlength=size)
+        return (plus - minus).reshape(n, n_blocks, k)
+
+
+# ---------- Hilfsfunktionen ----------
+def _lookup_table(codes: np.ndarray) -> np.ndarray:
+    """Dichtes Lookup-Array Code → Index (letzter Eintrag −1 für ungültige Codes)."""
+    table = np.full(int(codes.max()) + 2, -1, dtype=np.int64)
+    table[codes] = np.arange(len(codes))
+    return table
+
+
+def _lookup(table: np.ndarray, values) -> np.ndarray:
+    """Vektorisierte Code → Index-Übersetzung über ein dichtes Lookup-Array."""
+    shape = np.shape(values)
+    values = pd.to_numeric(pd.Series(np.ravel(values)), errors="coerce")
+    values = values.fillna(-1).to_numpy(np.int64).reshape(shape)
+    in_range = (values >= 0) & (values < len(table) - 1)
+    return np.where(in_range, table[np.where(in_range, values, -1)], -1)
+
+
+_DESIGNS: dict[Path, tuple[int, StudyDesign]] = {}       # Datei → (mtime, Design)
+
+
+def cache_design(design: StudyDesign, path: Path = DESIGN_PATH) -> None:
+    """Bereits kompiliertes Design (z. B. aus dem Elternprozess) für load_design hinterlegen."""
+    path = Path(path).resolve()
+    _DESIGNS[path] = (path.stat().st_mtime_ns, design)
+
+
+def load_design(path: Path = DESIGN_PATH) -> StudyDesign:
+    """
+    Liest und validiert die Designdatei und kompiliert sie zu Index-Arrays;
+    unveränderte Dateien kommen aus dem Prozess-Cache.
+    """
+    resolved = Path(path).resolve()
+    cached = _DESIGNS.get(resolved)
+    if cached and cached[0] == resolved.stat().st_mtime_ns:
+        return cached[1]
+    design = _compile_design(path)
+    cache_design(design, resolved)
+    return design
+
+
+def _compile_design(path: Path) -> StudyDesign:
+    with open(path, encoding="utf-8") as fh:
+        spec = json.load(fh)
+
+    systems = spec["systems"]
+    emotions, congruence = spec["emotions"], spec["congruence"]
+    questions = spec["questions"]
+
+    ids = [q["id"] for q in questions]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path}: doppelte Frage-IDs")
+    codes = np.array([s["code"] for s in systems])
+    if len(np.unique(codes)) != len(codes) or codes.min() < 0:
+        raise ValueError(f"{path}: Systemcodes müssen eindeutig und ≥ 0 sein")
+
+    def index_of(values: list[str], field: str) -> np.ndarray:
+        unknown = sorted({q[field] for q in questions} - set(values))
+        if unknown:
+            raise ValueError(f"{path}: unbekannte Werte in '{field}': {unknown}")
+        return np.array([values.index(q[field]) for q in questions])
+
+    demographics = {
+        col: Codebook(col,
+                      np.array([int(c) for c in mapping]),
+                      list(mapping.values()))
+        for col, mapping in spec.get("demographics", {}).items()
+    }
+    realism = spec.get("realism", {})
+
+    return StudyDesign(
+        systems=[s["name"] for s in systems],
+        system_codes=codes,
+        sample_prefixes=[s.get("sample_prefix", s["name"].lower()) for s in systems],
+        emotions=emotions,
+        congruence=congruence,
+        question_ids=ids,
+        question_emotion=index_of(emotions, "emotion"),
+        question_congruence=index_of(congruence, "congruence"),
+        question_target=np.array([emotions.index(q.get("target_emotion", q["emotion"]))
+                                  for q in questions]),
+        question_sample=np.array([q.get("sample", i + 1) for i, q in enumerate(questions)]),
+        question_text=[q.get("text", "") for q in questions],
+        demographics=demographics,
+        realism_column=realism.get("column", "Realismus"),
+        realism_scale=tuple(realism.get("scale", (1, 5))),
+    )
+
+
+if __name__ == "__main__":
+    design = load_design()
+    print(f"{design.n_systems} Systeme, {design.n_questions} Fragen, "
+          f"{design.n_blocks} Emotion × Kongruenz-Blöcke")
+    for b, (emo, cong) in enumerate(design.block_labels):
+        qs = [q for q, qb in zip(design.question_ids, design.question_block) if qb == b]
+        print(f"  {emo:<10} {cong:<12} {', '.join(qs)}")
@@ -0,0 +1,510 @@
+# -----------------------------------------------------------
+# Lokaler Umfrage-Server mit Append-only-Antwortlog
+#   • asyncio-HTTP (eine Schleife, ein Kern): Hörseite, Aufgaben als JSON,
+#     WAV-Auslieferung mit HTTP-Range (206) über sendfile
+#   • Antworten je Frage → Binärlog mit Records fester Länge (32 Byte,
+#     Prüfsumme), gebündeltes fsync (Group Commit) vor der Bestätigung
+#   • Log → Survey_Entries.csv-Layout (compact) oder direkt mitlesen (tail)
+# -----------------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from audio_corpus import index_corpus
+from listening_page import clip_grid
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+LOG_PATH = Path("survey_responses.log")
+CSV_PATH = Path("Survey_Entries.csv")
+HOST, PORT = "127.0.0.1", 8080
+FLUSH_INTERVAL = 0.02        # s; alle Antworten eines Intervalls teilen sich ein fsync
+MAX_HEADER, MAX_BODY = 16 << 10, 64 << 10
+
+# Record-Arten
+KIND_DEMOGRAPHIC, KIND_ANSWER, KIND_REALISM, KIND_COMPLETE = 0, 1, 2, 3
+
+RECORD_DTYPE = np.dtype([
+    ("respondent", "S16"),   # UUID-Bytes
+    ("time_us",    "<u8"),
+    ("kind",       "u1"),
+    ("field",      "u1"),    # Demografie- bzw. Frageindex im Design
+    ("a",          "<i2"),   # Code bzw. Best-Code
+    ("b",          "<i2"),   # Worst-Code
+    ("check",      "<u2"),   # Summe der ersten 15 uint16-Wörter + CHECK_SEED
+])
+CHECK_SEED = 0x5A17          # ein genullter Block ist damit kein gültiger Record
+
+
+# ---------- Binärlog ----------
+def _checksum(records: np.ndarray) -> np.ndarray:
+    words = records.view(np.uint8).reshape(len(records), RECORD_DTYPE.itemsize)[:, :30]
+    return ((words.view("<u2").sum(axis=1, dtype=np.uint64) + CHECK_SEED) & 0xFFFF).astype("<u2")
+
+
+def make_records(respondent: bytes, kind: int, fields, a, b=0) -> np.ndarray:
+    fields = np.atleast_1d(fields)
+    records = np.zeros(len(fields), RECORD_DTYPE)
+    records["respondent"] = respondent
+    records["time_us"] = time.time_ns() // 1000
+    records["kind"] = kind
+    records["field"] = fields
+    records["a"] = a
+    records["b"] = b
+    records["check"] = _checksum(records)
+    return records
+
+
+def read_log(path: Path = LOG_PATH, offset: int = 0) -> tuple[np.ndarray, int]:
+    """
+    Liest alle vollständigen Records ab offset (Byte) und gibt (gültige Records,
+    neuer Offset) zurück. Ein halb geschriebener letzter Record bleibt für den
+    nächsten Aufruf liegen; Records mit falscher Prüfsumme werden verworfen.
+    """
+    path = Path(path)
+    if not path.exists():
+        return np.zeros(0, RECORD_DTYPE), offset
+    count = (path.stat().st_size - offset) // RECORD_DTYPE.itemsize
+    records = np.fromfile(path, dtype=RECORD_DTYPE, count=count, offset=offset)
+    valid = records["check"] == _checksum(records)
+    if not valid.all():
+        print(f"{(~valid).sum()} beschädigte Records in {path} übersprungen.")
+    return records[valid], offset + count * RECORD_DTYPE.itemsize
+
+
+def follow(path: Path = LOG_PATH, interval: float = 1.0):
+    """Generator über neue Record-Blöcke, sobald sie im Log stehen (tail -f)."""
+    offset = 0
+    while True:
+        records, offset = read_log(path, offset)
+        if len(records):
+            yield records
+        else:
+            time.sleep(interval)
+
+
+def responses_frame(records: np.ndarray, design: StudyDesign,
+                    complete_only: bool = True) -> pd.DataFrame:
+    """
+    Records → eine Zeile je Teilnehmer im Layout von Survey_Entries.csv.
+    Spätere Records überschreiben frühere (Korrekturen), Reihenfolge nach Startzeit.
+    """
+    columns = [*design.demographics, *design.question_ids, design.realism_column]
+    frame = pd.DataFrame({name: records[name] for name in RECORD_DTYPE.names})
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+    frame = (frame.sort_values("time_us", kind="stable")
+                  .drop_duplicates(["respondent", "kind", "field"], keep="last"))
+    order = frame.groupby("respondent")["time_us"].min().sort_values().index
+    if complete_only:
+        done = frame.loc[frame["kind"] == KIND_COMPLETE, "respondent"]
+        order = order[order.isin(done)]
+
+    out = pd.DataFrame(index=order, columns=columns, dtype=object)
+    demo = frame[frame["kind"] == KIND_DEMOGRAPHIC]
+    demo = demo.pivot(index="respondent", columns="field", values="a")
+    for i, col in enumerate(design.demographics):
+        if i in demo.columns:
+            out[col] = demo[i].reindex(order).astype("Int64")
+
+    answers = frame[frame["kind"] == KIND_ANSWER]
+    cells = answers["a"].astype(str) + ", " + answers["b"].astype(str)
+    answers = answers.assign(cell=cells).pivot(index="respondent", columns="field", values="cell")
+    for j, q in enumerate(design.question_ids):
+        if j in answers.columns:
+            out[q] = answers[j].reindex(order)
+
+    realism = frame[frame["kind"] == KIND_REALISM].set_index("respondent")["a"]
+    out[design.realism_column] = realism.reindex(order).astype("Int64")
+    return out.reset_index(drop=True)
+
+
+def compact(log_path: Path = LOG_PATH, csv_path: Path = CSV_PATH,
+            design: StudyDesign | None = None, complete_only: bool = True) -> int:
+    design = design or load_design()
+    records, _ = read_log(log_path)
+    frame = responses_frame(records, design, complete_only=complete_only)
+    tmp = Path(csv_path).with_suffix(".tmp")
+    frame.to_csv(tmp, index=False)
+    tmp.replace(csv_path)
+    return len(frame)
+
+
+class ResponseLog:
+    """Append-only-Log; Schreibzugriffe eines Intervalls werden mit einem fsync bestätigt."""
+
+    def __init__(self, path: Path = LOG_PATH, flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self._fh = open(self.path, "ab")
+        # Ein beim Absturz halb geschriebener Record am Ende würde alle folgenden
+        # Records verschieben → vor dem ersten Anhängen auf ganze Records kürzen.
+        size = self._fh.seek(0, os.SEEK_END)
+        torn = size % RECORD_DTYPE.itemsize
+        if torn:
+            self._fh.truncate(size - torn)
+            print(f"{torn} Byte eines unvollständigen Records am Ende von {self.path} verworfen.")
+        self._io = ThreadPoolExecutor(max_workers=1)       # genau ein Schreiber → keine Verschränkung
+        self._pending: list[bytes] = []
+        self._waiters: list[asyncio.Future] = []
+        self._flush_task: asyncio.Task | None = None
+
+    async def append(self, records: np.ndarray) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._pending.append(records.tobytes())
+        self._waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_later())
+        await waiter
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        data, waiters = b"".join(self._pending), self._waiters
+        self._pending, self._waiters, self._flush_task = [], [], None
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._io, self._write, data)
+        except OSError as exc:
+            for waiter in waiters:
+                waiter.set_exception(exc)
+        else:
+            for waiter in waiters:
+                waiter.set_result(None)
+
+    def _write(self, data: bytes) -> None:
+        self._fh.write(data)
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self._io.shutdown(wait=True)
+        self._fh.close()
+
+
+# ---------- HTTP ----------
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = "", headers: dict | None = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Einzelner Byte-Bereich → (start, end) inklusive; None = ganze Datei."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[6:].strip().partition("-")
+    try:
+        if start == "":                                      # bytes=-N: letzte N Bytes
+            length = int(end)
+            first, last = max(size - length, 0), size - 1
+        else:
+            first = int(start)
+            last = min(int(end), size - 1) if end else size - 1
+    except ValueError:
+        return None
+    if first > last or first >= size:
+        raise HTTPError(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                        headers={"Content-Range": f"bytes */{size}"})
+    return first, last
+
+
+def _is_code(value) -> bool:
+    """Ganzzahliger JSON-Code (true/false, 1.5 und "2" zählen nicht)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class SurveyServer:
+    def __init__(self, design: StudyDesign, log: ResponseLog):
+        self.design = design
+        self.log = log
+        corpus = index_corpus(design=design)
+        grid = clip_grid(corpus, design)[design.sample_prefixes]
+        self.files = {Path(p).name: Path(p) for p in corpus["path"]}
+        self.files |= {f.with_suffix(".ogg").name: f.with_suffix(".ogg")
+                       for f in list(self.files.values()) if f.with_suffix(".ogg").exists()}
+        tasks = []
+        for j, q in enumerate(design.question_ids):
+            clips = grid.loc[design.question_sample[j]]
+            tasks.append({"id": q, "text": design.question_text[j], "clips": [
+                {"code": int(code), "src": f"/samples/{Path(path).name}"}
+                for code, path in zip(design.system_codes, clips) if isinstance(path, str)]})
+        self.tasks_json = json.dumps({
+            "tasks": tasks,
+            "demographics": {col: dict(zip(map(str, cb.codes.tolist()), cb.labels))
+                             for col, cb in design.demographics.items()},
+            "realism": {"column": design.realism_column, "scale": design.realism_scale},
+        }).encode()
+        self.question_index = {q: j for j, q in enumerate(design.question_ids)}
+        records, _ = read_log(log.path)                     # Sitzungen überleben Neustarts
+        started = records["respondent"][records["kind"] == KIND_DEMOGRAPHIC].view("V16")
+        self.sessions = {r.tobytes() for r in started}           # V16: keine gekürzten Null-Bytes
+
+    # ---------- Verbindung ----------
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *lines = head.decode("latin-1").split("\r\n")
+                method, target, version = request_line.split(" ", 2)
+                headers = {k.strip().lower(): v.strip()
+                           for k, _, v in (line.partition(":") for line in lines if line)}
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self.send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (version == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                try:
+                    await self.dispatch(method, unquote(urlsplit(target).path), headers, body,
+                                        writer, keep_alive)
+                except HTTPError as exc:
+                    await self.send(writer, exc.status, json.dumps({"error": str(exc)}).encode(),
+                                    "application/json", keep_alive=keep_alive, headers=exc.headers)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, status: HTTPStatus, body: bytes = b"",
+                   content_type: str = "text/plain; charset=utf-8", keep_alive: bool = True,
+                   headers: dict | None = None, head_only: bool = False) -> None:
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 f"Content-Type: {content_type}", f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                 *(f"{k}: {v}" for k, v in (headers or {}).items())]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
+
+    async def dispatch(self, method, path, headers, body, writer, keep_alive) -> None:
+        if method in ("GET", "HEAD"):
+            head_only = method == "HEAD"
+            if path == "/":
+                await self.send(writer, HTTPStatus.OK, PAGE.encode(), "text/html; charset=utf-8",
+                                keep_alive, head_only=head_only)
+            elif path == "/api/tasks":
+                await self.send(writer, HTTPStatus.OK, self.tasks_json, "application/json",
+                                keep_alive, head_only=head_only)
+            elif path.startswith("/samples/"):
+                await self.send_file(writer, path[len("/samples/"):], headers.get("range"),
+                                     keep_alive, head_only)
+            else:
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+        elif method == "POST":
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "kein gültiges JSON")
+            if not isinstance(payload, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "JSON-Objekt erwartet")
+            routes = {"/api/session": self.start_session, "/api/answer": self.answer,
+                      "/api/finish": self.finish}
+            if path not in routes:
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+            result = await routes[path](payload)
+            await self.send(writer, HTTPStatus.OK, json.dumps(result).encode(),
+                            "application/json", keep_alive)
+        else:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+    async def send_file(self, writer, name: str, range_header, keep_alive, head_only) -> None:
+        path = self.files.get(name)
+        if path is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        size = path.stat().st_size
+        byte_range = parse_range(range_header, size)
+        first, last = byte_range or (0, size - 1)
+        length = last - first + 1
+        status = HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK
+        extra = {"Accept-Ranges": "bytes", "Cache-Control": "public, max-age=86400"}
+        if byte_range:
+            extra["Content-Range"] = f"bytes {first}-{last}/{size}"
+        content_type = "audio/ogg" if path.suffix == ".ogg" else "audio/wav"
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                 f"Content-Length: {length}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                 *(f"{k}: {v}" for k, v in extra.items())]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        if not head_only:
+            with open(path, "rb") as fh:
+                await asyncio.get_running_loop().sendfile(writer.transport, fh, first, length)
+
+    # ---------- Antworten ----------
+    def _respondent(self, payload: dict) -> bytes:
+        try:
+            respondent = uuid.UUID(hex=str(payload["respondent"])).bytes
+        except (KeyError, ValueError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "respondent fehlt oder ist ungültig")
+        if respondent not in self.sessions:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "unbekannte Sitzung")
+        return respondent
+
+    async def start_session(self, payload: dict) -> dict:
+        respondent = uuid.uuid4()
+        fields, codes = [], []
+        for i, (col, codebook) in enumerate(self.design.demographics.items()):
+            code = payload.get(col)
+            if not _is_code(code) or codebook.index([code])[0] < 0:
+                raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, f"{col}: unbekannter Code")
+            fields.append(i)
+            codes.append(int(code))
+        await self.log.append(make_records(respondent.bytes, KIND_DEMOGRAPHIC, fields, codes))
+        self.sessions.add(respondent.bytes)
+        return {"respondent": respondent.hex}
+
+    async def answer(self, payload: dict) -> dict:
+        respondent = self._respondent(payload)
+        j = self.question_index.get(payload.get("question"))
+        best, worst = payload.get("best"), payload.get("worst")
+        if j is None:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "unbekannte Frage")
+        if not (_is_code(best) and _is_code(worst)):
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "Best/Worst müssen Systemcodes sein")
+        index = self.design.system_index([best, worst])
+        if (index < 0).any() or index[0] == index[1]:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "ungültiges Best/Worst-Paar")
+        await self.log.append(make_records(respondent, KIND_ANSWER, j, int(best), int(worst)))
+        return {"ok": True}
+
+    async def finish(self, payload: dict) -> dict:
+        respondent = self._respondent(payload)
+        low, high = self.design.realism_scale
+        realism = payload.get("realism")
+        if not _is_code(realism) or not low <= realism <= high:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "Realismus außerhalb der Skala")
+        records = np.concatenate([make_records(respondent, KIND_REALISM, 0, realism),
+                                  make_records(respondent, KIND_COMPLETE, 0, 1)])
+        await self.log.append(records)
+        return {"ok": True}
+
+
+async def serve(host: str = HOST, port: int = PORT, log_path: Path = LOG_PATH) -> None:
+    log = ResponseLog(log_path)
+    server = SurveyServer(load_design(), log)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=4096,
+                                          limit=MAX_HEADER)
+    print(f"Umfrage läuft auf http://{host}:{port}/  (Log: {log_path})")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        log.close()
+
+
+# ---------- Hörseite der Umfrage ----------
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Emotional TTS – Listening Survey</title>
+<style>
+  body { font-family: system-ui, sans-serif; line-height: 1.5; max-width: 50rem;
+         margin: 0 auto; padding: 0 1rem; }
+  table { width: 100%; border-collapse: collapse; }
+  td, th { padding: 0.4em; border: 1px solid #ccc; text-align: center; }
+  audio { width: 100%; }
+  button { font: inherit; padding: 0.4em 1.2em; }
+</style>
+</head>
+<body>
+<h1>Listening Survey</h1>
+<main id="app">Loading…</main>
+<script>
+(async function () {
+  const app = document.getElementById("app");
+  const spec = await (await fetch("/api/tasks")).json();
+  const post = async (url, body) => {
+    const r = await fetch(url, {method: "POST", body: JSON.stringify(body)});
+    if (!r.ok) throw new Error((await r.json()).error);
+    return r.json();
+  };
+  const select = (name, options) =>
+    `<label>${name} <select name="${name}">` +
+    Object.entries(options).map(([c, l]) => `<option value="${c}">${l}</option>`).join("") +
+    `</select></label><br>`;
+
+  app.innerHTML = "<form>" + Object.entries(spec.demographics)
+    .map(([col, opts]) => select(col, opts)).join("") + "<button>Start</button></form>";
+  await new Promise(done => app.querySelector("form").onsubmit = e => { e.preventDefault(); done(); });
+  const demo = {};
+  for (const col in spec.demographics) demo[col] = +app.querySelector(`[name="${col}"]`).value;
+  const {respondent} = await post("/api/session", demo);
+
+  for (const [n, task] of spec.tasks.entries()) {
+    const clips = task.clips.slice().sort(() => Math.random() - 0.5);
+    app.innerHTML = `<p>${n + 1} / ${spec.tasks.length}</p><p><em>${task.text}</em></p><form><table>` +
+      "<tr><th>Sample</th><th>Best</th><th>Worst</th></tr>" +
+      clips.map(c => `<tr><td><audio controls preload="none" src="${c.src}"></audio></td>` +
+        `<td><input type="radio" name="best" value="${c.code}" required></td>` +
+        `<td><input type="radio" name="worst" value="${c.code}" required></td></tr>`).join("") +
+      "</table><button>Next</button></form>";
+    const form = app.querySelector("form");
+    await new Promise(done => form.onsubmit = async e => {
+      e.preventDefault();
+      const best = +form.best.value, worst = +form.worst.value;
+      if (best === worst) { alert("Best and worst must differ."); return; }
+      await post("/api/answer", {respondent, question: task.id, best, worst});
+      done();
+    });
+  }
+
+  const [low, high] = spec.realism.scale;
+  const scale = {};
+  for (let v = low; v <= high; v++) scale[v] = v;
+  app.innerHTML = "<form>" + select("Realism", scale) + "<button>Finish</button></form>";
+  const form = app.querySelector("form");
+  await new Promise(done => form.onsubmit = e => { e.preventDefault(); done(); });
+  await post("/api/finish", {respondent, realism: +form.Realism.value});
+  app.innerHTML = "<p>Thank you!</p>";
+})();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Umfrage-Server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="HTTP-Server starten")
+    p_serve.add_argument("--host", default=HOST)
+    p_serve.add_argument("--port", type=int, default=PORT)
+    p_compact = sub.add_parser("compact", help="Log → Survey_Entries.csv")
+    p_compact.add_argument("--output", type=Path, default=CSV_PATH)
+    p_compact.add_argument("--incomplete", action="store_true",
+                           help="auch nicht abgeschlossene Teilnahmen übernehmen")
+    p_tail = sub.add_parser("tail", help="neue Antworten laufend ausgeben")
+    for p in (p_serve, p_compact, p_tail):
+        p.add_argument("--log", type=Path, default=LOG_PATH)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.log))
+    elif args.command == "compact":
+        n = compact(args.log, args.output, complete_only=not args.incomplete)
+        print(f"{n} Teilnahmen → {args.output}")
+    else:
+        kinds = {KIND_DEMOGRAPHIC: "Demografie", KIND_ANSWER: "Antwort",
+                 KIND_REALISM: "Realismus", KIND_COMPLETE: "abgeschlossen"}
+        for block in follow(args.log):
+            for r in block:
+                print(f"{r['respondent'].hex()[:8]}  {kinds.get(int(r['kind']), '?'):<13} "
+                      f"{int(r['field']):>2}  {int(r['a'])}, {int(r['b'])}", flush=True)
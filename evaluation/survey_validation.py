@@ -0,0 +1,118 @@
+# -----------------------------------------------------------
+# Eingangsprüfung & Quarantäne für Survey-Exporte
+#   • alle Zeilen in einem vektorisierten Durchgang geprüft
+#   • fehlerhafte Paare, Best == Worst, unbekannte Codes,
+#     fehlende Demografie, doppelte Teilnehmende
+#   • fehlerhafte Zeilen → <export>_quarantine.csv mit Gründen
+#   • zuletzt gelesener Export je Prozess gecacht (Pfad, Größe, Änderungszeit)
+# -----------------------------------------------------------
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from study_design import StudyDesign, load_design
+
+# ---------- Konfiguration ----------
+SURVEY_NAMES = ("Survey_Entries.csv", "survey_entries.csv")   # Export-Name, eingecheckte Datei
+REASON_COLUMN = "Gruende"
+ROW_COLUMN = "Zeile"          # Zeilennummer im Export (1 = erste Datenzeile)
+
+_LAST_SURVEY: dict[tuple, tuple[pd.DataFrame, np.ndarray, np.ndarray]] = {}
+
+
+# ---------- Hilfsfunktionen ----------
+def default_survey_path(names=SURVEY_NAMES) -> Path:
+    """Erster vorhandener Export unter den Schreibweisen der Skripte (Dateisysteme mit Groß-/Kleinschreibung)."""
+    return next((Path(name) for name in names if Path(name).exists()), Path(names[0]))
+
+
+DATA_PATH = default_survey_path()
+
+
+def quarantine_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}_quarantine{path.suffix}")
+
+
+def validate_survey(df: pd.DataFrame, design: StudyDesign,
+                    id_column: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Prüft alle Zeilen auf einmal und trennt sie in (saubere Zeilen, Quarantäne).
+
+    Die Quarantäne enthält die Originalspalten plus Zeilennummer und Gründe.
+    Doppelte Teilnehmende werden über id_column erkannt, ohne ID-Spalte über
+    identische Antwortzeilen; die erste Zeile bleibt jeweils erhalten.
+    """
+    reasons = pd.Series("", index=df.index, dtype="string")
+
+    def flag(mask: np.ndarray, text: str) -> None:
+        reasons[mask] = reasons[mask] + text + "; "
+
+    missing_cols = [c for c in [*design.question_ids, *design.demographics]
+                    if c not in df.columns]
+    if missing_cols:
+        raise KeyError(f"Spalten fehlen im Export: {missing_cols}")
+
+    # ---------- Best/Worst-Paare ----------
+    best_codes, worst_codes = design.choice_codes(df)
+    malformed = np.isnan(best_codes) | np.isnan(worst_codes)
+    best, worst = design.system_index(best_codes), design.system_index(worst_codes)
+    out_of_range = ~malformed & ((best < 0) | (worst < 0))
+    same = ~malformed & (best_codes == worst_codes)
+
+    for j, q in enumerate(design.question_ids):
+        flag(malformed[:, j], f"{q}: kein Paar 'best, worst'")
+        flag(out_of_range[:, j], f"{q}: unbekannter Systemcode")
+        flag(same[:, j], f"{q}: best == worst")
+
+    # ---------- Demografie ----------
+    for col, codebook in design.demographics.items():
+        flag(codebook.index(df[col]) < 0, f"{col}: fehlend/unbekannt")
+
+    # ---------- Dubletten ----------
+    key = [id_column] if id_column else [*design.demographics, *design.question_ids]
+    normalized = df[key].astype("string").apply(lambda s: s.str.replace(r"\s+", "", regex=True))
+    flag(normalized.duplicated(keep="first").to_numpy(), "doppelte Teilnahme")
+
+    bad = (reasons != "").to_numpy()
+    quarantine = df[bad].copy()
+    quarantine.insert(0, ROW_COLUMN, np.flatnonzero(bad) + 1)
+    quarantine[REASON_COLUMN] = reasons[bad].str.rstrip("; ")
+    return df[~bad], quarantine
+
+
+def load_survey(path: Path = DATA_PATH, design: StudyDesign | None = None,
+                id_column: str | None = None) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Liest einen Export, schreibt fehlerhafte Zeilen in die Quarantäne-Datei
+    und gibt (saubere Zeilen, best, worst) mit 0-basiertem Systemindex zurück.
+    Der Index der sauberen Zeilen bleibt der Zeilenindex des Exports.
+    Wiederholte Aufrufe für denselben, unveränderten Export (mehrere Skripte in
+    einem Prozess) liefern Kopien des zuletzt geprüften Ergebnisses.
+    """
+    design = design or load_design()
+    stat = Path(path).stat()
+    key = (Path(path).absolute(), stat.st_size, stat.st_mtime_ns, id_column, id(design))
+    if key not in _LAST_SURVEY:
+        df = pd.read_csv(path)
+        clean, quarantine = validate_survey(df, design, id_column=id_column)
+        quarantine.to_csv(quarantine_path(path), index=False)
+        if len(quarantine):
+            print(f"{len(quarantine)} von {len(df)} Zeilen in Quarantäne → {quarantine_path(path)}")
+        _LAST_SURVEY.clear()
+        _LAST_SURVEY[key] = (clean, *design.choice_arrays(clean))
+    clean, best, worst = _LAST_SURVEY[key]
+    return clean.copy(), best.copy(), worst.copy()
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_PATH
+    clean, best, worst = load_survey(path)
+    quarantined = pd.read_csv(quarantine_path(path))
+    print(f"{len(clean)} gültige Zeilen, {len(quarantined)} in {quarantine_path(path)}")
+    for _, r in quarantined.iterrows():
+        print(f"  Zeile {r[ROW_COLUMN]}: {r[REASON_COLUMN]}")
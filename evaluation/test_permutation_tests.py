@@ -0,0 +1,89 @@
+# -----------------------------------------------------------
+# Tests für permutation_tests.py bei großen Stichproben
+#   • H gegen scipy.stats.kruskal bei n ≈ 10⁵ (kein int64-Überlauf)
+#   • große, teilerfremde Gruppen → Monte-Carlo statt OverflowError
+#   • kleine Tabellen mit Bindungen: exakte p-Werte gegen vollständige Aufzählung
+# -----------------------------------------------------------
+
+from itertools import combinations, product
+
+import numpy as np
+from scipy import stats
+
+from permutation_tests import category_table, rank_sum_key, rank_sum_test, signed_rank_test
+
+SCALE = (1, 5)
+
+
+def _large_panel(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    group = np.repeat(np.arange(len(sizes)), sizes)
+    values = rng.integers(SCALE[0], SCALE[1] + 1, len(group)).astype(float)
+    return values, group
+
+
+def _enumerated_kruskal_p(values, sizes):
+    """p aus allen Zuordnungen der Werte auf Gruppen der Größen sizes (gleich wahrscheinlich)."""
+    observed = stats.kruskal(*np.split(values, np.cumsum(sizes)[:-1])).statistic
+    hits = total = 0
+    def assign(free, remaining, groups):
+        nonlocal hits, total
+        if not remaining:
+            statistic = stats.kruskal(*[values[list(g)] for g in groups]).statistic
+            hits += statistic >= observed - 1e-9
+            total += 1
+            return
+        for chosen in combinations(free, remaining[0]):
+            assign([i for i in free if i not in chosen], remaining[1:], groups + [chosen])
+    assign(list(range(len(values))), list(sizes), [])
+    return hits / total
+
+
+def _enumerated_signed_rank_p(diff):
+    """p aus allen 2ⁿ Vorzeichen der Nicht-Null-Differenzen (zweiseitig um E[W⁺])."""
+    diff = diff[diff != 0]
+    ranks = stats.rankdata(np.abs(diff))
+    center = ranks.sum() / 2
+    observed = abs(ranks[diff > 0].sum() - center)
+    signs = np.array(list(product([0, 1], repeat=len(diff))))
+    return (np.abs(signs @ ranks - center) >= observed - 1e-9).mean()
+
+
+def test_kruskal_h_matches_scipy_for_large_panel():
+    values, group = _large_panel([30_011, 29_989, 30_007, 30_013])
+    table = category_table(values, group, 4, SCALE)
+    result = rank_sum_test(table, reps=200, rng=np.random.default_rng(1))
+    expected = stats.kruskal(*[values[group == g] for g in range(4)])
+    assert np.isclose(result["H"], expected.statistic, rtol=1e-9)
+    assert result["method"] == "Monte-Carlo"
+    assert 0 < result["p"] <= 1
+
+
+def test_coprime_group_sizes_fall_back_to_monte_carlo():
+    values, group = _large_panel([100_003, 100_019, 100_043, 100_049])
+    table = category_table(values, group, 4, SCALE)
+    assert rank_sum_key(table) is None
+    result = rank_sum_test(table, reps=200, rng=np.random.default_rng(1))
+    expected = stats.kruskal(*[values[group == g] for g in range(4)])
+    assert result["method"] == "Monte-Carlo"
+    assert np.isclose(result["H"], expected.statistic, rtol=1e-9)
+
+
+def test_small_rank_sum_tables_match_full_enumeration():
+    for sizes, values in [
+        ([4, 5], [1, 2, 2, 4, 2, 3, 3, 5, 5]),
+        ([3, 3, 4], [1, 1, 3, 2, 3, 3, 4, 5, 5, 2]),
+    ]:
+        values = np.array(values, float)
+        group = np.repeat(np.arange(len(sizes)), sizes)
+        result = rank_sum_test(category_table(values, group, len(sizes), SCALE))
+        assert result["method"] == "exakt"
+        assert np.isclose(result["p"], _enumerated_kruskal_p(values, sizes), rtol=1e-9)
+
+
+def test_small_signed_rank_matches_full_enumeration():
+    values = np.array([4, 5, 2, 3, 5, 4, 1, 5, 4, 2, 2, 1], float)     # eine Null bei mu = 3
+    result = signed_rank_test(values, mu=3)
+    assert result["method"] == "exakt"
+    assert result["N"] == 11
+    assert np.isclose(result["p"], _enumerated_signed_rank_p(values - 3), rtol=1e-9)
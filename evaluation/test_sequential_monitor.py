@@ -0,0 +1,22 @@
+# -----------------------------------------------------------
+# Tests für die Alpha-Spending-Grenzen in sequential_monitor.py
+#   • O'Brien–Fleming (Lan-DeMets, α/2 je Seite) und Pocock bei vier gleich
+#     verteilten Zwischenanalysen gegen die publizierten Werte (ldbounds/gsDesign)
+# -----------------------------------------------------------
+
+import numpy as np
+
+from sequential_monitor import boundaries, spent_alpha
+
+LOOKS = [0.25, 0.5, 0.75, 1.0]
+
+
+def test_obrien_fleming_matches_published_four_look_bounds():
+    c = boundaries(LOOKS, alpha=0.05, kind="obf")
+    np.testing.assert_allclose(c, [4.333, 2.963, 2.359, 2.014], atol=2e-3)
+    assert np.isclose(spent_alpha(1.0, 0.05, "obf"), 0.05)
+
+
+def test_pocock_matches_published_four_look_bounds():
+    c = boundaries(LOOKS, alpha=0.05, kind="pocock")
+    np.testing.assert_allclose(c, [2.368, 2.368, 2.358, 2.350], atol=2e-3)
@@ -0,0 +1,39 @@
+# -----------------------------------------------------------
+# Tests für das Append-only-Antwortlog in survey_server.py
+#   • ein halb geschriebener Record am Ende (Absturz) wird vor dem Anhängen
+#     gekürzt, alle später geschriebenen Records bleiben lesbar
+# -----------------------------------------------------------
+
+import asyncio
+import uuid
+
+import numpy as np
+
+from survey_server import KIND_ANSWER, RECORD_DTYPE, ResponseLog, make_records, read_log
+
+
+def _append(path, records):
+    async def run():
+        log = ResponseLog(path, flush_interval=0)
+        try:
+            await log.append(records)
+        finally:
+            log.close()
+    asyncio.run(run())
+
+
+def test_append_after_torn_tail_keeps_all_records(tmp_path):
+    path = tmp_path / "responses.log"
+    respondent = uuid.uuid4().bytes
+    before = make_records(respondent, KIND_ANSWER, [0, 1], a=3, b=7)
+    path.write_bytes(before.tobytes() + b"\x01" * 10)   # Absturz mitten im dritten Record
+
+    after = make_records(respondent, KIND_ANSWER, [2, 3, 4], a=5, b=2)
+    _append(path, after)
+
+    assert path.stat().st_size == 5 * RECORD_DTYPE.itemsize
+    records, offset = read_log(path)
+    assert offset == path.stat().st_size
+    assert len(records) == 5
+    np.testing.assert_array_equal(records["field"], [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(records["a"], [3, 3, 5, 5, 5])
@@ -2,7 +2,14 @@ import pandas as pd
 from math import sqrt
 from scipy.stats import wilcoxon, norm, shapiro
 
-realism = pd.read_csv("survey_entries.csv")["Realismus"].astype(float).dropna()
+from result_store import ResultStore
+from study_design import load_design
+from survey_validation import DATA_PATH, load_survey
+
+design = load_design()
+df, _, _ = load_survey(DATA_PATH, design)
+realism = pd.to_numeric(df[design.realism_column], errors="coerce").dropna()
+run = ResultStore().run("realism_wilcoxon", inputs=[DATA_PATH], params={"mu": 3})
 n = len(realism)
 
 # Wilcoxon-Test (gegen Median = 3)
@@ -15,3 +22,8 @@ r = z / sqrt(n)           # Effektgröße nach Rosenthal
 print(f"n = {n},  Mittel = {realism.mean():.2f},  SD = {realism.std(ddof=1):.2f}")
 print("Shapiro-p =", shapiro(realism).pvalue)  # Non-Normalität bestätigt
 print(f"Wilcoxon: W = {W:.2f}, z = {z:.2f}, p = {p:.3f}, r = {r:.2f}")
+
+run.add("wilcoxon_W", W, p_value=p, n=n)
+run.add("wilcoxon_r", r, n=n)
+run.add("mean", realism.mean(), n=n)
+run.save()